@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""Compare the streaming OBO parser with :mod:`obonet` on the full ``go-basic.obo``.
+
+Install :mod:`obonet` with ``pip install bio2bel_go[benchmarks]``, then run with
+``python benchmarks/bench_obo_parser.py``. The latest release is downloaded if no path is given.
+"""
+
+import gc
+import time
+from typing import Callable, List, Optional
+
+import click
+import obonet
+
+from bio2bel_go.parser import download_go_obo, read_obo
+
+
+def _time(func: Callable, path: str, repeat: int) -> List[float]:
+    rv = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        graph = func(path)
+        rv.append(time.perf_counter() - start)
+        del graph
+    return rv
+
+
+@click.command()
+@click.option('-p', '--path', help='Path to an OBO file. Defaults to the latest go-basic.obo.')
+@click.option('-r', '--repeat', type=int, default=3, show_default=True, help='Number of runs for each parser.')
+def main(path: Optional[str], repeat: int):
+    """Time parsing an OBO file with each parser."""
+    if path is None:
+        path = download_go_obo()
+
+    graph = read_obo(path)
+    click.echo(f'{path}: {graph.number_of_nodes()} terms, {graph.number_of_edges()} edges')
+
+    results = {
+        'obonet.read_obo': _time(obonet.read_obo, path, repeat),
+        'bio2bel_go.parser.read_obo': _time(read_obo, path, repeat),
+    }
+    for name, seconds in results.items():
+        click.echo(f'{name:<28} best {min(seconds):.2f}s  mean {sum(seconds) / len(seconds):.2f}s')
+
+    click.echo(f"speedup: {min(results['obonet.read_obo']) / min(results['bio2bel_go.parser.read_obo']):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""Compare the query plans and timings of the hot lookups with and without the composite indexes.
+
+Run with ``python benchmarks/bench_query_plans.py``. A synthetic database is built in a temporary SQLite file (or
+at the given connection), then each query is explained and timed before and after the indexes are created.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Callable, List, Mapping, Optional
+
+import click
+from sqlalchemy import Index, create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session, sessionmaker
+
+from bio2bel_go.bulk import bulk_insert
+from bio2bel_go.models import Annotation, Base, Hierarchy, Synonym, Term
+
+#: The names of the indexes being compared
+INDEX_NAMES = {
+    'ix_go_hierarchy_subject_relation',
+    'ix_go_hierarchy_object_relation',
+    'ix_go_annotation_term_tax',
+    'ix_go_annotation_db_db_id',
+    'ix_go_synonym_term_id',
+}
+
+INDEXES: List[Index] = [
+    index
+    for table in (Hierarchy.__table__, Annotation.__table__, Synonym.__table__)
+    for index in table.indexes
+    if index.name in INDEX_NAMES
+]
+
+RELATIONS = ['is_a', 'part_of', 'regulates']
+TAXA = ['9606', '10090', '10116']
+EVIDENCE_CODES = ['IDA', 'IMP', 'IEA', 'TAS']
+
+QUERIES: Mapping[str, Callable[[Session, int], Query]] = {
+    'parents by relation': lambda session, i: session.query(Hierarchy.object_id).filter(
+        Hierarchy.subject_id == i, Hierarchy.relation == 'is_a'),
+    'children by relation': lambda session, i: session.query(Hierarchy.subject_id).filter(
+        Hierarchy.object_id == i, Hierarchy.relation == 'part_of'),
+    'annotations of a term in a taxon': lambda session, i: session.query(Annotation.db_id).filter(
+        Annotation.term_id == i, Annotation.tax_id == '9606'),
+    'annotations of a gene': lambda session, i: session.query(Annotation.term_id).filter(
+        Annotation.db == 'UniProtKB', Annotation.db_id == f'P{i:05d}'),
+    'synonyms of a term': lambda session, i: session.query(Synonym.name).filter(Synonym.term_id == i),
+}
+
+
+def _populate(session: Session, terms: int, annotations: int) -> None:
+    random.seed(0)
+    bulk_insert(session, Term.__table__, (
+        dict(id=i, go_id=f'GO:{i:07d}', name=f'term {i}', namespace='biological_process', is_complex=False)
+        for i in range(1, terms + 1)
+    ))
+    bulk_insert(session, Synonym.__table__, (
+        dict(term_id=random.randint(1, terms), name=f'synonym {i}')
+        for i in range(terms)
+    ))
+    bulk_insert(session, Hierarchy.__table__, (
+        dict(subject_id=i, object_id=random.randint(1, i - 1), relation=random.choice(RELATIONS))
+        for i in range(2, terms + 1)
+        for _ in range(2)
+    ))
+    bulk_insert(session, Annotation.__table__, (
+        dict(
+            term_id=random.randint(1, terms), db='UniProtKB', db_id=f'P{random.randint(0, 20000):05d}',
+            db_symbol='X', provenance_db='PMID', provenance_id='1', evidence_code=random.choice(EVIDENCE_CODES),
+            tax_id=random.choice(TAXA),
+        )
+        for _ in range(annotations)
+    ))
+
+
+def _explain(engine: Engine, query: Query) -> str:
+    sql = str(query.statement.compile(engine, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN' if engine.dialect.name == 'sqlite' else 'EXPLAIN'
+    return '; '.join(str(row[-1]) for row in engine.execute(f'{prefix} {sql}'))
+
+
+def _time(session: Session, make_query: Callable[[Session, int], Query], terms: int, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in random.sample(range(1, terms + 1), repeat):
+        make_query(session, i).all()
+    return (time.perf_counter() - start) / repeat
+
+
+def _report(engine: Engine, session: Session, terms: int, repeat: int) -> Mapping[str, float]:
+    rv = {}
+    for name, make_query in QUERIES.items():
+        rv[name] = _time(session, make_query, terms, repeat)
+        click.echo(f'  {name:<34} {1000 * rv[name]:8.3f} ms  {_explain(engine, make_query(session, 1))}')
+    return rv
+
+
+@click.command()
+@click.option('-c', '--connection', help='A database connection string. Defaults to a temporary SQLite file.')
+@click.option('-t', '--terms', type=int, default=20000, show_default=True, help='Number of synthetic terms.')
+@click.option('-a', '--annotations', type=int, default=500000, show_default=True,
+              help='Number of synthetic annotations.')
+@click.option('-r', '--repeat', type=int, default=200, show_default=True, help='Number of lookups per query.')
+def main(connection: Optional[str], terms: int, annotations: int, repeat: int):
+    """Explain and time the hot lookups before and after creating the composite indexes."""
+    directory = tempfile.mkdtemp()
+    engine = create_engine(connection or f'sqlite:///{os.path.join(directory, "bench.db")}')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    try:
+        for index in INDEXES:
+            index.drop(engine)
+        _populate(session, terms, annotations)
+
+        click.echo('before:')
+        before = _report(engine, session, terms, repeat)
+
+        for index in INDEXES:
+            index.create(engine)
+        engine.execute('ANALYZE')
+
+        click.echo('after:')
+        after = _report(engine, session, terms, repeat)
+
+        click.echo('speedup:')
+        for name in QUERIES:
+            click.echo(f'  {name:<34} {before[name] / after[name]:8.1f}x')
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
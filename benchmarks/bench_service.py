@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""Load test the read-only service layer against a single shared session.
+
+Run with ``python benchmarks/bench_service.py``. A synthetic database is built in a temporary SQLite file (or at the
+given connection, like a local PostgreSQL), then each number of concurrent clients sends a mix of batched term,
+ancestor, and annotation lookups. The baseline sends the same lookups through one session behind a lock, which is how
+requests are served through :class:`bio2bel_go.Manager`. The 50th and 99th percentiles of the latency of each request
+and the throughput are reported.
+"""
+
+import importlib.util
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+import click
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from bio2bel_go.models import Base
+from bio2bel_go.service import GOService, build_service_engine
+
+
+def _load_populate() -> Callable:
+    """Load the function that fills a database with synthetic data from the query plan benchmark next to this one."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_query_plans.py')
+    spec = importlib.util.spec_from_file_location('bench_query_plans', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module._populate
+
+
+_populate = _load_populate()
+
+#: A request takes a random number generator and makes one batched lookup
+Request = Callable[[random.Random], object]
+
+
+def _make_requests(service: GOService, terms: int, batch_size: int) -> List[Request]:
+    def _go_ids(rng: random.Random) -> List[str]:
+        return [f'GO:{i:07d}' for i in rng.sample(range(1, terms + 1), batch_size)]
+
+    def _genes(rng: random.Random) -> List[str]:
+        return [f'P{i:05d}' for i in rng.sample(range(20000), batch_size)]
+
+    return [
+        lambda rng: service.get_terms(_go_ids(rng)),
+        lambda rng: service.get_ancestors(_go_ids(rng), max_depth=3),
+        lambda rng: service.get_annotations(_genes(rng), taxa=['9606']),
+    ]
+
+
+def _run(requests: Sequence[Request], concurrency: int, count: int, lock: Optional[threading.Lock]) -> None:
+    def _send(i: int) -> float:
+        rng = random.Random(i)
+        request = rng.choice(requests)
+        start = time.perf_counter()
+        if lock is None:
+            request(rng)
+        else:
+            with lock:
+                request(rng)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.array(list(executor.map(_send, range(count))))
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = 1000 * np.percentile(latencies, [50, 99])
+    click.echo(f'  {concurrency:>4} clients  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  {count / elapsed:8.1f} requests/s')
+
+
+@click.command()
+@click.option('-c', '--connection', help='A database connection string. Defaults to a temporary SQLite file.')
+@click.option('-t', '--terms', type=int, default=20000, show_default=True, help='Number of synthetic terms.')
+@click.option('-a', '--annotations', type=int, default=200000, show_default=True,
+              help='Number of synthetic annotations.')
+@click.option('-n', '--concurrency', type=int, multiple=True, default=[1, 4, 16], show_default=True,
+              help='Number of concurrent clients. Can be given more than once.')
+@click.option('-r', '--requests', 'count', type=int, default=1000, show_default=True,
+              help='Number of requests for each number of clients.')
+@click.option('-b', '--batch-size', type=int, default=50, show_default=True,
+              help='Number of identifiers in each request.')
+@click.option('-p', '--pool-size', type=int, default=8, show_default=True, help='Number of pooled connections.')
+def main(connection: Optional[str], terms: int, annotations: int, concurrency: Sequence[int], count: int,
+         batch_size: int, pool_size: int):
+    """Report the latency of batched lookups at each number of concurrent clients."""
+    directory = tempfile.mkdtemp()
+    service = GOService.from_connection(
+        connection or f'sqlite:///{os.path.join(directory, "bench.db")}',
+        pool_size=pool_size,
+    )
+    Base.metadata.create_all(service.engine)
+
+    try:
+        session = sessionmaker(bind=service.engine)()
+        _populate(session, terms, annotations)
+        session.close()
+
+        requests = _make_requests(service, terms, batch_size)
+
+        click.echo('single session:')
+        # Every request goes through the same session and connection, one at a time
+        single = GOService(build_service_engine(str(service.engine.url), pool_size=1, max_overflow=0), dispose=True)
+        for n in concurrency:
+            _run(_make_requests(single, terms, batch_size), n, count, threading.Lock())
+        single.close()
+
+        click.echo('service:')
+        for n in concurrency:
+            _run(requests, n, count, None)
+    finally:
+        Base.metadata.drop_all(service.engine)
+        service.close()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+"""Time the hot paths of Bio2BEL GO on synthetic ontologies and annotations, and catch regressions offline.
+
+Run with ``python benchmarks/bench_suite.py``. The synthetic OBO and GAF files are made by
+:mod:`bio2bel_go.synthetic` the first time each scale is used, and kept in the Bio2BEL GO data directory. A template
+SQLite database is populated from them once. Then each benchmark runs in a fresh process, so its peak resident set size
+(RSS) can be reported over that of a process that only imports Bio2BEL GO.
+
+Save the results with ``--output results.json``, then compare a later run against them with
+``--baseline results.json``. The script exits with an error if any benchmark got slower than the tolerance allows.
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import click
+
+from bio2bel_go import Manager
+from bio2bel_go.constants import DATA_DIR
+from bio2bel_go.parser import get_go_from_obo
+from bio2bel_go.report import get_peak_rss
+from bio2bel_go.synthetic import write_synthetic_files
+from pybel import BELGraph
+from pybel.dsl import bioprocess
+
+#: The numbers of terms and annotations at each scale
+SCALES = {
+    'small': (1000, 20000),
+    'medium': (10000, 200000),
+    'large': (100000, 2000000),
+    'huge': (100000, 10000000),
+}
+
+_SCALES_HELP = ', '.join(f'{scale} ({terms}/{annotations})' for scale, (terms, annotations) in SCALES.items())
+
+#: The number of nodes looked up or enriched in each run
+NODES = 1000
+
+
+class Setup(NamedTuple):
+    """The inputs of the benchmarks."""
+
+    terms: int
+    obo_path: str
+    gaf_path: str
+    #: The path of a SQLite database populated from the files
+    database_path: str
+
+
+def _make_nodes(setup: Setup, count: int, seed: int = 0) -> List:
+    """Make biological process nodes for synthetic terms, half with identifiers and half with names."""
+    rng = random.Random(seed)
+    return [
+        bioprocess(namespace='GO', identifier=f'GO:{9000000 + i:07d}')
+        if j % 2 else
+        bioprocess(namespace='GO', name=f'synthetic term {i}')
+        for j, i in enumerate(rng.sample(range(setup.terms), min(count, setup.terms)))
+    ]
+
+
+def _time(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _bench_get_go_from_obo(setup: Setup, repeat: int) -> Tuple[List[float], int]:
+    return [_time(lambda: get_go_from_obo(path=setup.obo_path)) for _ in range(repeat)], 1
+
+
+def _bench_populate(setup: Setup, repeat: int) -> Tuple[List[float], int]:
+    rv = []
+    for _ in range(repeat):
+        directory = tempfile.mkdtemp()
+        manager = Manager(connection=f'sqlite:///{os.path.join(directory, "populate.db")}')
+        rv.append(_time(lambda: manager.populate(path=setup.obo_path, annotation_paths=[setup.gaf_path])))
+        manager.session.close()
+        manager.engine.dispose()
+        shutil.rmtree(directory)
+    return rv, 1
+
+
+def _get_manager(setup: Setup, use_term_index: bool = False) -> Manager:
+    manager = Manager(connection=f'sqlite:///{setup.database_path}', use_term_index=use_term_index)
+    if use_term_index:
+        manager.get_term_index()
+    else:
+        manager.get_name_index()
+    return manager
+
+
+def _bench_lookup_term(setup: Setup, repeat: int, use_term_index: bool = False) -> Tuple[List[float], int]:
+    manager = _get_manager(setup, use_term_index=use_term_index)
+    nodes = _make_nodes(setup, NODES)
+
+    def _lookup():
+        for node in nodes:
+            manager.lookup_term(node)
+
+    return [_time(_lookup) for _ in range(repeat)], len(nodes)
+
+
+def _bench_enrich_bioprocesses(setup: Setup, repeat: int, use_term_index: bool = False) -> Tuple[List[float], int]:
+    manager = _get_manager(setup, use_term_index=use_term_index)
+    nodes = _make_nodes(setup, NODES)
+
+    rv = []
+    for _ in range(repeat):
+        graph = BELGraph()
+        for node in nodes:
+            graph.add_node_from_data(node)
+        rv.append(_time(lambda: manager.enrich_bioprocesses(graph)))
+    return rv, len(nodes)
+
+
+def _bench_to_bel(setup: Setup, repeat: int) -> Tuple[List[float], int]:
+    manager = _get_manager(setup)
+    return [_time(manager.to_bel) for _ in range(repeat)], 1
+
+
+#: Functions that run a benchmark a number of times and return the seconds of each run and the operations in each
+BENCHMARKS: Mapping[str, Callable[[Setup, int], Tuple[List[float], int]]] = {
+    'get_go_from_obo': _bench_get_go_from_obo,
+    'populate': _bench_populate,
+    'lookup_term': _bench_lookup_term,
+    'lookup_term (term index)': lambda setup, repeat: _bench_lookup_term(setup, repeat, use_term_index=True),
+    'enrich_bioprocesses': _bench_enrich_bioprocesses,
+    'enrich_bioprocesses (term index)': lambda setup, repeat: _bench_enrich_bioprocesses(
+        setup, repeat, use_term_index=True,
+    ),
+    'to_bel': _bench_to_bel,
+}
+
+
+def _get_peak_rss() -> Optional[int]:
+    """Get the peak RSS of this process in bytes.
+
+    On Linux, the high-water mark of the process's own memory is read, since the peak RSS from :mod:`resource`
+    starts from that of the parent process.
+    """
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return 1024 * int(line.split()[1])
+    except OSError:
+        pass
+    return get_peak_rss()
+
+
+def _run_benchmark(name: Optional[str], setup: Setup, repeat: int) -> Tuple[List[float], int, Optional[int]]:
+    """Run a benchmark in this process, or nothing if the name is None, and get the peak RSS of the process."""
+    seconds, operations = BENCHMARKS[name](setup, repeat) if name is not None else ([], 0)
+    return seconds, operations, _get_peak_rss()
+
+
+def _run_isolated(name: Optional[str], setup: Setup, repeat: int) -> Tuple[List[float], int, Optional[int]]:
+    """Run a benchmark in a fresh process, which can start its own worker processes."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(_run_benchmark, name, setup, repeat).result()
+
+
+def _compare(results: Mapping[str, Mapping], baseline: Mapping[str, Mapping], tolerance: float) -> List[str]:
+    """Get the benchmarks whose best time is slower than the baseline by more than the tolerance."""
+    rv = []
+    click.echo('compared to the baseline:')
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['best'] / baseline[name]['best']
+        regressed = ratio > 1 + tolerance
+        click.echo(f'  {name:<34} {ratio:6.2f}x{"  REGRESSION" if regressed else ""}')
+        if regressed:
+            rv.append(name)
+    return rv
+
+
+@click.command()
+@click.option('-s', '--scale', type=click.Choice(SCALES), default='small', show_default=True,
+              help=f'The numbers of terms and annotations: {_SCALES_HELP}')
+@click.option('-t', '--terms', type=int, help='Number of synthetic terms. Overrides the scale.')
+@click.option('-a', '--annotations', type=int, help='Number of synthetic annotations. Overrides the scale.')
+@click.option('--seed', type=int, default=0, show_default=True, help='Seed of the synthetic files.')
+@click.option('-b', '--benchmark', 'names', type=click.Choice(BENCHMARKS), multiple=True,
+              help='Benchmarks to run. Can be given more than once. Defaults to all.')
+@click.option('-r', '--repeat', type=int, default=3, show_default=True, help='Number of runs of each benchmark.')
+@click.option('-d', '--directory', type=click.Path(file_okay=False), default=os.path.join(DATA_DIR, 'synthetic'),
+              show_default=True, help='Directory of the synthetic files.')
+@click.option('-o', '--output', type=click.File('w'), help='Write the results as JSON.')
+@click.option('--baseline', type=click.File(), help='Compare with results written with --output.')
+@click.option('--tolerance', type=float, default=0.2, show_default=True,
+              help='How much slower than the baseline a benchmark can get before it counts as a regression.')
+def main(scale: str, terms: Optional[int], annotations: Optional[int], seed: int, names: Sequence[str], repeat: int,
+         directory: str, output, baseline, tolerance: float):
+    """Time the hot paths on synthetic data and report the peak memory of each."""
+    default_terms, default_annotations = SCALES[scale]
+    terms = terms or default_terms
+    annotations = annotations or default_annotations
+
+    click.echo(f'writing {terms} terms and {annotations} annotations to {directory}')
+    obo_path, gaf_path = write_synthetic_files(directory, terms, annotations, seed=seed)
+
+    database_directory = tempfile.mkdtemp()
+    setup = Setup(terms, obo_path, gaf_path, os.path.join(database_directory, 'bench.db'))
+
+    try:
+        click.echo('populating the template database')
+        manager = Manager(connection=f'sqlite:///{setup.database_path}')
+        manager.populate(path=obo_path, annotation_paths=[gaf_path])
+        # The namespace is only made the first time a graph is enriched, which shouldn't count for any benchmark
+        manager.upload_bel_namespace()
+        manager.session.close()
+
+        _, _, baseline_rss = _run_isolated(None, setup, repeat)
+
+        results: Dict[str, Dict] = {}
+        for name in names or BENCHMARKS:
+            seconds, operations, peak_rss = _run_isolated(name, setup, repeat)
+            results[name] = result = dict(
+                best=min(seconds),
+                mean=sum(seconds) / len(seconds),
+                operations=operations,
+                peak_rss=None if peak_rss is None else peak_rss - baseline_rss,
+            )
+            per_operation = f'{1e6 * result["best"] / operations:10.1f} µs/op' if operations > 1 else ' ' * 16
+            memory = '' if peak_rss is None else f'{result["peak_rss"] / 2 ** 20:8.1f} MiB'
+            click.echo(f'  {name:<34} best {result["best"]:8.3f}s  mean {result["mean"]:8.3f}s {per_operation}'
+                       f'  {memory}')
+    finally:
+        shutil.rmtree(database_directory)
+
+    if output is not None:
+        json.dump(
+            dict(terms=terms, annotations=annotations, seed=seed, python=sys.version.split()[0], results=results),
+            output,
+            indent=2,
+        )
+
+    if baseline is not None and _compare(results, json.load(baseline)['results'], tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -25,12 +25,17 @@ CLASSIFIERS = [
 INSTALL_REQUIRES = [
     'networkx>=2.1',
     'pybel>=0.13.0,<0.14.0',
-    'obonet',
     'click',
     'bio2bel>=0.1.3',
     'tqdm',
     'sqlalchemy',
+    'numpy',
 ]
+EXTRAS_REQUIRE = {
+    'benchmarks': [
+        'obonet',
+    ],
+}
 ENTRY_POINTS = {
     'bio2bel': [
         'go = bio2bel_go',
@@ -85,6 +90,7 @@ if __name__ == '__main__':
         packages=PACKAGES,
         package_dir={'': 'src'},
         install_requires=INSTALL_REQUIRES,
+        extras_require=EXTRAS_REQUIRE,
         entry_points=ENTRY_POINTS,
         classifiers=CLASSIFIERS,
         keywords=KEYWORDS,
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""Bulk loading of rows with SQLAlchemy Core.
+
+Rows are inserted in fixed-size chunks with ``executemany``, or with ``COPY`` on PostgreSQL, and each chunk is
+committed on its own so neither ORM objects nor a giant transaction accumulate during :meth:`Manager.populate`.
+Updates and deletes for :meth:`Manager.update` are batched the same way.
+"""
+
+import csv
+import io
+import logging
+import time
+from typing import Any, Iterable, List, Mapping, NamedTuple
+
+from sqlalchemy import Column, Table, bindparam, func, text
+from sqlalchemy.orm import Session
+
+from .constants import SQL_IN_CHUNKSIZE
+from .utils import iter_chunks
+
+log = logging.getLogger(__name__)
+
+#: How ``COPY`` spells a missing value, so that it isn't confused with an empty string
+COPY_NULL = r'\N'
+
+__all__ = [
+    'DEFAULT_CHUNKSIZE',
+    'InsertStats',
+    'bulk_insert',
+    'bulk_update',
+    'bulk_delete',
+    'get_max_id',
+]
+
+#: The default number of rows inserted and committed at once
+DEFAULT_CHUNKSIZE = 50000
+
+
+class InsertStats(NamedTuple):
+    """Statistics about a bulk insert into one table."""
+
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """Get the insert throughput."""
+        return self.rows / self.seconds if self.seconds else float(self.rows)
+
+
+def get_max_id(session: Session, table: Table) -> int:
+    """Get the largest primary key in the table, or 0 if it's empty."""
+    return session.query(func.max(table.c.id)).scalar() or 0
+
+
+def _copy_chunk(session: Session, table: Table, columns: List[str], chunk: List[Mapping[str, Any]]) -> None:
+    """Load a chunk with PostgreSQL's ``COPY``.
+
+    Missing values are written unquoted as :data:`COPY_NULL` so they are loaded as ``NULL`` rather than as empty
+    strings.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL)
+    writer.writerows(
+        [
+            COPY_NULL if value is None else value
+            for value in (row.get(column) for column in columns)
+        ]
+        for row in chunk
+    )
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert(
+        f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        buffer,
+    )
+
+
+def _reset_sequence(session: Session, table: Table) -> None:
+    """Move a PostgreSQL serial past explicitly inserted primary keys."""
+    session.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT MAX(id) FROM {table.name}))"
+    ))
+
+
+def bulk_insert(session: Session,
+                table: Table,
+                rows: Iterable[Mapping[str, Any]],
+                chunksize: int = DEFAULT_CHUNKSIZE,
+                ) -> InsertStats:
+    """Insert the rows into the table in chunks, committing after each.
+
+    :param session: A SQLAlchemy session
+    :param table: The table to insert into
+    :param rows: An iterable of dictionaries whose keys are column names. All rows must have the same keys.
+    :param chunksize: The number of rows inserted and committed at once
+    """
+    use_copy = session.bind.dialect.name == 'postgresql'
+    has_ids = False
+    count = 0
+
+    t = time.time()
+    for chunk in iter_chunks(rows, chunksize):
+        columns = list(chunk[0])
+        has_ids = has_ids or 'id' in columns
+
+        if use_copy:
+            _copy_chunk(session, table, columns, chunk)
+        else:
+            session.execute(table.insert(), chunk)
+
+        session.commit()
+        count += len(chunk)
+        log.debug('inserted %d rows into %s', count, table.name)
+
+    if use_copy and has_ids:
+        _reset_sequence(session, table)
+        session.commit()
+
+    stats = InsertStats(table=table.name, rows=count, seconds=time.time() - t)
+    log.info('inserted %d rows into %s in %.2f seconds (%.0f rows/sec)', stats.rows, stats.table, stats.seconds,
+             stats.rows_per_second)
+    return stats
+
+
+def bulk_update(session: Session,
+                table: Table,
+                rows: Iterable[Mapping[str, Any]],
+                chunksize: int = DEFAULT_CHUNKSIZE,
+                ) -> int:
+    """Update rows by primary key in chunks, committing after each.
+
+    :param session: A SQLAlchemy session
+    :param table: The table to update
+    :param rows: An iterable of dictionaries with the ``id`` of the row and the new values of the other columns. All
+     rows must have the same keys.
+    :param chunksize: The number of rows updated and committed at once
+    :return: The number of rows updated
+    """
+    count = 0
+    for chunk in iter_chunks(rows, chunksize):
+        columns = [column for column in chunk[0] if column != 'id']
+        statement = table.update().where(table.c.id == bindparam('_id')).values({
+            column: bindparam(column)
+            for column in columns
+        })
+        session.execute(statement, [
+            dict(row, _id=row['id'])
+            for row in chunk
+        ])
+        session.commit()
+        count += len(chunk)
+
+    log.info('updated %d rows in %s', count, table.name)
+    return count
+
+
+def bulk_delete(session: Session,
+                table: Table,
+                column: Column,
+                values: Iterable[Any],
+                chunksize: int = SQL_IN_CHUNKSIZE,
+                ) -> int:
+    """Delete the rows whose values in the given column are in the given values with chunked ``IN`` statements.
+
+    :param session: A SQLAlchemy session
+    :param table: The table to delete from
+    :param column: The column to match, like ``table.c.id``
+    :param values: An iterable of values for the column
+    :param chunksize: The number of values bound in each statement. Each is committed on its own.
+    :return: The number of rows deleted
+    """
+    count = 0
+    for chunk in iter_chunks(values, chunksize):
+        count += session.execute(table.delete().where(column.in_(chunk))).rowcount
+        session.commit()
+
+    log.info('deleted %d rows from %s', count, table.name)
+    return count
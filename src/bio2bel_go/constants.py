@@ -15,8 +15,17 @@ GO_OBO_URL = 'http://purl.obolibrary.org/obo/go/go-basic.obo'
 #: The local cache location where the GO OBO file is stored
 GO_OBO_PATH = os.path.join(DATA_DIR, 'go-basic.obo')
 
-#: The local cache location where the parsed and pickled GO OBO file is stored
-GO_OBO_PICKLE_PATH = os.path.join(DATA_DIR, 'go-basic.obo.gpickle')
+#: The local cache location where the columnar snapshot of the parsed GO OBO file is stored
+GO_OBO_SNAPSHOT_PATH = os.path.join(DATA_DIR, 'go-basic.snapshot')
+
+#: The local cache location where the columnar tables of GAF files are stored
+GAF_CACHE_DIRECTORY = os.path.join(DATA_DIR, 'gaf_cache')
+
+#: The local cache location where the information content of the terms in each GO release is stored
+IC_CACHE_DIRECTORY = os.path.join(DATA_DIR, 'ic_cache')
+
+#: The maximum number of values bound to a single ``IN (...)`` clause, which stays under SQLite's parameter limit
+SQL_IN_CHUNKSIZE = 500
 
 BEL_NAMESPACES = {
     'GO',
@@ -32,6 +41,19 @@ GO_BIOLOGICAL_PROCESS = 'biological_process'
 GO_CELLULAR_COMPONENT = 'cellular_component'
 GO_MOLECULAR_FUNCTION = 'molecular_function'
 
+#: The GAF aspect codes of the GO namespaces
+GO_ASPECTS = {
+    GO_BIOLOGICAL_PROCESS: 'P',
+    GO_CELLULAR_COMPONENT: 'C',
+    GO_MOLECULAR_FUNCTION: 'F',
+}
+
+#: The relations annotations are propagated along by the true-path rule
+TRUE_PATH_RELATIONS = ('is_a', 'part_of')
+
+#: The GO term for "protein-containing complex", whose descendants are encoded as BEL complexes
+GO_COMPLEX_ID = 'GO:0032991'
+
 GO_HUMAN_ANNOTATIONS_URL = 'http://geneontology.org/gene-associations/goa_human.gaf.gz'
 GO_HUMAN_ANNOTATIONS_PATH = os.path.join(DATA_DIR, 'goa_human.gaf.gz')
 
@@ -2,7 +2,28 @@
 
 """BEL DSL elements for GO."""
 
-from pybel.dsl import BiologicalProcess
+from collections import OrderedDict
+from typing import Mapping, Optional, Union
+
+from pybel.constants import CITATION_REFERENCE, CITATION_TYPE
+from pybel.dsl import Abundance, BaseEntity, BiologicalProcess, NamedComplexAbundance
+from .constants import GO_BIOLOGICAL_PROCESS, GO_CELLULAR_COMPONENT, GO_MOLECULAR_FUNCTION
+
+#: The databases of annotated gene products that can be converted to BEL
+BEL_ANNOTATION_DBS = {'ComplexPortal'}
+
+#: The BEL encodings for each namespace and whether the term is a complex
+BEL_ENCODINGS = {
+    (GO_BIOLOGICAL_PROCESS, False): 'B',
+    (GO_BIOLOGICAL_PROCESS, True): 'B',
+    (GO_CELLULAR_COMPONENT, False): 'A',
+    (GO_CELLULAR_COMPONENT, True): 'C',
+    (GO_MOLECULAR_FUNCTION, False): 'Y',
+    (GO_MOLECULAR_FUNCTION, True): 'Y',
+}
+
+#: The default maximum number of BEL nodes kept in the term cache, which is enough to hold all of GO
+BEL_NODE_CACHE_SIZE = 100000
 
 
 def gobp(name: str, identifier: str) -> BiologicalProcess:
@@ -12,3 +33,84 @@ def gobp(name: str, identifier: str) -> BiologicalProcess:
         name=name,
         identifier=identifier,
     )
+
+
+def term_to_bel(go_id: str, name: str, namespace: str, is_complex: bool) -> Optional[BaseEntity]:
+    """Make a BEL node for a GO term from its columns."""
+    if namespace == GO_BIOLOGICAL_PROCESS:
+        return gobp(
+            name=name,
+            identifier=go_id,
+        )
+
+    if namespace == GO_CELLULAR_COMPONENT:
+        if is_complex:
+            return NamedComplexAbundance(
+                namespace='go',
+                name=name,
+                identifier=go_id,
+            )
+        else:
+            return Abundance(
+                namespace='go',
+                name=name,
+                identifier=go_id,
+            )
+
+
+class BELNodeCache:
+    """A least recently used cache of the BEL nodes for GO terms, keyed by all of the columns they are made from.
+
+    Since a renamed term has another key, the cache is never out of date, even when it's shared by databases with
+    different GO releases.
+    """
+
+    def __init__(self, maxsize: int = BEL_NODE_CACHE_SIZE) -> None:
+        """Build an empty cache.
+
+        :param maxsize: The maximum number of BEL nodes to keep
+        """
+        self.maxsize = maxsize
+        self._nodes = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def get(self, go_id: str, name: str, namespace: str, is_complex: bool) -> Optional[BaseEntity]:
+        """Get the BEL node for a GO term, building and caching it if it is not cached."""
+        key = go_id, name, namespace, is_complex
+        try:
+            node = self._nodes[key]
+        except KeyError:
+            node = self._nodes[key] = term_to_bel(go_id, name, namespace, is_complex)
+            if len(self._nodes) > self.maxsize:
+                self._nodes.popitem(last=False)
+        else:
+            self._nodes.move_to_end(key)
+
+        return node
+
+    def clear(self) -> None:
+        """Remove all BEL nodes from the cache."""
+        self._nodes.clear()
+
+
+#: The BEL node cache used by :meth:`bio2bel_go.models.Term.as_bel`
+bel_node_cache = BELNodeCache()
+
+
+def annotation_to_bel(db: str, db_id: str, db_symbol: str) -> Optional[BaseEntity]:
+    """Make a BEL node for an annotated gene product from its columns."""
+    if db == 'ComplexPortal':
+        return NamedComplexAbundance(
+            namespace='complexportal',
+            name=db_symbol,
+            identifier=db_id,
+        )
+
+
+def get_citation(provenance_db: str, provenance_id: str) -> Union[str, Mapping[str, str]]:
+    """Get a citation for a GO annotation's provenance, as a PubMed identifier if possible."""
+    if provenance_db.lower() == 'pmid':
+        return provenance_id
+    return {CITATION_TYPE: provenance_db, CITATION_REFERENCE: provenance_id}
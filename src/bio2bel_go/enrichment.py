@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+"""Over-representation analysis of gene sets against GO.
+
+An :class:`AnnotationMatrix` holds the sparse gene × term matrix of annotations, propagated up the ``is_a`` closure of
+the ontology and stored as compressed sparse rows (CSR) from each gene to its terms. It is built once, then each gene
+set is tested against all terms in one vectorized pass: the annotated genes in the set are counted per term with
+:func:`numpy.bincount`, the upper tail of the hypergeometric distribution (the one-sided Fisher's exact test) is summed
+from a table of log-factorials, and the p-values are adjusted with the Benjamini-Hochberg procedure.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from .models import Annotation, Term
+from .ontology import CSR, Ontology, build_csr, gather
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'AnnotationMatrix',
+    'hypergeometric_sf',
+    'benjamini_hochberg',
+]
+
+#: The relations annotations are propagated along by default
+DEFAULT_RELATIONS = ('is_a',)
+
+#: The number of terms whose p-values are summed on the same grid
+_BLOCK_SIZE = 512
+
+
+def _log_factorials(n: int) -> np.ndarray:
+    """Get the natural logarithms of 0!, 1!, ..., n!."""
+    rv = np.zeros(n + 1)
+    np.cumsum(np.log(np.arange(1, n + 1)), out=rv[1:])
+    return rv
+
+
+def _log_binom(log_factorials: np.ndarray, n, k):
+    return log_factorials[n] - log_factorials[k] - log_factorials[n - k]
+
+
+def _sum_pmf(start: np.ndarray,
+             stop: np.ndarray,
+             population: int,
+             successes: np.ndarray,
+             draws: int,
+             log_factorials: np.ndarray,
+             ) -> np.ndarray:
+    """Sum the hypergeometric probability mass from ``start`` to ``stop``, inclusive, on grids of rows × x.
+
+    Rows are sorted by the length of their range and summed in blocks, so short ranges aren't padded to the longest.
+    """
+    rv = np.zeros(len(start))
+    order = np.argsort(stop - start, kind='stable')
+    for i in range(0, len(order), _BLOCK_SIZE):
+        block = order[i:i + _BLOCK_SIZE]
+        rv[block] = _sum_pmf_block(start[block], stop[block], population, successes[block], draws, log_factorials)
+    return rv
+
+
+def _sum_pmf_block(start: np.ndarray,
+                   stop: np.ndarray,
+                   population: int,
+                   successes: np.ndarray,
+                   draws: int,
+                   log_factorials: np.ndarray,
+                   ) -> np.ndarray:
+    width = max(int((stop - start).max()) + 1, 1)
+    x = start[:, None] + np.arange(width)[None, :]
+    valid = x <= stop[:, None]
+    x = np.where(valid, x, start[:, None])
+
+    log_pmf = _log_binom(log_factorials, successes[:, None], x)
+    log_pmf += _log_binom(log_factorials, population - successes[:, None], draws - x)
+    log_pmf -= _log_binom(log_factorials, population, draws)
+    log_pmf[~valid] = -np.inf
+
+    # Factor out the largest term of each row so the sum doesn't underflow, and so empty rows sum to 0
+    peak = log_pmf.max(axis=1)
+    peak[~np.isfinite(peak)] = 0.0
+    return np.exp(peak) * np.exp(log_pmf - peak[:, None]).sum(axis=1)
+
+
+def hypergeometric_sf(k: np.ndarray,
+                      population: int,
+                      successes: np.ndarray,
+                      draws: int,
+                      log_factorials: Optional[np.ndarray] = None,
+                      ) -> np.ndarray:
+    """Get the probability of drawing at least ``k`` successes for each element, vectorized.
+
+    :param k: The observed numbers of successes
+    :param population: The size of the population
+    :param successes: The numbers of successes in the population
+    :param draws: The number of draws without replacement
+    :param log_factorials: The logarithms of the factorials up to at least ``population``
+    """
+    if log_factorials is None:
+        log_factorials = _log_factorials(population)
+
+    k = np.asarray(k, dtype=np.int64)
+    if not len(k):
+        return np.zeros(0)
+
+    # Many terms share the same counts, so each distinct (k, successes) pair is only computed once
+    pairs, inverse = np.unique(k * (population + 1) + np.asarray(successes, dtype=np.int64), return_inverse=True)
+    k, successes = np.divmod(pairs, population + 1)
+    lower = np.maximum(draws - (population - successes), 0)
+    upper = np.minimum(successes, draws)
+
+    # Counts above the mean are summed over the upper tail. Counts at or below it, which make up most of the terms
+    # and have p-values near 1 that don't lose precision to cancellation, are summed over the shorter lower tail.
+    use_tail = k * population > draws * successes
+    rv = np.empty(len(k))
+    rv[use_tail] = _sum_pmf(
+        k[use_tail], upper[use_tail], population, successes[use_tail], draws, log_factorials,
+    )
+    rv[~use_tail] = 1.0 - _sum_pmf(
+        lower[~use_tail], k[~use_tail] - 1, population, successes[~use_tail], draws, log_factorials,
+    )
+    return np.clip(rv, 0.0, 1.0)[inverse]
+
+
+def benjamini_hochberg(p_values: np.ndarray) -> np.ndarray:
+    """Adjust p-values for the false discovery rate with the Benjamini-Hochberg procedure."""
+    p_values = np.asarray(p_values, dtype=float)
+    n = len(p_values)
+    if not n:
+        return p_values
+
+    order = np.argsort(p_values)
+    adjusted = p_values[order] * n / np.arange(1, n + 1)
+    adjusted = np.minimum.accumulate(adjusted[::-1])[::-1]
+
+    rv = np.empty(n)
+    rv[order] = np.minimum(adjusted, 1.0)
+    return rv
+
+
+class AnnotationMatrix:
+    """A sparse gene × term matrix of annotations, propagated up the ontology."""
+
+    def __init__(self, genes: List[str], ontology: Ontology, csr: CSR) -> None:
+        """Wrap the matrix.
+
+        :param genes: The genes, addressed by row
+        :param ontology: The ontology whose term indices are the columns
+        :param csr: The CSR arrays from each gene to all of its (propagated) terms
+        """
+        self.genes = genes
+        self.ontology = ontology
+        self.indptr, self.indices = csr
+        self._gene_index: Dict[str, int] = {gene: index for index, gene in enumerate(genes)}
+
+        self.term_sizes = np.bincount(self.indices, minlength=len(ontology))
+        self._go_ids = np.array(ontology.go_ids, dtype=object)
+        self._names = np.array(ontology.names, dtype=object)
+        self._namespaces = np.array(ontology.namespaces, dtype=object)
+        self._log_factorials = _log_factorials(len(genes))
+
+    @classmethod
+    def from_pairs(cls,
+                   ontology: Ontology,
+                   pairs: Iterable[Tuple[str, str]],
+                   relations: Optional[Sequence[str]] = DEFAULT_RELATIONS,
+                   ) -> 'AnnotationMatrix':
+        """Build a matrix from (gene, GO identifier) pairs, propagating each annotation to all ancestors of its term.
+
+        :param ontology: An ontology
+        :param pairs: Pairs of genes and the GO identifiers of their terms. Terms missing from the ontology are skipped.
+        :param relations: The relations to propagate annotations along. Defaults to ``is_a``. If None, all are used.
+        """
+        gene_index: Dict[str, int] = {}
+        rows, columns = [], []
+        for gene, go_id in pairs:
+            term = ontology.get_index(go_id)
+            if term is None:
+                continue
+            rows.append(gene_index.setdefault(gene, len(gene_index)))
+            columns.append(term)
+
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int32)
+
+        # Each (gene, term) pair adds the gene to the term and all of its ancestors
+        closure_indptr, closure_indices = ontology.get_ancestor_closure(relations=relations)
+        ancestors = gather((closure_indptr, closure_indices), columns)
+        ancestor_rows = np.repeat(rows, np.diff(closure_indptr)[columns])
+
+        size = len(ontology)
+        keys = np.unique(np.concatenate([rows * size + columns, ancestor_rows * size + ancestors]))
+        csr = build_csr(len(gene_index), keys // size, keys % size)
+
+        log.info('built annotation matrix of %d genes and %d propagated annotations', len(gene_index), len(keys))
+        return cls(list(gene_index), ontology, csr)
+
+    @classmethod
+    def from_session(cls,
+                     session: Session,
+                     ontology: Ontology,
+                     key: str = 'db_symbol',
+                     evidence_codes: Optional[Iterable[str]] = None,
+                     relations: Optional[Sequence[str]] = DEFAULT_RELATIONS,
+                     ) -> 'AnnotationMatrix':
+        """Build a matrix from the annotations in the database, skipping ones with a ``NOT`` qualifier.
+
+        :param session: A SQLAlchemy session
+        :param ontology: The ontology of the terms in the database
+        :param key: The column of :class:`Annotation` that identifies genes, like ``db_symbol`` or ``db_id``
+        :param evidence_codes: The evidence codes of the annotations to use. Defaults to all.
+        :param relations: The relations to propagate annotations along. Defaults to ``is_a``. If None, all are used.
+        """
+        query = session.query(getattr(Annotation, key), Term.go_id).join(Annotation.term)
+        query = query.filter((Annotation.qualifier.is_(None)) | (~Annotation.qualifier.contains('NOT')))
+        if evidence_codes is not None:
+            query = query.filter(Annotation.evidence_code.in_(list(evidence_codes)))
+
+        return cls.from_pairs(ontology, query.yield_per(10000), relations=relations)
+
+    def __len__(self) -> int:
+        return len(self.genes)
+
+    def get_gene_indices(self, genes: Iterable[str]) -> np.ndarray:
+        """Get the unique row indices of the genes, skipping ones without annotations."""
+        return np.unique(np.array(
+            [self._gene_index[gene] for gene in genes if gene in self._gene_index],
+            dtype=np.int64,
+        ))
+
+    def count_terms(self, gene_indices: np.ndarray) -> np.ndarray:
+        """Count the genes annotated to each term."""
+        return np.bincount(gather((self.indptr, self.indices), gene_indices), minlength=len(self.ontology))
+
+    def enrichment(self,
+                   genes: Iterable[str],
+                   background: Optional[Iterable[str]] = None,
+                   namespaces: Optional[Iterable[str]] = None,
+                   min_count: int = 1,
+                   ) -> pd.DataFrame:
+        """Test the over-representation of the gene set in each term.
+
+        :param genes: The gene set
+        :param background: The background genes. Defaults to all annotated genes. Only annotated genes are counted
+         in either the gene set or the background.
+        :param namespaces: The namespaces of the terms to test. Defaults to all.
+        :param min_count: The smallest number of genes in the set a term must have to be tested
+        :return: A dataframe of the tested terms sorted by p-value, with the number of genes in the set annotated to
+         each term (``count``) and in the background (``term_size``), the sizes of the set and the background, the
+         p-value, and the Benjamini-Hochberg adjusted p-value (``q_value``).
+        """
+        if background is None:
+            population = len(self)
+            term_sizes = self.term_sizes
+            gene_indices = self.get_gene_indices(genes)
+        else:
+            background_indices = self.get_gene_indices(background)
+            population = len(background_indices)
+            term_sizes = self.count_terms(background_indices)
+            gene_indices = np.intersect1d(self.get_gene_indices(genes), background_indices)
+
+        counts = self.count_terms(gene_indices)
+
+        tested = counts >= max(min_count, 1)
+        if namespaces is not None:
+            tested &= np.isin(self._namespaces, list(namespaces))
+        terms = np.flatnonzero(tested)
+
+        p_values = hypergeometric_sf(
+            counts[terms], population, term_sizes[terms], len(gene_indices),
+            log_factorials=self._log_factorials,
+        )
+
+        rv = pd.DataFrame({
+            'go_id': self._go_ids[terms],
+            'name': self._names[terms],
+            'namespace': self._namespaces[terms],
+            'count': counts[terms],
+            'term_size': term_sizes[terms],
+            'set_size': len(gene_indices),
+            'background_size': population,
+            'p_value': p_values,
+            'q_value': benjamini_hochberg(p_values),
+        })
+        return rv.sort_values('p_value', kind='stable').reset_index(drop=True)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""Streaming export of GO to BEL.
+
+The functions in this module work on iterables of ``(source, target, data)`` edge triples so the hierarchy and
+annotations can be written to node-link JSON or a BEL script as they are read from the database, without first
+building a :class:`pybel.BELGraph` holding every edge.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterable, Mapping, TextIO, Tuple
+
+from pybel import BELGraph
+from pybel.canonicalize import edge_to_bel, to_bel_lines
+from pybel.constants import (
+    ANNOTATIONS, ASSOCIATION, CITATION, CITATION_REFERENCE, CITATION_TYPE, CITATION_TYPE_PUBMED, EVIDENCE, IS_A,
+    PYBEL_AUTOEVIDENCE, RELATION,
+)
+from pybel.dsl import BaseEntity
+from pybel.io.nodelink import to_json
+from pybel.utils import hash_edge
+from .dsl import get_citation
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'EdgeTriple',
+    'make_is_a_data',
+    'make_annotation_data',
+    'add_edge_to_graph',
+    'write_nodelink',
+    'write_bel_script',
+]
+
+#: A source node, a target node, and the edge's data dictionary as stored by PyBEL
+EdgeTriple = Tuple[BaseEntity, BaseEntity, Dict[str, Any]]
+
+
+def make_is_a_data() -> Dict[str, Any]:
+    """Make the data dictionary for an ``isA`` edge."""
+    return {RELATION: IS_A}
+
+
+def make_annotation_data(evidence: str, provenance_db: str, provenance_id: str, tax_id: str) -> Dict[str, Any]:
+    """Make the data dictionary for the ``association`` edge of a GO annotation.
+
+    This gives the same dictionary as :meth:`pybel.BELGraph.add_association`.
+    """
+    citation = get_citation(provenance_db, provenance_id)
+    if isinstance(citation, str):
+        citation = {CITATION_TYPE: CITATION_TYPE_PUBMED, CITATION_REFERENCE: citation}
+
+    return {
+        RELATION: ASSOCIATION,
+        EVIDENCE: evidence,
+        CITATION: citation,
+        ANNOTATIONS: {
+            'Species': {tax_id: True},
+        },
+    }
+
+
+def add_edge_to_graph(graph: BELGraph, u: BaseEntity, v: BaseEntity, data: Mapping[str, Any]) -> str:
+    """Add an edge triple to a BEL graph."""
+    if EVIDENCE in data:
+        return graph.add_qualified_edge(u, v, **data)
+    return graph.add_unqualified_edge(u, v, data[RELATION])
+
+
+def _node_to_json(node: BaseEntity) -> Dict[str, Any]:
+    rv = node.copy()
+    rv['id'] = node.as_sha512()
+    rv['bel'] = node.as_bel()
+    return rv
+
+
+def write_nodelink(graph: BELGraph, edges: Iterable[EdgeTriple], file: TextIO) -> None:
+    """Write node-link JSON that can be read by :func:`pybel.from_json_file` while streaming the edges.
+
+    The links are written as they arrive and only the nodes are kept in memory, since each link refers to the
+    position of its nodes in the node list written at the end.
+
+    :param graph: A BEL graph holding the metadata and namespaces for the document. It should not have any edges.
+    :param edges: An iterable of edge triples
+    :param file: A writable file
+    """
+    file.write('{"directed": true, "multigraph": true, "graph": ')
+    json.dump(to_json(graph)['graph'], file, ensure_ascii=False)
+
+    nodes: Dict[BaseEntity, int] = {}
+    file.write(', "links": [')
+    for i, (u, v, data) in enumerate(edges):
+        for node in (u, v):
+            if node not in nodes:
+                nodes[node] = len(nodes)
+
+        link = dict(data)
+        link.update(source=nodes[u], target=nodes[v], key=hash_edge(u, v, data))
+        if i:
+            file.write(', ')
+        json.dump(link, file, ensure_ascii=False)
+
+    file.write('], "nodes": [')
+    for i, node in enumerate(nodes):
+        if i:
+            file.write(', ')
+        json.dump(_node_to_json(node), file, ensure_ascii=False)
+    file.write(']}')
+
+
+def write_bel_script(graph: BELGraph, edges: Iterable[EdgeTriple], file: TextIO) -> None:
+    """Write a BEL script while streaming the edges.
+
+    Like :func:`pybel.to_bel`, edges without evidence are written with PyBEL's placeholder citation.
+
+    :param graph: A BEL graph holding the metadata and namespaces for the document. It should not have any edges.
+    :param edges: An iterable of edge triples
+    :param file: A writable file
+    """
+    for line in to_bel_lines(graph):
+        print(line, file=file)
+
+    in_unqualified_block = False
+    for u, v, data in edges:
+        if EVIDENCE not in data:
+            if not in_unqualified_block:
+                print('SET Citation = {"PubMed","Added by PyBEL","29048466"}', file=file)
+                print('SET SupportingText = "{}"'.format(PYBEL_AUTOEVIDENCE), file=file)
+                in_unqualified_block = True
+            print(edge_to_bel(u, v, data), file=file)
+            continue
+
+        if in_unqualified_block:
+            print('UNSET SupportingText', file=file)
+            print('UNSET Citation', file=file)
+            in_unqualified_block = False
+
+        citation = data[CITATION]
+        print('SET Citation = {{"{}", "{}"}}'.format(citation[CITATION_TYPE], citation[CITATION_REFERENCE]), file=file)
+        print('SET SupportingText = "{}"'.format(data[EVIDENCE]), file=file)
+
+        annotations = sorted(data[ANNOTATIONS])
+        for key in annotations:
+            print('SET {} = "{}"'.format(key, next(iter(data[ANNOTATIONS][key]))), file=file)
+
+        print(edge_to_bel(u, v, data), file=file)
+
+        for key in annotations:
+            print('UNSET {}'.format(key), file=file)
+        print('UNSET SupportingText', file=file)
+        print('UNSET Citation', file=file)
+
+    if in_unqualified_block:
+        print('UNSET SupportingText', file=file)
+        print('UNSET Citation', file=file)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""Reading the records of GAF files.
+
+This is shared by :mod:`bio2bel_go.parser` and :mod:`bio2bel_go.gaf_cache`.
+"""
+
+import gzip
+import hashlib
+from typing import Iterable, List, NamedTuple, Optional, TextIO, Tuple
+
+from .constants import GAF_COLUMNS
+
+__all__ = [
+    'GafRecord',
+    'iter_gaf_records',
+    'iter_gaf_records_with_aspects',
+]
+
+_GAF_GO_ID = GAF_COLUMNS.index('go_id')
+_GAF_DB = GAF_COLUMNS.index('db')
+_GAF_DB_ID = GAF_COLUMNS.index('db_id')
+_GAF_DB_SYMBOL = GAF_COLUMNS.index('db_symbol')
+_GAF_QUALIFIER = GAF_COLUMNS.index('qualifier')
+_GAF_PROVENANCE = GAF_COLUMNS.index('provenance')
+_GAF_EVIDENCE_CODE = GAF_COLUMNS.index('evidence_code')
+_GAF_ASPECT = GAF_COLUMNS.index('aspect')
+_GAF_TAXONOMY_ID = GAF_COLUMNS.index('taxonomy_id')
+
+
+class GafRecord(NamedTuple):
+    """The columns of a GAF line that are stored in the database."""
+
+    go_id: str
+    db: str
+    db_id: str
+    db_symbol: str
+    qualifier: Optional[str]
+    provenance_db: str
+    provenance_id: str
+    evidence_code: str
+    tax_id: str
+
+    def digest(self) -> bytes:
+        """Hash the content of this record."""
+        return hashlib.blake2b('\t'.join(map(str, self)).encode('utf-8'), digest_size=8).digest()
+
+    def content_hash(self) -> int:
+        """Get the digest of this record as a signed 64-bit integer, as stored in the database."""
+        return int.from_bytes(self.digest(), 'big', signed=True)
+
+
+def _open_gaf(path: str) -> TextIO:
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def _make_gaf_record(columns: List[str]) -> GafRecord:
+    # Only keep the first reference and the first taxon, which is the one of the annotated gene product
+    provenance_db, _, provenance_id = columns[_GAF_PROVENANCE].split('|', 1)[0].partition(':')
+    tax_id = columns[_GAF_TAXONOMY_ID].split('|', 1)[0]
+    if tax_id.startswith('taxon:'):
+        tax_id = tax_id[len('taxon:'):]
+
+    return GafRecord(
+        go_id=columns[_GAF_GO_ID],
+        db=columns[_GAF_DB],
+        db_id=columns[_GAF_DB_ID],
+        db_symbol=columns[_GAF_DB_SYMBOL],
+        qualifier=columns[_GAF_QUALIFIER] or None,
+        provenance_db=provenance_db,
+        provenance_id=provenance_id,
+        evidence_code=columns[_GAF_EVIDENCE_CODE],
+        tax_id=tax_id,
+    )
+
+
+def _iter_gaf_columns(path: str) -> Iterable[List[str]]:
+    with _open_gaf(path) as file:
+        for line in file:
+            if line.startswith('!') or not line.strip():
+                continue
+            yield line.rstrip('\n').split('\t')
+
+
+def iter_gaf_records(path: str) -> Iterable[GafRecord]:
+    """Iterate over the records in a GAF file, optionally gzipped.
+
+    :param path: The path to a GAF file
+    """
+    for columns in _iter_gaf_columns(path):
+        yield _make_gaf_record(columns)
+
+
+def iter_gaf_records_with_aspects(path: str) -> Iterable[Tuple[GafRecord, str]]:
+    """Iterate over the records in a GAF file, optionally gzipped, and their aspects (``P``, ``F``, or ``C``).
+
+    :param path: The path to a GAF file
+    """
+    for columns in _iter_gaf_columns(path):
+        yield _make_gaf_record(columns), columns[_GAF_ASPECT]
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+"""A typed, columnar cache of GAF files.
+
+Each GAF file is parsed once into a :class:`GafTable`, which keeps only the columns of :class:`GafRecord` and the
+aspect, each dictionary-encoded as an array of integer codes and a table of categories. The table is saved as
+memory-mapped NumPy arrays in a directory keyed by the path and checksum of the file, so reloading skips decompressing
+and parsing, and filters on the taxon, evidence code, or aspect are applied to the code arrays before any rows are
+decoded. :func:`bio2bel_go.parser.iter_gaf_batches` reads GAF files through this cache when populating or updating
+the database.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from array import array
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .constants import GAF_CACHE_DIRECTORY, GO_ASPECTS
+from .gaf import GafRecord, iter_gaf_records_with_aspects
+from .snapshot import StringTable
+from .utils import replace_directory
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'GAF_TABLE_COLUMNS',
+    'GafTable',
+    'get_file_checksum',
+    'cache_gaf_table',
+    'load_gaf_table',
+    'read_gaf_df',
+    'concat_gaf_dfs',
+]
+
+#: The columns kept in a :class:`GafTable`
+GAF_TABLE_COLUMNS = GafRecord._fields + ('aspect',)
+
+#: The version of the cache layout. Caches with a different version are rebuilt.
+GAF_TABLE_FORMAT_VERSION = 1
+
+_META = 'meta.json'
+
+
+def get_file_checksum(path: str, chunksize: int = 1 << 20) -> str:
+    """Get the BLAKE2 checksum of a file's content."""
+    checksum = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunksize), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def _get_code_dtype(size: int) -> np.dtype:
+    """Get the smallest signed integer type that holds the codes for the given number of categories and -1."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if size <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class GafTable:
+    """The records of a GAF file as dictionary-encoded columns.
+
+    Missing values, like the qualifiers of most annotations, have the code -1.
+    """
+
+    def __init__(self, codes: Mapping[str, np.ndarray], categories: Mapping[str, Sequence[str]]) -> None:
+        """Wrap the columns of a table.
+
+        :param codes: A dictionary from each column in :data:`GAF_TABLE_COLUMNS` to its array of codes
+        :param categories: A dictionary from each column in :data:`GAF_TABLE_COLUMNS` to its categories
+        """
+        self.codes = dict(codes)
+        self.categories = {column: list(values) for column, values in categories.items()}
+
+    @classmethod
+    def from_path(cls, path: str) -> 'GafTable':
+        """Parse a GAF file, optionally gzipped, into a table."""
+        lookups: Dict[str, Dict[str, int]] = {column: {} for column in GAF_TABLE_COLUMNS}
+        # Codes are collected in C integer arrays, which take a fraction of the memory of lists of Python integers
+        codes: Dict[str, array] = {column: array('i') for column in GAF_TABLE_COLUMNS}
+
+        for record, aspect in iter_gaf_records_with_aspects(path):
+            for column, value in zip(GAF_TABLE_COLUMNS, record + (aspect,)):
+                if value is None:
+                    codes[column].append(-1)
+                    continue
+
+                lookup = lookups[column]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                codes[column].append(code)
+
+        return cls(
+            codes={
+                column: np.frombuffer(codes[column], dtype=np.intc).astype(_get_code_dtype(len(lookups[column])))
+                for column in GAF_TABLE_COLUMNS
+            },
+            categories={
+                column: list(lookups[column])
+                for column in GAF_TABLE_COLUMNS
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.codes[GAF_TABLE_COLUMNS[0]])
+
+    def save(self, directory: str, overwrite: bool = True) -> None:
+        """Save the table to a directory.
+
+        :param directory: The directory of the table
+        :param overwrite: If false, an existing directory is kept, like one written at the same time by another
+         process. See :func:`bio2bel_go.utils.replace_directory`.
+        """
+        with replace_directory(directory, overwrite=overwrite) as tmp_directory:
+            for column in GAF_TABLE_COLUMNS:
+                np.save(os.path.join(tmp_directory, f'{column}.codes.npy'), self.codes[column])
+                StringTable.from_strings(self.categories[column]).save(tmp_directory, f'{column}.categories')
+
+            with open(os.path.join(tmp_directory, _META), 'w') as file:
+                json.dump({'format_version': GAF_TABLE_FORMAT_VERSION, 'rows': len(self)}, file)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> Optional['GafTable']:
+        """Load a table saved with :meth:`save`, with its code arrays memory-mapped.
+
+        :return: The table, or None if the directory doesn't exist or has a different format version
+        """
+        meta_path = os.path.join(directory, _META)
+        if not os.path.exists(meta_path):
+            return
+
+        with open(meta_path) as file:
+            if json.load(file).get('format_version') != GAF_TABLE_FORMAT_VERSION:
+                return
+
+        return cls(
+            codes={
+                column: np.load(os.path.join(directory, f'{column}.codes.npy'), mmap_mode=mmap_mode)
+                for column in GAF_TABLE_COLUMNS
+            },
+            categories={
+                column: list(StringTable.load(directory, f'{column}.categories'))
+                for column in GAF_TABLE_COLUMNS
+            },
+        )
+
+    def _isin(self, column: str, values: Iterable[str]) -> np.ndarray:
+        """Get a mask of the rows whose values in the column are in the given values, comparing only codes."""
+        values = set(values)
+        matches = [code for code, category in enumerate(self.categories[column]) if category in values]
+        return np.isin(self.codes[column], matches)
+
+    def get_mask(self,
+                 taxa: Optional[Iterable[str]] = None,
+                 evidence_codes: Optional[Iterable[str]] = None,
+                 aspects: Optional[Iterable[str]] = None,
+                 ) -> np.ndarray:
+        """Get a mask of the rows matching all of the given filters.
+
+        :param taxa: NCBI taxonomy identifiers, optionally prefixed with ``taxon:``
+        :param evidence_codes: Evidence codes, like ``IDA``
+        :param aspects: Aspects (``P``, ``F``, ``C``) or GO namespaces, like ``biological_process``
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if taxa is not None:
+            mask &= self._isin('tax_id', (taxon.replace('taxon:', '') for taxon in taxa))
+        if evidence_codes is not None:
+            mask &= self._isin('evidence_code', evidence_codes)
+        if aspects is not None:
+            mask &= self._isin('aspect', (GO_ASPECTS.get(aspect, aspect) for aspect in aspects))
+        return mask
+
+    def to_df(self, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Get the rows as a dataframe of categorical columns.
+
+        :param mask: A boolean array from :meth:`get_mask` of the rows to keep
+        """
+        return pd.DataFrame({
+            column: pd.Categorical.from_codes(
+                np.asarray(self.codes[column] if mask is None else self.codes[column][mask]),
+                categories=self.categories[column],
+            )
+            for column in GAF_TABLE_COLUMNS
+        })
+
+    def iter_records(self, mask: Optional[np.ndarray] = None, chunksize: int = 100000) -> Iterable[GafRecord]:
+        """Iterate over the rows as GAF records, decoding them a chunk at a time so memory use stays bounded.
+
+        :param mask: A boolean array from :meth:`get_mask` of the rows to keep
+        :param chunksize: The number of rows decoded at once
+        """
+        # The code -1 of missing values picks the None at the end of each array of categories
+        categories = [
+            np.array(self.categories[column] + [None], dtype=object)
+            for column in GafRecord._fields
+        ]
+        rows = None if mask is None else np.flatnonzero(mask)
+        size = len(self) if rows is None else len(rows)
+
+        for start in range(0, size, chunksize):
+            index = slice(start, start + chunksize) if rows is None else rows[start:start + chunksize]
+            columns = [
+                column_categories[self.codes[column][index]].tolist()
+                for column, column_categories in zip(GafRecord._fields, categories)
+            ]
+            for values in zip(*columns):
+                yield GafRecord(*values)
+
+
+def _get_source_key(path: str) -> str:
+    """Get the prefix of the cached tables of a GAF file, from its name and a hash of its absolute path.
+
+    The hash keeps files with the same name in different directories from sharing or removing each other's tables.
+    """
+    source_hash = hashlib.blake2b(os.path.abspath(path).encode('utf-8'), digest_size=8).hexdigest()
+    return f'{os.path.basename(path)}.{source_hash}'
+
+
+def cache_gaf_table(path: str, cache_directory: Optional[str] = None) -> str:
+    """Build the table for a GAF file unless the file's checksum has been seen before, and get its directory.
+
+    Tables built from earlier versions of the file at the same path are removed. Several processes can build the table
+    of the same file at once, in which case the first one to finish is kept, so a table is never replaced while it is
+    read.
+
+    :param path: The path to a GAF file, optionally gzipped
+    :param cache_directory: The directory where tables are cached. Defaults to :data:`GAF_CACHE_DIRECTORY`.
+    :return: The directory of the table, which can be loaded with :meth:`GafTable.load`
+    """
+    cache_directory = cache_directory or GAF_CACHE_DIRECTORY
+    source_key = _get_source_key(path)
+    key = f'{source_key}.{get_file_checksum(path)}'
+    directory = os.path.join(cache_directory, key)
+
+    if GafTable.load(directory) is not None:
+        log.info('found GAF %s in %s', path, directory)
+        return directory
+
+    if os.path.exists(directory):
+        log.info('removing GAF cache %s with another format version', directory)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    log.info('caching GAF %s to %s', path, directory)
+    GafTable.from_path(path).save(directory, overwrite=False)
+
+    # Only finished tables are matched, so the ones other processes are still writing are kept
+    pattern = re.compile(rf'{re.escape(source_key)}\.[0-9a-f]{{32}}')
+    for other in os.listdir(cache_directory):
+        if other != key and pattern.fullmatch(other):
+            shutil.rmtree(os.path.join(cache_directory, other), ignore_errors=True)
+
+    return directory
+
+
+def load_gaf_table(path: str, cache_directory: Optional[str] = None) -> GafTable:
+    """Load the table for a GAF file from the cache, building it if the file's checksum hasn't been seen before.
+
+    :param path: The path to a GAF file, optionally gzipped
+    :param cache_directory: The directory where tables are cached. Defaults to :data:`GAF_CACHE_DIRECTORY`.
+    :raises ValueError: If the table was removed before it could be loaded
+    """
+    directory = cache_gaf_table(path, cache_directory=cache_directory)
+    table = GafTable.load(directory)
+    if table is None:
+        raise ValueError(f'the cached table of GAF {path} in {directory} was removed before it was loaded')
+    return table
+
+
+def read_gaf_df(path: str,
+                taxa: Optional[Iterable[str]] = None,
+                evidence_codes: Optional[Iterable[str]] = None,
+                aspects: Optional[Iterable[str]] = None,
+                cache_directory: Optional[str] = None,
+                ) -> pd.DataFrame:
+    """Read a GAF file through its cache into a dataframe of categorical columns, keeping rows matching all filters.
+
+    :param path: The path to a GAF file, optionally gzipped
+    :param taxa: NCBI taxonomy identifiers, optionally prefixed with ``taxon:``
+    :param evidence_codes: Evidence codes, like ``IDA``
+    :param aspects: Aspects (``P``, ``F``, ``C``) or GO namespaces, like ``biological_process``
+    :param cache_directory: The directory where tables are cached. Defaults to :data:`GAF_CACHE_DIRECTORY`.
+    """
+    table = load_gaf_table(path, cache_directory=cache_directory)
+    return table.to_df(table.get_mask(taxa=taxa, evidence_codes=evidence_codes, aspects=aspects))
+
+
+def concat_gaf_dfs(dfs: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate dataframes from :func:`read_gaf_df`, keeping the columns categorical."""
+    return pd.DataFrame({
+        column: union_categoricals([df[column] for df in dfs])
+        for column in GAF_TABLE_COLUMNS
+    })
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+"""In-memory indexes of GO terms for resolving BEL nodes without querying the database.
+
+A :class:`TermIndex` addresses terms by the dense integer indices of an :class:`bio2bel_go.ontology.Ontology`, whose
+compressed sparse rows it shares for the hierarchy, and only adds a byte per term for each of the namespace and complex
+flag, so the index costs little more than the identifier and name strings themselves. A :class:`NameIndex` maps the
+normalized names and synonyms of terms to their identifiers, and keeps the normalized names sorted for prefix search.
+"""
+
+import logging
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import literal
+from sqlalchemy.orm import Session
+
+from .constants import GO_BIOLOGICAL_PROCESS, GO_CELLULAR_COMPONENT, GO_MOLECULAR_FUNCTION
+from .models import Synonym, Term
+from .ontology import CSR, Ontology
+from .utils import normalize_go_id, normalize_name
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'NameIndex',
+    'TermIndex',
+]
+
+NAMESPACES = (GO_BIOLOGICAL_PROCESS, GO_CELLULAR_COMPONENT, GO_MOLECULAR_FUNCTION)
+
+#: The GO identifier, name, namespace, and complex flag of a term
+TermRow = Tuple[str, str, str, bool]
+
+
+def _parse_synonym(synonym: str) -> Tuple[str, Optional[str]]:
+    """Get the name and scope from an OBO synonym like ``"cell division" EXACT []``.
+
+    The scope is None if the synonym isn't quoted, like when it's given as a plain name.
+    """
+    if synonym.startswith('"'):
+        end = synonym.find('"', 1)
+        if end != -1:
+            scope = synonym[end + 1:].split(maxsplit=1)
+            return synonym[1:end], scope[0] if scope else None
+    return synonym, None
+
+
+def _encode_namespaces(namespaces: Iterable[str]) -> bytes:
+    """Encode each namespace as its position in :data:`NAMESPACES`."""
+    codes = {namespace: code for code, namespace in enumerate(NAMESPACES)}
+    try:
+        return bytes(codes[namespace] for namespace in namespaces)
+    except KeyError as e:
+        raise ValueError(f'invalid namespace: {e.args[0]}. Use one of: {", ".join(NAMESPACES)}') from None
+
+
+class NameIndex:
+    """An index from the normalized names and synonyms of terms to their GO identifiers.
+
+    Names are normalized with :func:`bio2bel_go.utils.normalize_name`, so lookups ignore case and differences in
+    whitespace. Only ``EXACT`` synonyms are indexed, since a ``BROAD``, ``NARROW``, or ``RELATED`` synonym names a
+    different concept than the term. When a name is shared, the term with that name takes precedence over terms with
+    that synonym, and otherwise the first term with that synonym is kept.
+    """
+
+    def __init__(self, names: Iterable[Tuple[str, str]], synonyms: Iterable[Tuple[str, str]] = ()) -> None:
+        """Build an index.
+
+        :param names: Pairs of GO identifiers and names
+        :param synonyms: Pairs of GO identifiers and synonyms, which can be OBO synonyms like
+         ``"cell division" EXACT []``. Synonyms with a scope other than ``EXACT`` are skipped.
+        """
+        self._key_to_go_id: Dict[str, str] = {}
+        for go_id, synonym in synonyms:
+            name, scope = _parse_synonym(synonym)
+            if scope is None or scope == 'EXACT':
+                self._key_to_go_id.setdefault(normalize_name(name), go_id)
+        self._key_to_go_id.update(
+            (normalize_name(name), go_id)
+            for go_id, name in names
+        )
+        self._sorted_keys: Optional[List[str]] = None
+
+    @classmethod
+    def from_session(cls, session: Session) -> 'NameIndex':
+        """Build an index with a single bulk query over the term and synonym tables."""
+        names = session.query(Term.go_id, Term.name, literal(False).label('is_synonym'))
+        synonyms = session.query(Term.go_id, Synonym.name, literal(True)).join(Synonym.term)
+
+        rows = {False: [], True: []}
+        for go_id, name, is_synonym in names.union_all(synonyms):
+            rows[bool(is_synonym)].append((go_id, name))
+
+        log.info('indexed %d names and %d synonyms', len(rows[False]), len(rows[True]))
+        return cls(rows[False], rows[True])
+
+    def __len__(self) -> int:
+        return len(self._key_to_go_id)
+
+    def get(self, name: str) -> Optional[str]:
+        """Get the GO identifier of the term with the given name or synonym."""
+        return self._key_to_go_id.get(normalize_name(name))
+
+    def search(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Get the GO identifiers of the terms with a name or synonym that starts with the prefix.
+
+        The normalized names are sorted on the first search, then each search is a binary search for the first match
+        followed by a scan over the matches.
+
+        :param prefix: The start of a name
+        :param limit: The largest number of identifiers to return
+        :return: The GO identifiers, without duplicates, in the order of their matching names
+        """
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self._key_to_go_id)
+
+        prefix = normalize_name(prefix)
+        rv = {}
+        for key in self._sorted_keys[bisect_left(self._sorted_keys, prefix):]:
+            if not key.startswith(prefix) or (limit is not None and len(rv) >= limit):
+                break
+            rv.setdefault(self._key_to_go_id[key])
+        return list(rv)
+
+
+class TermIndex:
+    """An in-memory index from GO identifiers, names, and synonyms to terms."""
+
+    def __init__(self,
+                 ontology: Ontology,
+                 is_complex: Iterable[bool],
+                 synonyms: Iterable[Tuple[int, str]] = (),
+                 ) -> None:
+        """Build an index over the terms of an ontology, addressed by their indices in it.
+
+        :param ontology: The ontology, whose identifiers, names, namespaces, and hierarchy are used
+        :param is_complex: If each term is a complex, in the same order as the terms of the ontology
+        :param synonyms: Pairs of term indices and synonyms
+        :raises ValueError: If a term isn't in one of the :data:`NAMESPACES`
+        """
+        self.ontology = ontology
+        self.go_ids = ontology.go_ids
+        self.names = ontology.names
+        self.namespaces = _encode_namespaces(ontology.namespaces)
+        self.is_complex = bytes(is_complex)
+
+        self.name_index = NameIndex(
+            zip(self.go_ids, self.names),
+            ((self.go_ids[index], synonym) for index, synonym in synonyms),
+        )
+
+    @classmethod
+    def from_session(cls, session: Session, ontology: Optional[Ontology] = None) -> 'TermIndex':
+        """Build an index with one bulk query for each of the term and synonym tables.
+
+        :param session: A SQLAlchemy session
+        :param ontology: The ontology of the terms in the database. Defaults to building one from the database.
+        """
+        if ontology is None:
+            ontology = Ontology.from_session(session)
+
+        is_complex = bytearray(len(ontology))
+        key_to_index = {}
+        for key, go_id, term_is_complex in session.query(Term.id, Term.go_id, Term.is_complex):
+            index = ontology.get_index(go_id)
+            if index is not None:
+                key_to_index[key] = index
+                is_complex[index] = term_is_complex
+
+        synonyms = [
+            (key_to_index[term_id], name)
+            for term_id, name in session.query(Synonym.term_id, Synonym.name)
+            if term_id in key_to_index
+        ]
+
+        log.info('indexed %d terms and %d synonyms', len(ontology), len(synonyms))
+        return cls(ontology, is_complex, synonyms=synonyms)
+
+    def __len__(self) -> int:
+        return len(self.go_ids)
+
+    def __contains__(self, go_id: str) -> bool:
+        return go_id in self.ontology
+
+    def _get_row(self, index: int) -> TermRow:
+        return self.go_ids[index], self.names[index], NAMESPACES[self.namespaces[index]], bool(self.is_complex[index])
+
+    def _make_term(self, index: int) -> Term:
+        """Make a transient term, which is not attached to any session."""
+        go_id, name, namespace, is_complex = self._get_row(index)
+        return Term(go_id=go_id, name=name, namespace=namespace, is_complex=is_complex)
+
+    def get_term_by_id(self, go_id: str) -> Optional[Term]:
+        """Get a term by its identifier."""
+        index = self.ontology.get_index(normalize_go_id(go_id))
+        if index is not None:
+            return self._make_term(index)
+
+    def get_term_by_name(self, name: str) -> Optional[Term]:
+        """Get a term by its name or one of its synonyms, ignoring case and differences in whitespace."""
+        go_id = self.name_index.get(name)
+        if go_id is not None:
+            return self._make_term(self.ontology.get_index(go_id))
+
+    def search_terms(self, prefix: str, limit: Optional[int] = None) -> List[Term]:
+        """Get the terms with a name or synonym that starts with the prefix. See :meth:`NameIndex.search`."""
+        return [
+            self._make_term(self.ontology.get_index(go_id))
+            for go_id in self.name_index.search(prefix, limit=limit)
+        ]
+
+    def get_parents(self, go_id: str) -> List[Term]:
+        """Get the direct parents of a term."""
+        index = self.ontology.get_index(go_id)
+        if index is None:
+            return []
+        return [self._make_term(parent) for parent in self.ontology.get_parent_indices(index).tolist()]
+
+    def get_children(self, go_id: str) -> List[Term]:
+        """Get the direct children of a term."""
+        index = self.ontology.get_index(go_id)
+        if index is None:
+            return []
+        return [self._make_term(child) for child in self.ontology.get_child_indices(index).tolist()]
+
+    @staticmethod
+    def _iter_neighbors(csrs: Iterable[CSR], index: int) -> Iterable[int]:
+        """Iterate over the neighbors of a term in each relation type, once for each edge."""
+        for indptr, indices in csrs:
+            yield from indices[indptr[index]:indptr[index + 1]].tolist()
+
+    def iter_hierarchy(self, go_ids: Iterable[str], include_children: bool = False,
+                       ) -> Iterable[Tuple[TermRow, TermRow]]:
+        """Iterate over the (child, parent) rows of the edges from the given terms to their parents.
+
+        :param go_ids: GO identifiers
+        :param include_children: Also iterate over the edges from the children of the given terms
+        """
+        for go_id in go_ids:
+            index = self.ontology.get_index(go_id)
+            if index is None:
+                continue
+
+            row = self._get_row(index)
+
+            for parent in self._iter_neighbors(self.ontology.parents.values(), index):
+                yield row, self._get_row(parent)
+
+            if include_children:
+                for child in self._iter_neighbors(self.ontology.children.values(), index):
+                    yield self._get_row(child), row
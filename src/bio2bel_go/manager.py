@@ -2,29 +2,111 @@
 
 """Manager for Bio2BEL GO."""
 
+import json
 import logging
+import os
+import re
+import sys
 import time
-from typing import Iterable, List, Mapping, Optional, Tuple
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Set, TextIO, Tuple
 
+import click
 import networkx as nx
+import numpy as np
+import pandas as pd
 from pybel import BELGraph
 from pybel.constants import BIOPROCESS, FUNCTION, NAMESPACE
 from pybel.dsl import BaseEntity
 from pybel.manager.models import Namespace, NamespaceEntry
+from sqlalchemy import Table, func, inspect, or_, select, text
 from sqlalchemy.ext.declarative import DeclarativeMeta
+from sqlalchemy.orm import Query, Session, aliased
 from tqdm import tqdm
 
 from bio2bel import AbstractManager
 from bio2bel.manager.bel_manager import BELManagerMixin
 from bio2bel.manager.flask_manager import FlaskMixin
 from bio2bel.manager.namespace_manager import BELNamespaceManagerMixin
-from .constants import BEL_NAMESPACES, MODULE_NAME
-from .dsl import gobp
-from .models import Annotation, Base, Hierarchy, Synonym, Term
-from .parser import get_go_from_obo, get_goa_all_df
+from .bulk import DEFAULT_CHUNKSIZE, bulk_delete, bulk_insert, bulk_update, get_max_id
+from .constants import BEL_NAMESPACES, GO_ASPECTS, GO_BIOLOGICAL_PROCESS, GO_COMPLEX_ID, MODULE_NAME, SQL_IN_CHUNKSIZE, TRUE_PATH_RELATIONS
+from .dsl import BEL_ANNOTATION_DBS, annotation_to_bel, bel_node_cache, gobp
+from .enrichment import AnnotationMatrix
+from .export import EdgeTriple, add_edge_to_graph, make_annotation_data, make_is_a_data, write_bel_script, write_nodelink
+from .index import NameIndex, TermIndex, TermRow
+from .models import Annotation, Base, Hierarchy, PropagatedAnnotation, Synonym, Term, TermClosure
+from .ontology import Ontology
+from .parser import GafRecord, GafSource, get_go_from_obo, iter_gaf_batches
+from .report import PopulateReport
+from .similarity import (
+    SemanticSimilarity, compute_information_content, get_information_content_path, load_information_content,
+    save_information_content,
+)
+from .traversal import query_ancestors, query_common_ancestors, query_descendants
+from .utils import iter_chunks, normalize_go_id
 
 log = logging.getLogger(__name__)
 
+#: The default number of rows fetched at once when streaming from the database
+DEFAULT_YIELD_PER = 10000
+
+#: Matches GO identifiers, with or without the ``GO:`` prefix
+GO_ID_PATTERN = re.compile(r'^(GO:)?\d{7}$')
+
+#: The GO namespaces of the GAF aspect codes
+ASPECT_NAMESPACES = {aspect: namespace for namespace, aspect in GO_ASPECTS.items()}
+
+
+class GeneAnnotation(NamedTuple):
+    """An annotation of a gene to a GO term."""
+
+    db: str
+    db_id: str
+    db_symbol: str
+    go_id: str
+    namespace: str
+    qualifier: Optional[str]
+    evidence_code: str
+    tax_id: str
+
+
+class EnrichedGraph(NamedTuple):
+    """A BEL graph enriched by :meth:`Manager.enrich_many` and the seconds spent on it."""
+
+    graph: BELGraph
+    normalize_time: float
+    enrich_time: float
+
+
+def query_gene_annotations(session: Session,
+                           db: Optional[str] = 'UniProtKB',
+                           taxa: Optional[Iterable[str]] = None,
+                           evidence_codes: Optional[Iterable[str]] = None,
+                           aspects: Optional[Iterable[str]] = None,
+                           ) -> Query:
+    """Query the columns of :class:`GeneAnnotation`, to be filtered further by the identifiers of the genes.
+
+    See :meth:`Manager.iter_annotations_for_genes` for the parameters.
+    """
+    query = session.query(
+        Annotation.db, Annotation.db_id, Annotation.db_symbol, Term.go_id, Term.namespace, Annotation.qualifier,
+        Annotation.evidence_code, Annotation.tax_id,
+    ).join(Annotation.term)
+
+    if db is not None:
+        query = query.filter(Annotation.db == db)
+    if taxa is not None:
+        query = query.filter(Annotation.tax_id.in_([taxon.replace('taxon:', '') for taxon in taxa]))
+    if evidence_codes is not None:
+        query = query.filter(Annotation.evidence_code.in_(list(evidence_codes)))
+    if aspects is not None:
+        query = query.filter(Term.namespace.in_([ASPECT_NAMESPACES.get(aspect, aspect) for aspect in aspects]))
+
+    return query
+
 
 def add_parents(go, identifier: str, graph: BELGraph, child: BaseEntity):
     """Add parents to the network.
@@ -38,14 +120,6 @@ def add_parents(go, identifier: str, graph: BELGraph, child: BaseEntity):
         graph.add_is_a(child, gobp(go, identifier))
 
 
-def normalize_go_id(identifier: str) -> str:
-    """If a GO term does not start with the ``GO:`` prefix, add it."""
-    if not identifier.startswith('GO:'):
-        return f'GO:{identifier}'
-
-    return identifier
-
-
 class Manager(AbstractManager, BELManagerMixin, BELNamespaceManagerMixin, FlaskMixin):
     """Biological process multi-hierarchy."""
 
@@ -61,13 +135,91 @@ class Manager(AbstractManager, BELManagerMixin, BELNamespaceManagerMixin, FlaskM
     identifiers_namespace = 'go'
     identifiers_url = 'http://identifiers.org/go/'
 
-    def __init__(self, *args, **kwargs) -> None:  # noqa: D107
+    def __init__(self,
+                 *args,
+                 use_term_index: bool = False,
+                 term_index: Optional[TermIndex] = None,
+                 **kwargs
+                 ) -> None:
+        """Build a GO manager.
+
+        :param use_term_index: If true, look up terms from BEL graphs with an in-memory index that is loaded from the
+         database on first use instead of querying the database for each node.
+        :param term_index: The term index to use instead of loading one from the database, like the one of another
+         manager. If given, ``use_term_index`` is implied.
+        """
         super().__init__(*args, **kwargs)
 
         self.go = None
-        self.terms = {}
+        self.ontology: Optional[Ontology] = None
         self.name_id = {}
 
+        self.use_term_index = use_term_index or term_index is not None
+        self._term_index: Optional[TermIndex] = term_index
+        self._name_index: Optional[NameIndex] = None
+        self._semantic_similarity: Optional[SemanticSimilarity] = None
+        self._annotation_matrices: Dict[Tuple[str, Optional[FrozenSet[str]]], AnnotationMatrix] = {}
+
+        #: The report of the phases of the last call to :meth:`populate`
+        self.populate_report: Optional[PopulateReport] = None
+
+    def get_ontology(self) -> Ontology:
+        """Get the array-backed ontology, building it from the database if no OBO file has been parsed yet."""
+        if self.ontology is None:
+            self.ontology = Ontology.from_session(self.session)
+        return self.ontology
+
+    def get_term_index(self) -> TermIndex:
+        """Get the in-memory term index, loading it from the database if it hasn't been already.
+
+        The index shares the hierarchy of :meth:`get_ontology`.
+        """
+        if self._term_index is None:
+            self._term_index = TermIndex.from_session(self.session, ontology=self.get_ontology())
+        return self._term_index
+
+    def get_name_index(self) -> NameIndex:
+        """Get the index of normalized names and synonyms, loading it from the database if it hasn't been already.
+
+        If the term index is used, its name index is shared.
+        """
+        if self.use_term_index:
+            return self.get_term_index().name_index
+        if self._name_index is None:
+            self._name_index = NameIndex.from_session(self.session)
+        return self._name_index
+
+    def search_terms(self, prefix: str, limit: Optional[int] = 10) -> List[Term]:
+        """Get the terms with a name or synonym that starts with the prefix, ignoring case and whitespace.
+
+        :param prefix: The start of a name
+        :param limit: The largest number of terms to return. If None, return all of them.
+        """
+        go_ids = self.get_name_index().search(prefix, limit=limit)
+        if self.use_term_index:
+            index = self.get_term_index()
+            return [index.get_term_by_id(go_id) for go_id in go_ids]
+
+        terms = self._get_terms_by(Term.go_id, go_ids)
+        return [terms[go_id] for go_id in go_ids]
+
+    def get_annotation_matrix(self,
+                              key: str = 'db_symbol',
+                              evidence_codes: Optional[Iterable[str]] = None,
+                              ) -> AnnotationMatrix:
+        """Get the gene × term matrix of annotations, building it from the database if it hasn't been already.
+
+        :param key: The column of :class:`Annotation` that identifies genes, like ``db_symbol`` or ``db_id``
+        :param evidence_codes: The evidence codes of the annotations to use. Defaults to all.
+        """
+        cache_key = key, (None if evidence_codes is None else frozenset(evidence_codes))
+        matrix = self._annotation_matrices.get(cache_key)
+        if matrix is None:
+            matrix = self._annotation_matrices[cache_key] = AnnotationMatrix.from_session(
+                self.session, self.get_ontology(), key=key, evidence_codes=cache_key[1],
+            )
+        return matrix
+
     def is_populated(self) -> bool:
         """Check if the database is already populated."""
         return 0 < self.count_terms()
@@ -81,72 +233,605 @@ class Manager(AbstractManager, BELManagerMixin, BELNamespaceManagerMixin, FlaskM
         """Get a GO entry by name."""
         return self.session.query(Term).filter(Term.name == name).one_or_none()
 
-    def populate(self, path=None, force_download=False) -> None:
+    def populate(self,
+                 path=None,
+                 force_download=False,
+                 annotation_paths: Optional[Iterable[GafSource]] = None,
+                 chunksize: int = DEFAULT_CHUNKSIZE,
+                 max_workers: Optional[int] = None,
+                 propagate_annotations: bool = False,
+                 ) -> None:
         """Populate the database.
 
+        Rows are bulk inserted with SQLAlchemy Core and committed every ``chunksize`` rows. The GAF files are read in
+        worker processes while the OBO file is parsed and the terms are inserted.
+
         :param path: Path to the GO OBO file
         :param force_download:
+        :param annotation_paths: Paths to GAF files or directories of them, or (URL, path) pairs. Defaults to all of
+         the human GO annotation files.
+        :param chunksize: The number of rows inserted and committed at once
+        :param max_workers: The number of processes reading GAF files. See :func:`bio2bel_go.parser.iter_gaf_batches`.
+        :param propagate_annotations: If true, also build the tables of propagated annotations. See
+         :meth:`build_propagated_annotations`.
         """
-        self.go = get_go_from_obo(path=path, force_download=force_download)
+        report = self.populate_report = PopulateReport(self.engine)
 
-        log.info('building terms')
-        for go_id, data in tqdm(self.go.nodes(data=True), total=self.go.number_of_nodes(), desc='Terms'):
-            is_complex = 'GO:0032991' in nx.descendants(self.go, go_id)
+        # The GAF files are read while the ontology is loaded, and the workers are stopped even if that fails
+        with iter_gaf_batches(paths=annotation_paths, force_download=force_download,
+                              max_workers=max_workers) as annotation_batches:
+            self._load_go(path=path, force_download=force_download, report=report)
+
+            #: A mapping from GO identifiers to the primary keys of their terms
+            term_ids = {
+                go_id: term_id
+                for term_id, go_id in enumerate(self.go, start=get_max_id(self.session, Term.__table__) + 1)
+            }
+
+            log.info('building terms')
+            self._bulk_insert_phase(report, 'term', Term.__table__, self._iter_term_rows(term_ids), chunksize)
+            self._bulk_insert_phase(report, 'synonym', Synonym.__table__, self._iter_synonym_rows(term_ids), chunksize)
+
+            log.info('building hierarchy')
+            hierarchy_rows = self._iter_hierarchy_rows(term_ids)
+            self._bulk_insert_phase(report, 'hierarchy', Hierarchy.__table__, hierarchy_rows, chunksize)
+
+            log.info('building annotations')
+            batches = report.iter_phase('read_annotations', annotation_batches, count=len)
+            annotation_rows = self._iter_annotation_rows(term_ids, batches)
+            self._bulk_insert_phase(report, 'annotation', Annotation.__table__, annotation_rows, chunksize)
+
+        if propagate_annotations:
+            with report.phase('propagate_annotations') as phase:
+                phase.rows = self.build_propagated_annotations(chunksize=chunksize)
+
+        log.info('populated in %.2f seconds: %s', report.seconds, json.dumps(report.to_json()))
+
+    def _bulk_insert_phase(self,
+                           report: PopulateReport,
+                           name: str,
+                           table: Table,
+                           rows: Iterable[Mapping],
+                           chunksize: int,
+                           ) -> None:
+        """Bulk insert rows, measuring building them and inserting them as separate phases of the report."""
+        # The rows are built a chunk at a time so measuring them doesn't slow down building each one
+        chunks = report.iter_phase(f'build_{name}_rows', iter_chunks(rows, chunksize), count=len)
+        with report.phase(f'insert_{name}_rows') as phase:
+            phase.rows = bulk_insert(self.session, table, chain.from_iterable(chunks), chunksize=chunksize).rows
+
+    def _load_go(self,
+                 path: Optional[str] = None,
+                 force_download: bool = False,
+                 report: Optional[PopulateReport] = None,
+                 ) -> None:
+        """Parse the ontology, index it in an :class:`Ontology`, and clear everything cached from the previous one."""
+        if report is None:
+            report = PopulateReport()
+
+        with report.phase('parse_obo') as phase:
+            self.go = get_go_from_obo(path=path, force_download=force_download)
+            phase.rows = self.go.number_of_nodes()
+
+        self._term_index = None
+        self._name_index = None
+        self._semantic_similarity = None
+        self._annotation_matrices.clear()
+        bel_node_cache.clear()
+
+        log.info('indexing ontology')
+        with report.phase('index_ontology') as phase:
+            self.ontology = Ontology.from_graph(self.go)
+            phase.rows = len(self.ontology)
 
-            term = self.terms[go_id] = Term(
+    @staticmethod
+    def _make_term_values(data: Mapping, is_complex: bool) -> Dict:
+        """Make the values of the columns of a term that can change between releases."""
+        return dict(
+            name=data['name'],
+            namespace=data['namespace'],
+            definition=data.get('def'),
+            is_complex=is_complex,
+        )
+
+    def _iter_term_rows(self, term_ids: Mapping[str, int]) -> Iterable[Mapping]:
+        complexes = self.ontology.get_descendants(GO_COMPLEX_ID)
+        release = self.go.graph.get('data-version')
+
+        for go_id, data in tqdm(self.go.nodes(data=True), total=self.go.number_of_nodes(), desc='Terms'):
+            yield dict(
+                id=term_ids[go_id],
                 go_id=go_id,
-                name=data['name'],
-                namespace=data['namespace'],
-                definition=data['def'],
-                is_complex=is_complex,
-                synonyms=[
-                    Synonym(name=name)
-                    for name in data.get('synonym', [])
-                ],
+                release=release,
+                **self._make_term_values(data, go_id in complexes),
             )
-            self.session.add(term)
 
-        log.info('building hierarchy')
-        for sub_id, obj_id, data in tqdm(self.go.edges(data=True), total=self.go.number_of_edges(), desc='Edges'):
-            hierarchy = Hierarchy(
-                subject=self.terms[sub_id],
-                object=self.terms[obj_id],
+    def _iter_synonym_rows(self, term_ids: Mapping[str, int]) -> Iterable[Mapping]:
+        for go_id, data in self.go.nodes(data=True):
+            for name in data.get('synonym', []):
+                yield dict(
+                    term_id=term_ids[go_id],
+                    name=name,
+                )
+
+    def _iter_hierarchy_rows(self, term_ids: Mapping[str, int]) -> Iterable[Mapping]:
+        edges = tqdm(self.go.edges(keys=True), total=self.go.number_of_edges(), desc='Edges')
+        for sub_id, obj_id, relation in edges:
+            yield dict(
+                subject_id=term_ids[sub_id],
+                object_id=term_ids[obj_id],
+                relation=relation,
             )
-            self.session.add(hierarchy)
-
-        log.info('building annotations')
-        annotation_columns = [
-            'go_id',
-            'db',
-            'db_id',
-            'db_symbol',
-            'qualifier',
-            'provenance',
-            'evidence_code',
-            'taxonomy_id',
-        ]
-        goa_df = get_goa_all_df()
-
-        it = tqdm(goa_df[annotation_columns].values, total=len(goa_df.index), desc='Annotations')
-        for go_id, db, db_id, db_symbol, qualifier, provenance, evidence_code, taxonomy_id in it:
-            provenance_db, provenance_id = provenance.split(':')
-            annotation = Annotation(
-                term=self.terms[go_id],
-                db=db,
-                db_id=db_id,
-                db_symbol=db_symbol,
-                qualifier=qualifier,
-                provenance_db=provenance_db,
-                provenance_id=provenance_id,
-                evidence_code=evidence_code,
-                tax_id=taxonomy_id,
+
+    @staticmethod
+    def _iter_annotation_rows(term_ids: Mapping[str, int],
+                              batches: Iterable[List[GafRecord]],
+                              known_hashes: Optional[Set[int]] = None,
+                              ) -> Iterable[Mapping]:
+        """Iterate over the rows for annotations in the GAF files.
+
+        :param term_ids: A mapping from GO identifiers to the primary keys of their terms
+        :param batches: Batches of GAF records from :func:`bio2bel_go.parser.iter_gaf_batches`
+        :param known_hashes: The content hashes of annotations that are already stored. They are skipped and removed
+         from this set, so it only holds the hashes of annotations missing from the GAF files when the iterable is
+         exhausted.
+        """
+        missing = 0
+        for record in tqdm(chain.from_iterable(batches), desc='Annotations'):
+            term_id = term_ids.get(record.go_id)
+            if term_id is None:
+                missing += 1
+                continue
+
+            content_hash = record.content_hash()
+            if known_hashes is not None and content_hash in known_hashes:
+                known_hashes.discard(content_hash)
+                continue
+
+            yield dict(
+                term_id=term_id,
+                db=record.db,
+                db_id=record.db_id,
+                db_symbol=record.db_symbol,
+                qualifier=record.qualifier,
+                provenance_db=record.provenance_db,
+                provenance_id=record.provenance_id,
+                evidence_code=record.evidence_code,
+                tax_id=record.tax_id,
+                content_hash=content_hash,
             )
-            self.session.add(annotation)
 
-        t = time.time()
-        log.info('committing models')
+        if missing:
+            log.warning('skipped %d annotations to terms missing from the ontology', missing)
+
+    def update(self,
+               path: Optional[str] = None,
+               force_download: bool = False,
+               annotation_paths: Optional[Iterable[GafSource]] = None,
+               chunksize: int = DEFAULT_CHUNKSIZE,
+               max_workers: Optional[int] = None,
+               ) -> Dict[str, int]:
+        """Update the database to another GO release by only applying what changed.
+
+        The new OBO and GAF files are compared with the stored terms, synonyms, hierarchy, and annotations, and only
+        the differences are deleted, updated, or inserted, in batches that are committed every ``chunksize`` rows.
+        Terms are matched by GO identifier and annotations by the hash of their GAF record.
+
+        :param path: Path to the GO OBO file
+        :param force_download: True to force download resources, which is needed to get a newer release
+        :param annotation_paths: Paths to GAF files or directories of them, or (URL, path) pairs. Defaults to all of
+         the human GO annotation files.
+        :param chunksize: The number of rows changed and committed at once
+        :param max_workers: The number of processes reading GAF files. See :func:`bio2bel_go.parser.iter_gaf_batches`.
+        :return: The number of terms, synonyms, edges, and annotations that were added, changed, or removed
+        :raises ValueError: If the database is missing a required column, in which case it has to be repopulated
+        """
+        self._add_missing_columns()
+        self._create_missing_indexes()
+
+        with iter_gaf_batches(paths=annotation_paths, force_download=force_download,
+                              max_workers=max_workers) as annotation_batches:
+            self._load_go(path=path, force_download=force_download)
+
+            stored_terms = {
+                go_id: (term_id, dict(name=name, namespace=namespace, definition=definition, is_complex=is_complex))
+                for term_id, go_id, name, namespace, definition, is_complex in self.session.query(
+                    Term.id, Term.go_id, Term.name, Term.namespace, Term.definition, Term.is_complex,
+                )
+            }
+
+            # The propagated annotations are rebuilt from scratch since any change to the hierarchy can move them
+            propagated = self.has_propagated_annotations()
+            if propagated:
+                self._clear_propagated_annotations()
+
+            rv = self._remove_terms([
+                term_id
+                for go_id, (term_id, _) in stored_terms.items()
+                if go_id not in self.go
+            ])
+
+            term_ids, counts = self._update_terms(stored_terms, chunksize)
+            rv.update(counts)
+            rv.update(self._update_synonyms(term_ids, chunksize))
+            rv.update(self._update_hierarchy(term_ids, chunksize))
+            rv.update(self._update_annotations(term_ids, annotation_batches, chunksize))
+
+        if propagated:
+            self.build_propagated_annotations(chunksize=chunksize)
+
+        log.info('updated to %s: %s', self.go.graph.get('data-version'), dict(rv))
+        return dict(rv)
+
+    def _add_missing_columns(self) -> None:
+        """Add the columns added to the models since the tables were created, which ``create_all`` skips.
+
+        Only nullable columns can be added to tables that already have rows. The rows get ``NULL`` in them, which
+        :meth:`update` treats like values stored by an older version.
+        """
+        inspector = inspect(self.engine)
+        table_names = set(inspector.get_table_names())
+        preparer = self.engine.dialect.identifier_preparer
+        for table in Base.metadata.sorted_tables:
+            if table.name not in table_names:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    raise ValueError(f'{table.name} is missing the required column {column.name}. Drop and repopulate '
+                                     f'the database, like with the populate --reset command.')
+
+                log.info('adding column %s.%s', table.name, column.name)
+                column_type = column.type.compile(dialect=self.engine.dialect)
+                with self.engine.begin() as connection:
+                    connection.execute(text(
+                        f'ALTER TABLE {preparer.format_table(table)} '
+                        f'ADD COLUMN {preparer.format_column(column)} {column_type}'
+                    ))
+
+    def _create_missing_indexes(self) -> None:
+        """Create the indexes added to the models since the tables were created, which ``create_all`` skips.
+
+        Indexes on columns the table doesn't have are skipped, so this is run after :meth:`_add_missing_columns`.
+        """
+        inspector = inspect(self.engine)
+        table_names = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in table_names:
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            column_names = {column['name'] for column in inspector.get_columns(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if not {column.name for column in index.columns} <= column_names:
+                    log.warning('skipping index %s on columns missing from %s', index.name, table.name)
+                    continue
+                log.info('creating index %s', index.name)
+                index.create(self.engine)
+
+    def _remove_terms(self, term_ids: List[int]) -> Counter:
+        """Delete the terms and everything that refers to them."""
+        rv = Counter()
+        rv['annotations_removed'] += bulk_delete(self.session, Annotation.__table__, Annotation.term_id, term_ids)
+        rv['synonyms_removed'] += bulk_delete(self.session, Synonym.__table__, Synonym.term_id, term_ids)
+        for column in (Hierarchy.subject_id, Hierarchy.object_id):
+            rv['edges_removed'] += bulk_delete(self.session, Hierarchy.__table__, column, term_ids)
+        rv['terms_removed'] += bulk_delete(self.session, Term.__table__, Term.id, term_ids)
+        return rv
+
+    def _update_terms(self, stored_terms: Mapping[str, Tuple[int, Mapping]], chunksize: int,
+                      ) -> Tuple[Dict[str, int], Counter]:
+        """Insert the new terms and update the changed ones, stamping both with the new release.
+
+        :return: A mapping from GO identifiers to the primary keys of all terms and the counts of changes
+        """
+        complexes = self.ontology.get_descendants(GO_COMPLEX_ID)
+        release = self.go.graph.get('data-version')
+        next_id = get_max_id(self.session, Term.__table__) + 1
+
+        term_ids, added, changed = {}, [], []
+        for go_id, data in self.go.nodes(data=True):
+            values = self._make_term_values(data, go_id in complexes)
+
+            if go_id not in stored_terms:
+                term_ids[go_id] = next_id
+                added.append(dict(id=next_id, go_id=go_id, release=release, **values))
+                next_id += 1
+                continue
+
+            term_id, stored_values = stored_terms[go_id]
+            term_ids[go_id] = term_id
+            if values != stored_values:
+                changed.append(dict(id=term_id, release=release, **values))
+
+        # Changes go first so new terms can reuse the names of renamed ones
+        bulk_update(self.session, Term.__table__, changed, chunksize=chunksize)
+        bulk_insert(self.session, Term.__table__, added, chunksize=chunksize)
+
+        return term_ids, Counter(terms_added=len(added), terms_changed=len(changed))
+
+    def _update_synonyms(self, term_ids: Mapping[str, int], chunksize: int) -> Counter:
+        """Delete the synonyms that are gone and insert the new ones."""
+        stored = {
+            (term_id, name): synonym_id
+            for synonym_id, term_id, name in self.session.query(Synonym.id, Synonym.term_id, Synonym.name)
+        }
+
+        new_rows = list(self._iter_synonym_rows(term_ids))
+        new_keys = {(row['term_id'], row['name']) for row in new_rows}
+
+        removed = [synonym_id for key, synonym_id in stored.items() if key not in new_keys]
+        added = [row for row in new_rows if (row['term_id'], row['name']) not in stored]
+
+        bulk_delete(self.session, Synonym.__table__, Synonym.id, removed)
+        bulk_insert(self.session, Synonym.__table__, added, chunksize=chunksize)
+
+        return Counter(synonyms_added=len(added), synonyms_removed=len(removed))
+
+    def _update_hierarchy(self, term_ids: Mapping[str, int], chunksize: int) -> Counter:
+        """Delete the edges that are gone and insert the new ones.
+
+        Edges are compared as (subject, object, relation) triples, so edges stored without a relation are replaced.
+        """
+        stored = defaultdict(list)
+        for hierarchy_id, subject_id, object_id, relation in self.session.query(
+                Hierarchy.id, Hierarchy.subject_id, Hierarchy.object_id, Hierarchy.relation):
+            stored[subject_id, object_id, relation].append(hierarchy_id)
+
+        new = Counter(
+            (row['subject_id'], row['object_id'], row['relation'])
+            for row in self._iter_hierarchy_rows(term_ids)
+        )
+
+        removed = []
+        for key, hierarchy_ids in stored.items():
+            removed.extend(hierarchy_ids[new[key]:])
+
+        added = [
+            dict(subject_id=subject_id, object_id=object_id, relation=relation)
+            for (subject_id, object_id, relation), count in new.items()
+            for _ in range(count - len(stored.get((subject_id, object_id, relation), ())))
+        ]
+
+        bulk_delete(self.session, Hierarchy.__table__, Hierarchy.id, removed)
+        bulk_insert(self.session, Hierarchy.__table__, added, chunksize=chunksize)
+
+        return Counter(edges_added=len(added), edges_removed=len(removed))
+
+    def _update_annotations(self,
+                            term_ids: Mapping[str, int],
+                            batches: Iterable[List[GafRecord]],
+                            chunksize: int,
+                            ) -> Counter:
+        """Insert the annotations with new content hashes and delete the ones whose hashes are gone."""
+        # Annotations stored by versions that didn't hash their content can't be matched, so they're replaced
+        removed = self.session.query(Annotation).filter(Annotation.content_hash.is_(None)).delete(
+            synchronize_session=False)
+        self.session.commit()
+
+        known_hashes = {
+            content_hash
+            for content_hash, in self.session.query(Annotation.content_hash).yield_per(DEFAULT_YIELD_PER)
+        }
+
+        rows = self._iter_annotation_rows(term_ids, batches, known_hashes=known_hashes)
+        added = bulk_insert(self.session, Annotation.__table__, rows, chunksize=chunksize).rows
+
+        # Only the hashes of annotations missing from the new files are left
+        removed += bulk_delete(self.session, Annotation.__table__, Annotation.content_hash, known_hashes)
+
+        return Counter(annotations_added=added, annotations_removed=removed)
+
+    def get_ancestors(self,
+                      go_id: str,
+                      relations: Optional[Iterable[str]] = None,
+                      max_depth: Optional[int] = None,
+                      ) -> List[Term]:
+        """Get the ancestors of a term, closest first, with one recursive query on the hierarchy.
+
+        :param go_id: A GO identifier
+        :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+        :param max_depth: The largest number of edges to walk. Defaults to no limit.
+        """
+        return query_ancestors(self.session, go_id, relations=relations, max_depth=max_depth).all()
+
+    def get_descendants(self,
+                        go_id: str,
+                        relations: Optional[Iterable[str]] = None,
+                        max_depth: Optional[int] = None,
+                        ) -> List[Term]:
+        """Get the descendants of a term, closest first, with one recursive query on the hierarchy.
+
+        :param go_id: A GO identifier
+        :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+        :param max_depth: The largest number of edges to walk. Defaults to no limit.
+        """
+        return query_descendants(self.session, go_id, relations=relations, max_depth=max_depth).all()
+
+    def get_common_ancestors(self,
+                             go_ids: Iterable[str],
+                             relations: Optional[Iterable[str]] = None,
+                             max_depth: Optional[int] = None,
+                             ) -> List[Term]:
+        """Get the terms that are ancestors of, or the same as, all of the given terms, lowest first.
+
+        :param go_ids: GO identifiers. If any are missing from the database, there are no common ancestors.
+        :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+        :param max_depth: The largest number of edges to walk from each term. Defaults to no limit.
+        """
+        return query_common_ancestors(self.session, go_ids, relations=relations, max_depth=max_depth).all()
+
+    def has_propagated_annotations(self) -> bool:
+        """Check if the tables of propagated annotations have been built."""
+        return self.session.query(self.session.query(TermClosure).exists()).scalar()
+
+    def _clear_propagated_annotations(self) -> None:
+        self.session.query(PropagatedAnnotation).delete(synchronize_session=False)
+        self.session.query(TermClosure).delete(synchronize_session=False)
+        self.session.commit()
+
+    def build_propagated_annotations(self, chunksize: int = DEFAULT_CHUNKSIZE) -> int:
+        """Materialize the annotations of each term and all of its descendants, replacing any built before.
+
+        The closure of the hierarchy along the :data:`bio2bel_go.constants.TRUE_PATH_RELATIONS` is bulk inserted
+        into :class:`TermClosure`, then joined with the annotations in a single ``INSERT ... SELECT`` to fill
+        :class:`PropagatedAnnotation`, which has one row for each distinct gene of each term. Annotations with a
+        ``NOT`` qualifier aren't propagated.
+
+        :param chunksize: The number of closure rows inserted and committed at once
+        :return: The number of propagated annotations
+        """
+        self._clear_propagated_annotations()
+
+        ontology = self.get_ontology()
+        term_ids = dict(self.session.query(Term.go_id, Term.id))
+        ids = np.array([term_ids.get(go_id, -1) for go_id in ontology.go_ids], dtype=np.int64)
+
+        indptr, indices = ontology.get_ancestor_closure(relations=TRUE_PATH_RELATIONS)
+        descendants = np.concatenate([np.arange(len(ontology)), np.repeat(np.arange(len(ontology)), np.diff(indptr))])
+        ancestors = np.concatenate([np.arange(len(ontology)), indices])
+        keep = (ids[descendants] != -1) & (ids[ancestors] != -1)
+
+        log.info('building term closure')
+        bulk_insert(
+            self.session,
+            TermClosure.__table__,
+            (
+                dict(ancestor_id=ancestor_id, descendant_id=descendant_id)
+                for ancestor_id, descendant_id in zip(ids[ancestors[keep]].tolist(), ids[descendants[keep]].tolist())
+            ),
+            chunksize=chunksize,
+        )
+
+        log.info('building propagated annotations')
+        query = select([
+            TermClosure.ancestor_id, Annotation.db, Annotation.db_id, Annotation.db_symbol, Annotation.tax_id,
+        ]).select_from(
+            Annotation.__table__.join(TermClosure.__table__, TermClosure.descendant_id == Annotation.term_id),
+        ).where(
+            or_(Annotation.qualifier.is_(None), ~Annotation.qualifier.contains('NOT')),
+        ).distinct()
+        result = self.session.execute(PropagatedAnnotation.__table__.insert().from_select(
+            ['term_id', 'db', 'db_id', 'db_symbol', 'tax_id'],
+            query,
+        ))
         self.session.commit()
-        log.info('committed models in %.2f seconds', time.time() - t)
+
+        log.info('built %d propagated annotations', result.rowcount)
+        return result.rowcount
+
+    def get_annotated_genes(self,
+                            go_id: str,
+                            include_descendants: bool = True,
+                            tax_id: Optional[str] = None,
+                            ) -> Set[Tuple[str, str, str]]:
+        """Get the genes annotated to a term, or to any of its descendants along the true-path relations.
+
+        Descendant-inclusive lookups use the propagated annotations in a single indexed query if they have been
+        built with :meth:`build_propagated_annotations`, and otherwise fall back to finding the descendants in the
+        ontology. Annotations with a ``NOT`` qualifier are skipped.
+
+        :param go_id: A GO identifier
+        :param include_descendants: If true, include the genes annotated to descendants of the term
+        :param tax_id: An NCBI taxonomy identifier to restrict the genes to
+        :return: A set of (db, db_id, db_symbol) triples
+        """
+        go_id = normalize_go_id(go_id)
+
+        if include_descendants and self.has_propagated_annotations():
+            query = self.session.query(
+                PropagatedAnnotation.db, PropagatedAnnotation.db_id, PropagatedAnnotation.db_symbol,
+            ).join(PropagatedAnnotation.term).filter(Term.go_id == go_id)
+            if tax_id is not None:
+                query = query.filter(PropagatedAnnotation.tax_id == tax_id)
+            return set(query)
+
+        go_ids = [go_id]
+        if include_descendants:
+            go_ids.extend(self.get_ontology().get_descendants(go_id, relations=TRUE_PATH_RELATIONS))
+
+        rv = set()
+        for chunk in iter_chunks(go_ids, SQL_IN_CHUNKSIZE):
+            query = self.session.query(Annotation.db, Annotation.db_id, Annotation.db_symbol).join(Annotation.term)
+            query = query.filter(
+                Term.go_id.in_(chunk),
+                or_(Annotation.qualifier.is_(None), ~Annotation.qualifier.contains('NOT')),
+            )
+            if tax_id is not None:
+                query = query.filter(Annotation.tax_id == tax_id)
+            rv.update(query)
+        return rv
+
+    def iter_annotations_for_genes(self,
+                                   ids: Iterable[str],
+                                   db: Optional[str] = 'UniProtKB',
+                                   taxa: Optional[Iterable[str]] = None,
+                                   evidence_codes: Optional[Iterable[str]] = None,
+                                   aspects: Optional[Iterable[str]] = None,
+                                   chunksize: int = SQL_IN_CHUNKSIZE,
+                                   ) -> Iterable[GeneAnnotation]:
+        """Iterate over the annotations of the genes, querying them in chunks.
+
+        The identifiers are consumed lazily, so this works for very large or generated sets of genes. Each chunk is
+        one ``IN`` query that uses the index on ``(db, db_id)``.
+
+        :param ids: Identifiers of genes in the ``db`` database, like UniProt accessions
+        :param db: The database of the identifiers. If None, genes are matched by identifier only, which can't use the
+         index.
+        :param taxa: NCBI taxonomy identifiers, optionally prefixed with ``taxon:``
+        :param evidence_codes: Evidence codes, like ``IDA``
+        :param aspects: Aspects (``P``, ``F``, ``C``) or GO namespaces, like ``biological_process``
+        :param chunksize: The number of identifiers in each query
+        """
+        query = query_gene_annotations(
+            self.session, db=db, taxa=taxa, evidence_codes=evidence_codes, aspects=aspects,
+        )
+        for chunk in iter_chunks(ids, chunksize):
+            for row in query.filter(Annotation.db_id.in_(chunk)):
+                yield GeneAnnotation(*row)
+
+    def get_annotations_for_genes(self,
+                                  ids: Iterable[str],
+                                  db: Optional[str] = 'UniProtKB',
+                                  taxa: Optional[Iterable[str]] = None,
+                                  evidence_codes: Optional[Iterable[str]] = None,
+                                  aspects: Optional[Iterable[str]] = None,
+                                  ) -> Dict[str, Set[str]]:
+        """Get the GO identifiers of the terms each gene is annotated to, skipping annotations with a ``NOT`` qualifier.
+
+        See :meth:`iter_annotations_for_genes` for the parameters. Genes without annotations are left out.
+        """
+        rv = defaultdict(set)
+        annotations = self.iter_annotations_for_genes(
+            ids, db=db, taxa=taxa, evidence_codes=evidence_codes, aspects=aspects,
+        )
+        for annotation in annotations:
+            if annotation.qualifier is None or 'NOT' not in annotation.qualifier:
+                rv[annotation.db_id].add(annotation.go_id)
+        return dict(rv)
+
+    def get_annotations_for_genes_df(self,
+                                     ids: Iterable[str],
+                                     db: Optional[str] = 'UniProtKB',
+                                     taxa: Optional[Iterable[str]] = None,
+                                     evidence_codes: Optional[Iterable[str]] = None,
+                                     aspects: Optional[Iterable[str]] = None,
+                                     ) -> pd.DataFrame:
+        """Get the annotations of the genes as a dataframe with the columns of :class:`GeneAnnotation`.
+
+        See :meth:`iter_annotations_for_genes` for the parameters. The columns with few distinct values are
+        categorical.
+        """
+        annotations = self.iter_annotations_for_genes(
+            ids, db=db, taxa=taxa, evidence_codes=evidence_codes, aspects=aspects,
+        )
+        df = pd.DataFrame(list(annotations), columns=GeneAnnotation._fields)
+        for column in ('db', 'namespace', 'qualifier', 'evidence_code', 'tax_id'):
+            df[column] = df[column].astype('category')
+        return df
 
     def count_terms(self) -> int:
         """Count the number of entries in GO."""
@@ -181,34 +866,85 @@ class Manager(AbstractManager, BELManagerMixin, BELNamespaceManagerMixin, FlaskM
             annotations=self.count_annotations(),
         )
 
-    def lookup_term(self, node: BaseEntity) -> Optional[Term]:
-        """Guess the identifier from a PyBEL node data dictionary."""
+    @staticmethod
+    def _is_go_node(node: BaseEntity) -> bool:
         namespace = node.get(NAMESPACE)
+        return namespace is not None and namespace.upper() in BEL_NAMESPACES
 
-        if namespace is None or namespace.upper() not in BEL_NAMESPACES:
+    def lookup_term(self, node: BaseEntity) -> Optional[Term]:
+        """Guess the identifier from a PyBEL node data dictionary."""
+        if not self._is_go_node(node):
             return
 
+        get_term_by_id = self.get_term_index().get_term_by_id if self.use_term_index else self.get_term_by_id
+
         identifier = node.identifier
         if identifier:
-            return self.get_term_by_id(identifier)
+            return get_term_by_id(identifier)
+
+        if GO_ID_PATTERN.match(node.name):
+            return get_term_by_id(node.name)
+
+        # Names and synonyms are resolved in memory, ignoring case and whitespace
+        go_id = self.get_name_index().get(node.name)
+        if go_id is not None:
+            return get_term_by_id(go_id)
+
+    def _get_terms_by(self, column, values: Iterable[str]) -> Dict[str, Term]:
+        """Get terms whose values in the given column are in the given values with chunked ``IN`` queries."""
+        rv = {}
+        for chunk in iter_chunks(values, SQL_IN_CHUNKSIZE):
+            for term in self.session.query(Term).filter(column.in_(chunk)):
+                rv[getattr(term, column.key)] = term
+        return rv
+
+    def lookup_terms(self, nodes: Iterable[BaseEntity]) -> Dict[BaseEntity, Term]:
+        """Look up the terms for many nodes at once.
 
-        model = self.get_term_by_id(node.name)
-        if model is not None:
-            return model
+        Names are resolved to GO identifiers with the in-memory name index, then all terms are fetched together with
+        a few chunked ``IN`` queries, so the number of queries depends on the number of distinct terms rather than on
+        the number of nodes. Nodes that can't be looked up are left out. Follows the same rules as
+        :meth:`lookup_term`.
+        """
+        nodes = [node for node in nodes if self._is_go_node(node)]
+
+        if self.use_term_index:
+            return {
+                node: term
+                for node, term in zip(nodes, map(self.lookup_term, nodes))
+                if term is not None
+            }
+
+        name_index = self.get_name_index()
+        node_go_ids = {}
+        for node in nodes:
+            if node.identifier:
+                node_go_ids[node] = normalize_go_id(node.identifier)
+            elif GO_ID_PATTERN.match(node.name):
+                node_go_ids[node] = normalize_go_id(node.name)
+            else:
+                go_id = name_index.get(node.name)
+                if go_id is not None:
+                    node_go_ids[node] = go_id
 
-        return self.get_term_by_name(node.name)
+        terms = self._get_terms_by(Term.go_id, set(node_go_ids.values()))
+
+        return {
+            node: terms[go_id]
+            for node, go_id in node_go_ids.items()
+            if go_id in terms
+        }
 
     def iter_terms(self, graph: BELGraph, use_tqdm: bool = False) -> Iterable[Tuple[BaseEntity, Term]]:
         """Iterate over nodes in the graph that can be looked up."""
+        terms = self.lookup_terms(graph)
+
         it = (
-            tqdm(graph, desc='GO terms')
+            tqdm(terms.items(), desc='GO terms')
             if use_tqdm else
-            graph
+            terms.items()
         )
-        for node in it:
-            term = self.lookup_term(node)
-            if term is not None:
-                yield node, term
+        yield from it
 
     def normalize_terms(self, graph: BELGraph, use_tqdm: bool = False) -> None:
         """Add identifiers to all GO terms."""
@@ -226,25 +962,262 @@ class Manager(AbstractManager, BELManagerMixin, BELNamespaceManagerMixin, FlaskM
 
         nx.relabel_nodes(graph, mapping, copy=False)
 
-    def enrich_bioprocesses(self, graph: BELGraph, use_tqdm: bool = False) -> None:
-        """Enrich a BEL graph's biological processes."""
+    def _query_hierarchy_rows(self, child, parent) -> Query:
+        """Query the columns of both terms of each edge, as two :data:`TermRow` s."""
+        query = self.session.query(
+            child.go_id, child.name, child.namespace, child.is_complex,
+            parent.go_id, parent.name, parent.namespace, parent.is_complex,
+        )
+        query = query.select_from(Hierarchy)
+        query = query.join(child, Hierarchy.subject_id == child.id)
+        query = query.join(parent, Hierarchy.object_id == parent.id)
+        return query
+
+    def _iter_hierarchy(self, go_ids: Iterable[str], include_children: bool = False,
+                        ) -> Iterable[Tuple[TermRow, TermRow]]:
+        """Iterate over the (child, parent) rows of the edges from the given terms to their parents.
+
+        Each chunk of GO identifiers is resolved with a single query that joins both terms of each edge.
+
+        :param go_ids: GO identifiers
+        :param include_children: Also iterate over the edges from the children of the given terms
+        """
+        if self.use_term_index:
+            yield from self.get_term_index().iter_hierarchy(go_ids, include_children=include_children)
+            return
+
+        child, parent = aliased(Term), aliased(Term)
+        query = self._query_hierarchy_rows(child, parent)
+
+        # The identifiers are bound twice when children are included
+        chunksize = SQL_IN_CHUNKSIZE // 2 if include_children else SQL_IN_CHUNKSIZE
+        for chunk in iter_chunks(go_ids, chunksize):
+            condition = child.go_id.in_(chunk)
+            if include_children:
+                condition = or_(condition, parent.go_id.in_(chunk))
+
+            for row in query.filter(condition):
+                yield tuple(row[:4]), tuple(row[4:])
+
+    def enrich_bioprocesses(self, graph: BELGraph, use_tqdm: bool = False, depth: Optional[int] = 1) -> None:
+        """Enrich a BEL graph's biological processes with their children and parents.
+
+        The edges of all terms on each level are fetched together and their BEL nodes are built from the fetched
+        rows, so no relationships are loaded term by term.
+
+        :param graph: A BEL graph
+        :param use_tqdm: Should a progress bar be shown while looking up terms?
+        :param depth: The number of levels of parents to add. If none, adds all ancestors up to the roots. Only
+         direct children are ever added.
+        """
         self.add_namespace_to_graph(graph)
-        for node, term in list(self.iter_terms(graph, use_tqdm=use_tqdm)):
-            if node[FUNCTION] != BIOPROCESS:
+        self._enrich_bioprocesses(graph, use_tqdm=use_tqdm, depth=depth)
+
+    def _enrich_bioprocesses(self, graph: BELGraph, use_tqdm: bool = False, depth: Optional[int] = 1) -> None:
+        """Enrich the biological processes of a graph that already has the namespace."""
+        nodes = defaultdict(list)
+        for node, term in self.iter_terms(graph, use_tqdm=use_tqdm):
+            if node[FUNCTION] == BIOPROCESS:
+                nodes[term.go_id].append(node)
+
+        frontier = expanded = set(nodes)
+        level = 0
+        while frontier and (depth is None or level < depth):
+            frontier = self._enrich_level(graph, nodes, frontier, expanded, include_children=(level == 0))
+            expanded = expanded | frontier
+            level += 1
+
+    def _enrich_level(self,
+                      graph: BELGraph,
+                      nodes: Mapping[str, List[BaseEntity]],
+                      frontier: Set[str],
+                      expanded: Set[str],
+                      include_children: bool,
+                      ) -> Set[str]:
+        """Add the parents (and optionally children) of the terms in the frontier and return the next frontier."""
+        next_frontier = set()
+
+        for child_row, parent_row in self._iter_hierarchy(frontier, include_children=include_children):
+            child_id, parent_id = child_row[0], parent_row[0]
+            child_bel, parent_bel = bel_node_cache.get(*child_row), bel_node_cache.get(*parent_row)
+            if child_bel is None or parent_bel is None:
                 continue
 
-            for hierarchy in term.in_edges:
-                graph.add_is_a(hierarchy.subject.as_bel(), node)
+            if child_id in frontier:
+                for child in nodes.get(child_id) or [child_bel]:
+                    graph.add_is_a(child, parent_bel)
+
+                if parent_id not in expanded:
+                    next_frontier.add(parent_id)
+
+            if include_children and parent_id in frontier:
+                for parent in nodes[parent_id]:
+                    graph.add_is_a(child_bel, parent)
+
+        return next_frontier
+
+    def enrich_many(self,
+                    graphs: Iterable[BELGraph],
+                    workers: Optional[int] = None,
+                    depth: Optional[int] = 1,
+                    chunksize: int = 1,
+                    ) -> List[EnrichedGraph]:
+        """Normalize the terms of many BEL graphs and enrich their biological processes in a pool of processes.
 
-            for hierarchy in term.out_edges:
-                graph.add_is_a(node, hierarchy.object.as_bel())
+        The term index is loaded once, here, and handed to each worker when it starts, along with the keyword and URL
+        of the BEL namespace, so the workers look up terms and their hierarchy in memory without querying the
+        database. Each worker only connects to the database once, to build its own manager.
+
+        :param graphs: BEL graphs. They are sent to the workers, so the enriched graphs are returned as copies.
+        :param workers: The number of worker processes. Defaults to the number of CPUs. If 1, the graphs are enriched
+         one after another in this process, in place, with the same term index as the workers would use.
+        :param depth: The number of levels of parents to add. See :meth:`enrich_bioprocesses`.
+        :param chunksize: The number of graphs sent to a worker at once
+        :return: The enriched graphs with the time spent normalizing and enriching each, in the same order
+        """
+        namespace = self.upload_bel_namespace()
+        namespace = namespace.keyword, namespace.url
+
+        if workers == 1:
+            manager = Manager(engine=self.engine, session=self.session, term_index=self.get_term_index())
+            return [_enrich_graph(manager, graph, namespace, depth) for graph in graphs]
+
+        executor = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1,
+            initializer=_init_enrich_worker,
+            initargs=(self.engine.url, self.get_term_index()),
+        )
+        with executor:
+            return list(executor.map(
+                partial(_enrich_graph_in_worker, namespace=namespace, depth=depth),
+                graphs,
+                chunksize=chunksize,
+            ))
+
+    def get_semantic_similarity(self) -> SemanticSimilarity:
+        """Get the semantic similarity calculator, loading the information content of the terms if needed.
+
+        The information content is computed from the genes annotated to each term or its descendants along the
+        true-path relations, and cached on disk for the GO release and the annotations in the database.
+        """
+        if self._semantic_similarity is not None:
+            return self._semantic_similarity
+
+        ontology = self.get_ontology()
+        release = self.get_data_version()
+
+        path, information_content = None, None
+        if release is not None:
+            annotations = '{}-{}'.format(*self.session.query(func.count(Annotation.id), func.max(Annotation.id)).one())
+            path = get_information_content_path(release, annotations)
+            information_content = load_information_content(path, ontology)
+
+        if information_content is None:
+            log.info('computing information content')
+            matrix = AnnotationMatrix.from_session(self.session, ontology, key='db_id', relations=TRUE_PATH_RELATIONS)
+            information_content = compute_information_content(ontology, matrix.term_sizes)
+            if path is not None:
+                save_information_content(path, ontology, information_content)
+
+        self._semantic_similarity = SemanticSimilarity(ontology, information_content)
+        return self._semantic_similarity
+
+    def get_term_similarity(self,
+                            go_ids: List[str],
+                            other_go_ids: Optional[List[str]] = None,
+                            method: str = 'lin',
+                            ) -> pd.DataFrame:
+        """Get the semantic similarities between two lists of terms.
+
+        :param go_ids: The GO identifiers of the terms for the rows
+        :param other_go_ids: The GO identifiers of the terms for the columns. Defaults to ``go_ids``.
+        :param method: One of ``resnik``, ``lin``, or ``wang``
+        """
+        go_ids = [normalize_go_id(go_id) for go_id in go_ids]
+        other_go_ids = go_ids if other_go_ids is None else [normalize_go_id(go_id) for go_id in other_go_ids]
+        similarities = self.get_semantic_similarity().term_similarity(go_ids, other_go_ids, method=method)
+        return pd.DataFrame(similarities, index=go_ids, columns=other_go_ids)
+
+    def _get_gene_terms(self, genes: Iterable[str], key: str, namespace: Optional[str]) -> Dict[str, List[str]]:
+        """Get the GO identifiers of the terms directly annotated to each gene, skipping NOT annotations."""
+        column = getattr(Annotation, key)
+        rv = defaultdict(list)
+        for chunk in iter_chunks(genes, SQL_IN_CHUNKSIZE):
+            query = self.session.query(column, Term.go_id).join(Annotation.term).filter(
+                column.in_(chunk),
+                or_(Annotation.qualifier.is_(None), ~Annotation.qualifier.contains('NOT')),
+            )
+            if namespace is not None:
+                query = query.filter(Term.namespace == namespace)
+            for gene, go_id in query:
+                rv[gene].append(go_id)
+        return rv
+
+    def get_gene_similarity(self,
+                            genes: List[str],
+                            other_genes: Optional[List[str]] = None,
+                            method: str = 'lin',
+                            namespace: Optional[str] = GO_BIOLOGICAL_PROCESS,
+                            key: str = 'db_symbol',
+                            ) -> pd.DataFrame:
+        """Get the best-match average semantic similarities between two lists of genes.
+
+        :param genes: The genes for the rows, identified by the ``key`` column
+        :param other_genes: The genes for the columns. Defaults to ``genes``.
+        :param method: One of ``resnik``, ``lin``, or ``wang``
+        :param namespace: The namespace of the terms to compare. If None, terms from all namespaces are used.
+        :param key: The column of :class:`Annotation` that identifies genes, like ``db_symbol`` or ``db_id``
+        :return: A dataframe of similarities, which are NaN for genes without annotations
+        """
+        other_genes = genes if other_genes is None else other_genes
+        gene_terms = self._get_gene_terms(set(genes) | set(other_genes), key=key, namespace=namespace)
+
+        similarities = self.get_semantic_similarity().gene_similarity(
+            [gene_terms.get(gene, []) for gene in genes],
+            None if other_genes is genes else [gene_terms.get(gene, []) for gene in other_genes],
+            method=method,
+        )
+        return pd.DataFrame(similarities, index=genes, columns=other_genes)
+
+    def enrichment(self,
+                   gene_set: Iterable[str],
+                   background: Optional[Iterable[str]] = None,
+                   key: str = 'db_symbol',
+                   evidence_codes: Optional[Iterable[str]] = None,
+                   namespaces: Optional[Iterable[str]] = None,
+                   min_count: int = 1,
+                   ) -> pd.DataFrame:
+        """Test the over-representation of a gene set in each GO term.
+
+        Annotations are propagated up the ``is_a`` hierarchy and ones with a ``NOT`` qualifier are skipped. The
+        annotation matrix is built on the first call and reused for later ones with the same ``key`` and
+        ``evidence_codes``. See :meth:`bio2bel_go.enrichment.AnnotationMatrix.enrichment`.
+
+        :param gene_set: The genes, identified by the ``key`` column
+        :param background: The background genes. Defaults to all annotated genes.
+        :param key: The column of :class:`Annotation` that identifies genes, like ``db_symbol`` or ``db_id``
+        :param evidence_codes: The evidence codes of the annotations to use. Defaults to all.
+        :param namespaces: The namespaces of the terms to test, like ``biological_process``. Defaults to all.
+        :param min_count: The smallest number of genes in the set a term must have to be tested
+        :return: A dataframe of the tested terms sorted by p-value, with Benjamini-Hochberg adjusted p-values
+        """
+        matrix = self.get_annotation_matrix(key=key, evidence_codes=evidence_codes)
+        return matrix.enrichment(gene_set, background=background, namespaces=namespaces, min_count=min_count)
+
+    def get_data_version(self) -> Optional[str]:
+        """Get the ``data-version`` of the GO release stored in the database, like ``releases/2017-03-26``.
+
+        This is the latest release that any term was added or changed in.
+        """
+        return self.session.query(func.max(Term.release)).scalar()
 
     def get_release_date(self) -> str:
         """Convert the OBO release date to a ISO 8601 version.
 
         Example: 'releases/2017-03-26'
         """
-        release_time = time.strptime(self.go.graph['data-version'], 'releases/%Y-%m-%d')
+        data_version = self.go.graph['data-version'] if self.go is not None else self.get_data_version()
+        release_time = time.strptime(data_version, 'releases/%Y-%m-%d')
         return time.strftime('%Y%m%d', release_time)
 
     def _get_identifier(self, model: Term) -> str:
@@ -258,8 +1231,8 @@ class Manager(AbstractManager, BELManagerMixin, BELNamespaceManagerMixin, FlaskM
             namespace=namespace,
         )
 
-    def to_bel(self) -> BELGraph:
-        """Convert Gene Ontology to BEL, with given strategies."""
+    def _make_bel_graph(self) -> BELGraph:
+        """Make an empty BEL graph with the metadata and namespace for GO."""
         graph = BELGraph(
             name='Gene Ontology',
             version='1.0.0',
@@ -270,12 +1243,147 @@ class Manager(AbstractManager, BELManagerMixin, BELNamespaceManagerMixin, FlaskM
 
         self.add_namespace_to_graph(graph)
 
-        for hierarchy in tqdm(self.list_hierarchies(), total=self.count_hierarchies(),
-                              desc='Mapping GO hierarchy to BEL'):
-            hierarchy.add_to_graph(graph)
+        return graph
 
-        for annotation in tqdm(self.list_annotations(), total=self.count_annotations(),
-                               desc='Mapping GO annotations to BEL'):
-            annotation.add_to_graph(graph)
+    def _iter_bel_edges(self, yield_per: int = DEFAULT_YIELD_PER, use_tqdm: bool = True) -> Iterable[EdgeTriple]:
+        """Iterate over the BEL edges for the hierarchy and annotations.
+
+        Rows are streamed with server-side cursors (where the database supports them) with the columns of their terms
+        joined in, and the BEL node for each term comes from :data:`bio2bel_go.dsl.bel_node_cache`.
+        """
+        is_a_data = make_is_a_data()
+        query = self._query_hierarchy_rows(aliased(Term), aliased(Term))
+        query = query.execution_options(stream_results=True).yield_per(yield_per)
+        if use_tqdm:
+            query = tqdm(query, total=self.count_hierarchies(), desc='Mapping GO hierarchy to BEL')
+        for row in query:
+            sub, obj = bel_node_cache.get(*row[:4]), bel_node_cache.get(*row[4:])
+            if sub and obj:
+                yield sub, obj, is_a_data
+
+        query = self.session.query(
+            Term.go_id, Term.name, Term.namespace, Term.is_complex,
+            Annotation.db, Annotation.db_id, Annotation.db_symbol,
+            Annotation.evidence_code, Annotation.provenance_db, Annotation.provenance_id, Annotation.tax_id,
+        )
+        query = query.join(Annotation.term).filter(Annotation.db.in_(BEL_ANNOTATION_DBS))
+        query = query.execution_options(stream_results=True).yield_per(yield_per)
+        if use_tqdm:
+            query = tqdm(query, desc='Mapping GO annotations to BEL')
+        for row in query:
+            sub, obj = bel_node_cache.get(*row[:4]), annotation_to_bel(*row[4:7])
+            if sub and obj:
+                yield sub, obj, make_annotation_data(*row[7:])
+
+    def to_bel(self) -> BELGraph:
+        """Convert Gene Ontology to BEL, with given strategies."""
+        graph = self._make_bel_graph()
+
+        for u, v, data in self._iter_bel_edges():
+            add_edge_to_graph(graph, u, v, data)
 
         return graph
+
+    def to_bel_file(self, file: TextIO, fmt: str = 'bel', use_tqdm: bool = False) -> None:
+        """Stream Gene Ontology as BEL to a file without building a BEL graph in memory.
+
+        :param file: A writable file
+        :param fmt: Either ``bel`` for a BEL script or ``nodelink`` for node-link JSON
+        :param use_tqdm: Should progress bars be shown?
+        """
+        writers = {
+            'bel': write_bel_script,
+            'nodelink': write_nodelink,
+        }
+        if fmt not in writers:
+            raise ValueError(f'invalid format: {fmt}. Use one of: {", ".join(sorted(writers))}')
+
+        writers[fmt](self._make_bel_graph(), self._iter_bel_edges(use_tqdm=use_tqdm), file)
+
+    @staticmethod
+    def _cli_add_populate(main: click.Group) -> click.Group:
+        """Add the populate command, with an option to report its phases."""
+        main = AbstractManager._cli_add_populate(main)
+        command = main.commands['populate']
+        populate = command.callback
+
+        command.params.append(click.Option(
+            ['--report'], type=click.File('w'),
+            help='Write a JSON report of the time, rows, SQL statements, and memory of each phase. Use - for stdout.',
+        ))
+
+        @click.pass_obj
+        def populate_with_report(manager: 'Manager', report, **kwargs):
+            populate(**kwargs)
+            if report is not None and manager.populate_report is not None:
+                manager.populate_report.dump(report)
+
+        command.callback = populate_with_report
+        return main
+
+    @staticmethod
+    def _cli_add_update(main: click.Group) -> click.Group:
+        """Add the update command."""
+
+        @main.command()
+        @click.option('--force-download', is_flag=True, help='Download the latest release')
+        @click.pass_obj
+        def update(manager: 'Manager', force_download):
+            """Update to another release by only applying what changed."""
+            for key, count in sorted(manager.update(force_download=force_download).items()):
+                click.echo(f'{key}: {count}')
+
+        return main
+
+    @classmethod
+    def get_cli(cls) -> click.Group:
+        """Get the :mod:`click` main function, with the update command."""
+        main = super().get_cli()
+        cls._cli_add_update(main)
+        return main
+
+    @staticmethod
+    def _cli_add_to_bel(main: click.Group) -> click.Group:
+        """Add the export BEL commands, including one that streams to a file."""
+        main = BELManagerMixin._cli_add_to_bel(main)
+
+        @main.command()
+        @click.option('-o', '--output', type=click.File('w'), default=sys.stdout)
+        @click.option('-f', '--fmt', type=click.Choice(['bel', 'nodelink']), default='bel', show_default=True)
+        @click.pass_obj
+        def stream(manager: 'Manager', output, fmt):
+            """Stream as BEL Script or Node-Link JSON."""
+            manager.to_bel_file(output, fmt=fmt, use_tqdm=True)
+
+        return main
+
+
+def _enrich_graph(manager: Manager,
+                  graph: BELGraph,
+                  namespace: Tuple[str, str],
+                  depth: Optional[int],
+                  ) -> EnrichedGraph:
+    """Normalize the terms of a graph and enrich its biological processes, adding the already uploaded namespace."""
+    start = time.perf_counter()
+    manager.normalize_terms(graph)
+    normalized = time.perf_counter()
+
+    keyword, url = namespace
+    graph.namespace_url[keyword] = url
+    manager._add_annotation_to_graph(graph)
+    manager._enrich_bioprocesses(graph, depth=depth)
+
+    return EnrichedGraph(graph, normalized - start, time.perf_counter() - normalized)
+
+
+#: The manager of each worker process of :meth:`Manager.enrich_many`
+_worker_manager: Optional[Manager] = None
+
+
+def _init_enrich_worker(connection, term_index: TermIndex) -> None:
+    global _worker_manager
+    _worker_manager = Manager(connection=connection, term_index=term_index)
+
+
+def _enrich_graph_in_worker(graph: BELGraph, namespace: Tuple[str, str], depth: Optional[int]) -> EnrichedGraph:
+    return _enrich_graph(_worker_manager, graph, namespace, depth)
@@ -5,18 +5,20 @@
 from typing import Mapping, Optional
 
 from pybel import BELGraph
-from pybel.dsl import Abundance, BaseEntity, NamedComplexAbundance
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text
+from pybel.dsl import BaseEntity
+from sqlalchemy import BigInteger, Boolean, Column, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.ext.declarative import DeclarativeMeta, declarative_base
 from sqlalchemy.orm import backref, relationship
 
-from .constants import GO_BIOLOGICAL_PROCESS, GO_CELLULAR_COMPONENT, GO_MOLECULAR_FUNCTION, MODULE_NAME
-from .dsl import gobp
+from .constants import MODULE_NAME
+from .dsl import BEL_ENCODINGS, annotation_to_bel, bel_node_cache, get_citation
 
 TERM_TABLE_NAME = f'{MODULE_NAME}_term'
 SYNONYM_TABLE_NAME = f'{MODULE_NAME}_synonym'
 HIERARCHY_TABLE_NAME = f'{MODULE_NAME}_hierarchy'
 ANNOTATION_TABLE_NAME = f'{MODULE_NAME}_annotation'
+TERM_CLOSURE_TABLE_NAME = f'{MODULE_NAME}_term_closure'
+PROPAGATED_ANNOTATION_TABLE_NAME = f'{MODULE_NAME}_propagated_annotation'
 
 Base: DeclarativeMeta = declarative_base()
 
@@ -34,6 +36,7 @@ class Term(Base):
     definition = Column(Text)
     is_complex = Column(Boolean, default=False, nullable=False,
                         doc='Cache if is descendant of GO:0032991 "macromolecular complex"')
+    release = Column(String(255), nullable=True, doc='The data-version of the GO release the term was last changed in')
 
     def __repr__(self):
         return f'{self.go_id} ! {self.name}'
@@ -50,39 +53,11 @@ class Term(Base):
     @property
     def bel_encoding(self) -> Optional[str]:
         """Get the BEL encoding for this term."""
-        if self.namespace == GO_BIOLOGICAL_PROCESS:
-            return 'B'
-
-        if self.namespace == GO_CELLULAR_COMPONENT:
-            if self.is_complex:
-                return 'C'
-            else:
-                return 'A'
-
-        if self.namespace == GO_MOLECULAR_FUNCTION:
-            return 'Y'
+        return BEL_ENCODINGS.get((self.namespace, bool(self.is_complex)))
 
     def as_bel(self) -> Optional[BaseEntity]:
-        """Convert this term to a BEL node."""
-        if self.namespace == 'biological_process':
-            return gobp(
-                name=self.name,
-                identifier=self.go_id,
-            )
-
-        if self.namespace == 'cellular_component':
-            if self.is_complex:
-                return NamedComplexAbundance(
-                    namespace='go',
-                    name=self.name,
-                    identifier=self.go_id,
-                )
-            else:
-                return Abundance(
-                    namespace='go',
-                    name=self.name,
-                    identifier=self.go_id,
-                )
+        """Convert this term to a BEL node, which is cached by GO identifier."""
+        return bel_node_cache.get(self.go_id, self.name, self.namespace, self.is_complex)
 
 
 class Synonym(Base):
@@ -94,7 +69,7 @@ class Synonym(Base):
 
     name = Column(String(1023), nullable=False, index=True)
 
-    term_id = Column(Integer, ForeignKey(f'{TERM_TABLE_NAME}.id'), nullable=False)
+    term_id = Column(Integer, ForeignKey(f'{TERM_TABLE_NAME}.id'), nullable=False, index=True)
     term = relationship(Term, backref=backref('synonyms'))
 
     def __repr__(self):
@@ -117,6 +92,11 @@ class Hierarchy(Base):
     object = relationship(Term, foreign_keys=[object_id],
                           backref=backref('in_edges', lazy='dynamic', cascade='all, delete-orphan'))
 
+    __table_args__ = (
+        Index(f'ix_{HIERARCHY_TABLE_NAME}_subject_relation', subject_id, relation),
+        Index(f'ix_{HIERARCHY_TABLE_NAME}_object_relation', object_id, relation),
+    )
+
     def add_to_graph(self, graph: BELGraph) -> Optional[str]:
         """Add this hierarchical relation to the graph."""
         sub = self.subject.as_bel()
@@ -145,21 +125,17 @@ class Annotation(Base):
     provenance_id = Column(String, nullable=False)
     evidence_code = Column(String, nullable=False)
     tax_id = Column(String, nullable=False)
+    content_hash = Column(BigInteger, nullable=True, index=True,
+                          doc='The hash of the GAF record, used to find annotations that changed between releases')
+
+    __table_args__ = (
+        Index(f'ix_{ANNOTATION_TABLE_NAME}_term_tax', term_id, tax_id),
+        Index(f'ix_{ANNOTATION_TABLE_NAME}_db_db_id', db, db_id),
+    )
 
     def as_bel(self) -> Optional[BaseEntity]:
         """Get BEL thing."""
-        if self.db == 'ComplexPortal':
-            return NamedComplexAbundance(
-                namespace='complexportal',
-                name=self.db_symbol,
-                identifier=self.db_id,
-            )
-
-    def _get_citation(self):
-        if self.provenance_db == 'pmid':
-            return self.evidence_code
-        else:
-            return {'type': self.provenance_db, 'reference': self.provenance_id}
+        return annotation_to_bel(self.db, self.db_id, self.db_symbol)
 
     def add_to_graph(self, graph: BELGraph) -> Optional[str]:
         """Add this annotation to the BEL graph."""
@@ -170,11 +146,51 @@ class Annotation(Base):
             return
 
         return graph.add_association(
-            self.term.as_bel(),
-            self.as_bel(),
+            sub,
+            obj,
             evidence=self.evidence_code,
-            citation=self._get_citation(),
+            citation=get_citation(self.provenance_db, self.provenance_id),
             annotations={
                 'Species': self.tax_id,
             }
         )
+
+
+class TermClosure(Base):
+    """Represents a term and one of its ancestors, or itself, along the true-path relations."""
+
+    __tablename__ = TERM_CLOSURE_TABLE_NAME
+    id = Column(Integer, primary_key=True)
+
+    ancestor_id = Column(Integer, ForeignKey(f'{Term.__tablename__}.id'), nullable=False)
+    ancestor = relationship(Term, foreign_keys=[ancestor_id])
+
+    descendant_id = Column(Integer, ForeignKey(f'{Term.__tablename__}.id'), nullable=False, index=True)
+    descendant = relationship(Term, foreign_keys=[descendant_id])
+
+    __table_args__ = (
+        Index(f'ix_{TERM_CLOSURE_TABLE_NAME}_ancestor_descendant', ancestor_id, descendant_id),
+    )
+
+
+class PropagatedAnnotation(Base):
+    """Represents a gene annotated to a term or any of its descendants, following the true-path rule."""
+
+    __tablename__ = PROPAGATED_ANNOTATION_TABLE_NAME
+    id = Column(Integer, primary_key=True)
+
+    term_id = Column(Integer, ForeignKey(f'{Term.__tablename__}.id'), nullable=False)
+    term = relationship(Term)
+
+    db = Column(String, nullable=False)
+    db_id = Column(String, nullable=False)
+    db_symbol = Column(String, nullable=False)
+    tax_id = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index(f'ix_{PROPAGATED_ANNOTATION_TABLE_NAME}_term_db_id', term_id, db_id),
+    )
+
+    def as_bel(self) -> Optional[BaseEntity]:
+        """Get the BEL node of the annotated gene product."""
+        return annotation_to_bel(self.db, self.db_id, self.db_symbol)
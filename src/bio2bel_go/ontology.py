@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+"""An array-backed ontology.
+
+Terms are addressed by dense ``int32`` indices and the edges of each relation type (``is_a``, ``part_of``, etc.) are
+stored as compressed sparse rows (CSR) from each term to its parents, and lazily to its children, so traversals are
+vectorized with NumPy over whole frontiers of terms instead of iterating over a :class:`networkx.MultiDiGraph`.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+import networkx as nx
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .models import Hierarchy, Term
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'CSR',
+    'build_csr',
+    'gather',
+    'Ontology',
+]
+
+#: The (indptr, indices) arrays of compressed sparse rows
+CSR = Tuple[np.ndarray, np.ndarray]
+
+#: The relation of edges stored without one, which the BEL export also treats as ``isA``
+DEFAULT_RELATION = 'is_a'
+
+
+def build_csr(size: int, rows: Sequence[int], columns: Sequence[int], dtype=np.int32) -> CSR:
+    """Build compressed sparse rows from parallel sequences of row and column indices."""
+    rows = np.asarray(rows, dtype=dtype)
+    columns = np.asarray(columns, dtype=dtype)
+    indptr = np.zeros(size + 1, dtype=dtype)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, columns[np.argsort(rows, kind='stable')]
+
+
+def gather(csr: CSR, rows: np.ndarray) -> np.ndarray:
+    """Get the concatenated columns of the given rows of compressed sparse rows, in the order of the rows."""
+    indptr, indices = csr
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return indices[:0]
+
+    # For each row, the positions in its slice of indices are its start plus 0, 1, ..., length - 1
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return indices[offsets + np.arange(total)]
+
+
+def _gather_all(csrs: Sequence[CSR], rows: np.ndarray) -> np.ndarray:
+    """Get the concatenated columns of the given rows in each of the CSR arrays."""
+    if not csrs:
+        return rows[:0]
+    return np.concatenate([gather(csr, rows) for csr in csrs])
+
+
+class Ontology:
+    """An ontology whose terms are addressed by integer indices and whose edges are stored as CSR arrays."""
+
+    def __init__(self,
+                 go_ids: List[str],
+                 names: List[str],
+                 namespaces: List[str],
+                 parents: Mapping[str, CSR],
+                 ) -> None:
+        """Wrap the arrays of an ontology.
+
+        :param go_ids: The GO identifiers, addressed by term index
+        :param names: The names, in the same order as ``go_ids``
+        :param namespaces: The namespaces, in the same order as ``go_ids``
+        :param parents: A dictionary from relation types to the CSR arrays from each term to its parents
+        """
+        self.go_ids = go_ids
+        self.names = names
+        self.namespaces = namespaces
+        self.parents = {
+            relation: (np.asarray(indptr, dtype=np.int32), np.asarray(indices, dtype=np.int32))
+            for relation, (indptr, indices) in parents.items()
+        }
+
+        self._index: Dict[str, int] = {go_id: index for index, go_id in enumerate(go_ids)}
+        self._children: Optional[Dict[str, CSR]] = None
+
+    @classmethod
+    def from_edges(cls,
+                   go_ids: List[str],
+                   names: List[str],
+                   namespaces: List[str],
+                   edges: Iterable[Tuple[int, int, str]],
+                   ) -> 'Ontology':
+        """Build an ontology from (child, parent, relation) triples of term indices."""
+        pairs: Dict[str, Tuple[List[int], List[int]]] = {}
+        for child, parent, relation in edges:
+            rows, columns = pairs.setdefault(relation, ([], []))
+            rows.append(child)
+            columns.append(parent)
+
+        return cls(go_ids, names, namespaces, parents={
+            relation: build_csr(len(go_ids), rows, columns)
+            for relation, (rows, columns) in pairs.items()
+        })
+
+    @classmethod
+    def from_graph(cls, graph: nx.MultiDiGraph) -> 'Ontology':
+        """Build an ontology from a graph like the one made by :func:`bio2bel_go.parser.read_obo`."""
+        go_ids = list(graph)
+        index = {go_id: i for i, go_id in enumerate(go_ids)}
+        return cls.from_edges(
+            go_ids,
+            [graph.nodes[go_id].get('name') for go_id in go_ids],
+            [graph.nodes[go_id].get('namespace') for go_id in go_ids],
+            (
+                (index[child], index[parent], relation)
+                for child, parent, relation in graph.edges(keys=True)
+            ),
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'Ontology':
+        """Build an ontology from a :class:`bio2bel_go.snapshot.OntologySnapshot` without building a graph."""
+        return cls(
+            list(snapshot.go_ids),
+            list(snapshot.names),
+            [snapshot.namespaces[code] for code in snapshot.namespace_codes.tolist()],
+            parents=snapshot.edges,
+        )
+
+    @classmethod
+    def from_session(cls, session: Session) -> 'Ontology':
+        """Build an ontology with one query each over the term and hierarchy tables.
+
+        Edges stored without a relation are treated as ``is_a``.
+        """
+        key_to_index = {}
+        go_ids, names, namespaces = [], [], []
+        for index, (key, go_id, name, namespace) in enumerate(
+                session.query(Term.id, Term.go_id, Term.name, Term.namespace).order_by(Term.id)):
+            key_to_index[key] = index
+            go_ids.append(go_id)
+            names.append(name)
+            namespaces.append(namespace)
+
+        query = session.query(Hierarchy.subject_id, Hierarchy.object_id, Hierarchy.relation)
+        return cls.from_edges(go_ids, names, namespaces, (
+            (key_to_index[subject_id], key_to_index[object_id], relation or DEFAULT_RELATION)
+            for subject_id, object_id, relation in query
+        ))
+
+    def to_graph(self) -> nx.MultiDiGraph:
+        """Build a graph with ``name`` and ``namespace`` node attributes and edges keyed by relation type."""
+        graph = nx.MultiDiGraph()
+        for go_id, name, namespace in zip(self.go_ids, self.names, self.namespaces):
+            graph.add_node(go_id, name=name, namespace=namespace)
+
+        for relation, csr in self.parents.items():
+            children = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(csr[0]))
+            graph.add_edges_from(
+                (self.go_ids[child], self.go_ids[parent], relation)
+                for child, parent in zip(children.tolist(), csr[1].tolist())
+            )
+
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.go_ids)
+
+    def __contains__(self, go_id: str) -> bool:
+        return go_id in self._index
+
+    @property
+    def relations(self) -> List[str]:
+        """Get the relation types of the edges."""
+        return sorted(self.parents)
+
+    def number_of_edges(self) -> int:
+        """Count the edges across all relation types."""
+        return sum(len(indices) for _, indices in self.parents.values())
+
+    def get_index(self, go_id: str) -> Optional[int]:
+        """Get the index of a term."""
+        return self._index.get(go_id)
+
+    def get_indices(self, go_ids: Iterable[str]) -> np.ndarray:
+        """Get the indices of the terms, skipping ones that aren't in the ontology."""
+        return np.array([self._index[go_id] for go_id in go_ids if go_id in self._index], dtype=np.int32)
+
+    @property
+    def children(self) -> Dict[str, CSR]:
+        """Get the CSR arrays from each term to its children for each relation type, building them on first use."""
+        if self._children is None:
+            self._children = {}
+            for relation, (indptr, indices) in self.parents.items():
+                rows = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(indptr))
+                self._children[relation] = build_csr(len(self), indices, rows)
+        return self._children
+
+    def _get_csrs(self, csrs: Mapping[str, CSR], relations: Optional[Iterable[str]]) -> List[CSR]:
+        if relations is None:
+            return list(csrs.values())
+        return [csrs[relation] for relation in relations if relation in csrs]
+
+    def get_parent_indices(self, index: int, relations: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Get the indices of the direct parents of a term."""
+        rows = np.array([index], dtype=np.int32)
+        return np.unique(_gather_all(self._get_csrs(self.parents, relations), rows))
+
+    def get_child_indices(self, index: int, relations: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Get the indices of the direct children of a term."""
+        rows = np.array([index], dtype=np.int32)
+        return np.unique(_gather_all(self._get_csrs(self.children, relations), rows))
+
+    def _traverse(self, csrs: List[CSR], indices: Iterable[int]) -> np.ndarray:
+        """Get a mask of the terms reachable from the given terms in at least one step."""
+        reached = np.zeros(len(self), dtype=bool)
+        frontier = np.unique(np.asarray(list(indices), dtype=np.int32))
+        while frontier.size and csrs:
+            neighbors = _gather_all(csrs, frontier)
+            neighbors = np.unique(neighbors[~reached[neighbors]])
+            reached[neighbors] = True
+            frontier = neighbors
+        return reached
+
+    def get_ancestor_mask(self, indices: Iterable[int], relations: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Get a boolean mask over all terms of the union of the ancestors of the given terms.
+
+        :param indices: Term indices
+        :param relations: The relation types to follow. Defaults to all.
+        """
+        return self._traverse(self._get_csrs(self.parents, relations), indices)
+
+    def get_descendant_mask(self, indices: Iterable[int], relations: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Get a boolean mask over all terms of the union of the descendants of the given terms.
+
+        :param indices: Term indices
+        :param relations: The relation types to follow. Defaults to all.
+        """
+        return self._traverse(self._get_csrs(self.children, relations), indices)
+
+    def _get_ids(self, mask: np.ndarray) -> Set[str]:
+        return {self.go_ids[index] for index in np.flatnonzero(mask).tolist()}
+
+    def get_ancestors(self, go_id: str, relations: Optional[Iterable[str]] = None) -> Set[str]:
+        """Get the GO identifiers of the ancestors of a term, not including itself."""
+        index = self._index.get(go_id)
+        if index is None:
+            return set()
+        return self._get_ids(self.get_ancestor_mask([index], relations=relations))
+
+    def get_descendants(self, go_id: str, relations: Optional[Iterable[str]] = None) -> Set[str]:
+        """Get the GO identifiers of the descendants of a term, not including itself."""
+        index = self._index.get(go_id)
+        if index is None:
+            return set()
+        return self._get_ids(self.get_descendant_mask([index], relations=relations))
+
+    def is_descendant(self, go_id: str, ancestor_id: str, relations: Optional[Iterable[str]] = None) -> bool:
+        """Check if a term is a descendant of another."""
+        return ancestor_id in self.get_ancestors(go_id, relations=relations)
+
+    def get_topological_order(self, relations: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Get the term indices ordered so every term comes after all of its parents."""
+        csrs = self._get_csrs(self.parents, relations)
+        in_degree = np.zeros(len(self), dtype=np.int32)
+        for indptr, _ in csrs:
+            in_degree += np.diff(indptr).astype(np.int32)
+
+        children = self._get_csrs(self.children, relations)
+        order = []
+        frontier = np.flatnonzero(in_degree == 0).astype(np.int32)
+        while frontier.size:
+            order.append(frontier)
+            neighbors = _gather_all(children, frontier)
+            np.subtract.at(in_degree, neighbors, 1)
+            candidates = np.unique(neighbors)
+            frontier = candidates[in_degree[candidates] == 0]
+
+        rv = np.concatenate(order) if order else np.zeros(0, dtype=np.int32)
+        if len(rv) != len(self):
+            raise ValueError('ontology has a cycle')
+        return rv
+
+    def get_ancestor_closure(self, relations: Optional[Iterable[str]] = None) -> CSR:
+        """Get the CSR arrays from each term to all of its ancestors, not including itself.
+
+        The ancestors of each term are the union of its parents and their ancestors, which are built first by going
+        through the terms in topological order.
+        """
+        csrs = self._get_csrs(self.parents, relations)
+        ancestors: List[Optional[np.ndarray]] = [None] * len(self)
+        empty = np.zeros(0, dtype=np.int32)
+
+        for index in self.get_topological_order(relations=relations).tolist():
+            parents = _gather_all(csrs, np.array([index], dtype=np.int32))
+            ancestors[index] = np.unique(np.concatenate([parents, *(ancestors[parent] for parent in parents.tolist())]))
+
+        lengths = np.array([len(a) for a in ancestors], dtype=np.int64)
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate(ancestors).astype(np.int32) if len(self) else empty
+        return indptr, indices
@@ -4,56 +4,242 @@
 
 import logging
 import os
-from typing import Optional
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, TextIO, Tuple, Union
 
-import obonet
 import pandas as pd
-from networkx import MultiDiGraph, read_gpickle, write_gpickle
+from networkx import MultiDiGraph
 
 from bio2bel.downloading import make_df_getter, make_downloader
 from .constants import (
-    GAF_COLUMNS, GO_HUMAN_ANNOTATIONS_PATH, GO_HUMAN_ANNOTATIONS_URL, GO_HUMAN_COMPLEX_ANNOTATIONS_PATH,
-    GO_HUMAN_COMPLEX_ANNOTATIONS_URL, GO_HUMAN_ISOFORM_ANNOTATIONS_PATH, GO_HUMAN_ISOFORM_ANNOTATIONS_URL,
-    GO_HUMAN_RNA_ANNOTATIONS_PATH, GO_HUMAN_RNA_ANNOTATIONS_URL, GO_OBO_PATH, GO_OBO_PICKLE_PATH, GO_OBO_URL,
+    GAF_CACHE_DIRECTORY, GAF_COLUMNS, GO_HUMAN_ANNOTATIONS_PATH, GO_HUMAN_ANNOTATIONS_URL,
+    GO_HUMAN_COMPLEX_ANNOTATIONS_PATH, GO_HUMAN_COMPLEX_ANNOTATIONS_URL, GO_HUMAN_ISOFORM_ANNOTATIONS_PATH,
+    GO_HUMAN_ISOFORM_ANNOTATIONS_URL, GO_HUMAN_RNA_ANNOTATIONS_PATH, GO_HUMAN_RNA_ANNOTATIONS_URL, GO_OBO_PATH,
+    GO_OBO_SNAPSHOT_PATH, GO_OBO_URL,
 )
+from .gaf import GafRecord, iter_gaf_records, iter_gaf_records_with_aspects
+from .gaf_cache import GafTable, cache_gaf_table, concat_gaf_dfs, load_gaf_table, read_gaf_df
+from .snapshot import OntologySnapshot, get_obo_data_version, read_snapshot, write_snapshot
 
 log = logging.getLogger(__name__)
 
 __all__ = [
     'download_go_obo',
+    'OboTerm',
+    'iter_obo_terms',
+    'read_obo',
+    'get_go_snapshot',
     'get_go_from_obo',
     'get_goa_human_df',
     'get_goa_human_complex_df',
     'get_goa_human_isoform_df',
     'get_goa_human_rna_df',
     'get_goa_all_df',
+    'GOA_SOURCES',
+    'GafRecord',
+    'download_goa_all',
+    'get_gaf_sources',
+    'iter_gaf_records',
+    'iter_gaf_records_with_aspects',
+    'GafBatches',
+    'iter_gaf_batches',
 ]
 
 download_go_obo = make_downloader(GO_OBO_URL, GO_OBO_PATH)
 
+#: Header tags that can only appear once, following :mod:`obonet`. The rest are collected in lists.
+_OBO_SINGULAR_HEADER_TAGS = {
+    'format-version', 'data-version', 'version', 'ontology', 'date', 'saved-by', 'auto-generated-by',
+    'default-relationship-id-prefix',
+}
 
-def get_go_from_obo(path: Optional[str] = None, force_download: bool = False) -> MultiDiGraph:
-    """Download and parse a GO obo file with :mod:`obonet` into a MultiDiGraph.
+#: Term tags that are stored as node attributes
+_OBO_SINGULAR_TERM_TAGS = {'id', 'name', 'namespace', 'def', 'is_obsolete'}
 
-    :param path: path to the file
-    :param force_download: True to force download resources
+
+class OboTerm(NamedTuple):
+    """The parts of an OBO term stanza used by Bio2BEL GO."""
+
+    #: The GO identifier
+    go_id: str
+    #: The node attributes, named like in :mod:`obonet`
+    data: Dict[str, Any]
+    #: Pairs of relation types (``is_a``, ``part_of``, etc.) and parent GO identifiers
+    edges: List[Tuple[str, str]]
+
+
+def _strip_obo_value(value: str) -> str:
+    """Remove the trailing comment from an OBO tag value, like ``GO:0008150 ! biological_process``."""
+    value = value.strip()
+    comment = value.find(' ! ')
+    if comment != -1:
+        return value[:comment]
+    return value
+
+
+def _read_obo_header(lines: Iterator[str]) -> Dict[str, Any]:
+    """Read the header from the lines of an OBO file, stopping after the first stanza line."""
+    header = {}
+    for line in lines:
+        if line.startswith('['):
+            break
+
+        tag, sep, value = line.partition(':')
+        if not sep:
+            continue
+
+        value = value.strip()
+        if tag in _OBO_SINGULAR_HEADER_TAGS:
+            header[tag] = value
+        else:
+            header.setdefault(tag, []).append(value)
+
+    if 'ontology' in header:
+        header['name'] = header['ontology']
+
+    return header
+
+
+def _make_obo_term(tags: List[Tuple[str, str]]) -> Optional[OboTerm]:
+    """Make a term from the (tag, value) pairs of a term stanza."""
+    data, edges = {}, []
+    for tag, value in tags:
+        if tag in _OBO_SINGULAR_TERM_TAGS:
+            data[tag] = value.strip() if tag == 'def' else _strip_obo_value(value)
+        elif tag == 'synonym':
+            data.setdefault('synonym', []).append(value.strip())
+        elif tag == 'is_a':
+            edges.append(('is_a', _strip_obo_value(value).split(' ', 1)[0]))
+        else:  # relationship
+            relation, parent = _strip_obo_value(value).split(' ')[:2]
+            edges.append((relation, parent))
+
+    go_id = data.pop('id', None)
+    if go_id is None:
+        return
+
+    return OboTerm(go_id, data, edges)
+
+
+def _iter_obo_stanza_tags(lines: Iterator[str]) -> Iterable[List[Tuple[str, str]]]:
+    """Iterate over the (tag, value) pairs of each term stanza, only keeping the tags used by Bio2BEL GO.
+
+    Expects the lines after the first stanza line, which must be a term.
     """
-    if path is None and os.path.exists(GO_OBO_PICKLE_PATH) and not force_download:
-        log.info('loading from %s', GO_OBO_PICKLE_PATH)
-        return read_gpickle(GO_OBO_PICKLE_PATH)
+    tags = []
+    in_term = True
+    for line in lines:
+        if line.startswith('['):
+            if in_term:
+                yield tags
+            tags = []
+            in_term = line.startswith('[Term]')
+            continue
 
-    if path is not None:
-        return obonet.read_obo(path)
+        if not in_term:
+            continue
+
+        tag, sep, value = line.partition(': ')
+        if sep and (tag in _OBO_SINGULAR_TERM_TAGS or tag in {'synonym', 'is_a', 'relationship'}):
+            tags.append((tag, value))
+
+    if in_term:
+        yield tags
+
+
+def iter_obo_terms(file: TextIO, ignore_obsolete: bool = True) -> Tuple[Dict[str, Any], Iterable[OboTerm]]:
+    """Read the header and lazily iterate over the term stanzas of an OBO file.
+
+    Only the ``id``, ``name``, ``namespace``, ``def``, ``synonym``, ``is_a``, ``relationship``, and ``is_obsolete``
+    tags are kept. All others, as well as ``[Typedef]`` and ``[Instance]`` stanzas, are skipped without being parsed.
+
+    :param file: An open OBO file
+    :param ignore_obsolete: Skip terms marked with ``is_obsolete: true``
+    :return: The header and an iterable of terms
+    """
+    lines = iter(file)
+    header = _read_obo_header(lines)
+
+    def _iter_terms() -> Iterable[OboTerm]:
+        for tags in _iter_obo_stanza_tags(lines):
+            term = _make_obo_term(tags)
+            if term is None or (ignore_obsolete and term.data.get('is_obsolete') == 'true'):
+                continue
+            yield term
+
+    return header, _iter_terms()
+
+
+def read_obo(path: str, ignore_obsolete: bool = True) -> MultiDiGraph:
+    """Read an OBO file into a MultiDiGraph like :func:`obonet.read_obo`, but only keep the tags used by Bio2BEL GO.
+
+    Edges point from each term to its parents and are keyed by relation type.
+
+    :param path: The path to an OBO file
+    :param ignore_obsolete: Skip terms marked with ``is_obsolete: true``
+    """
+    with open(path, encoding='utf-8') as file:
+        header, terms = iter_obo_terms(file, ignore_obsolete=ignore_obsolete)
+        graph = MultiDiGraph(**header)
+
+        edges = []
+        for go_id, data, term_edges in terms:
+            graph.add_node(go_id, **data)
+            edges.extend(
+                (go_id, parent, relation)
+                for relation, parent in term_edges
+            )
+
+    graph.add_edges_from(edges)
+    return graph
+
+
+def get_go_snapshot(force_download: bool = False) -> OntologySnapshot:
+    """Get the memory-mapped snapshot of the GO OBO file, building it if it is missing or out of date.
+
+    The snapshot is rebuilt when its ``data-version`` doesn't match the header of the downloaded OBO file. If the
+    OBO file has been removed, the snapshot is trusted as is.
+
+    :param force_download: True to force download resources and rebuild the snapshot
+    """
+    if not force_download:
+        snapshot = read_snapshot(GO_OBO_SNAPSHOT_PATH)
+        if snapshot is not None:
+            if not os.path.exists(GO_OBO_PATH):
+                log.info('loading from %s without validation', GO_OBO_SNAPSHOT_PATH)
+                return snapshot
+
+            data_version = get_obo_data_version(GO_OBO_PATH)
+            if snapshot.data_version == data_version:
+                log.info('loading from %s', GO_OBO_SNAPSHOT_PATH)
+                return snapshot
+
+            log.info('snapshot is from %s but OBO is from %s', snapshot.data_version, data_version)
 
     path = download_go_obo(force_download=force_download)
 
     log.info('reading OBO')
-    result = obonet.read_obo(path)
+    graph = read_obo(path)
 
-    log.info('caching pickle to %s', GO_OBO_PICKLE_PATH)
-    write_gpickle(result, GO_OBO_PICKLE_PATH)
+    log.info('caching snapshot to %s', GO_OBO_SNAPSHOT_PATH)
+    write_snapshot(graph, GO_OBO_SNAPSHOT_PATH)
 
-    return result
+    return read_snapshot(GO_OBO_SNAPSHOT_PATH)
+
+
+def get_go_from_obo(path: Optional[str] = None, force_download: bool = False) -> MultiDiGraph:
+    """Download and parse a GO obo file with :func:`read_obo` into a MultiDiGraph.
+
+    Unless a path is given, the graph is rebuilt from the snapshot given by :func:`get_go_snapshot`, so its nodes
+    only have the ``name``, ``namespace``, ``def``, and ``synonym`` attributes.
+
+    :param path: path to the file
+    :param force_download: True to force download resources
+    """
+    if path is not None:
+        return read_obo(path)
+
+    return get_go_snapshot(force_download=force_download).to_graph()
 
 
 def make_goa_df_getter(url, path):
@@ -72,14 +258,244 @@ get_goa_human_isoform_df = make_goa_df_getter(GO_HUMAN_ISOFORM_ANNOTATIONS_URL,
 get_goa_human_rna_df = make_goa_df_getter(GO_HUMAN_RNA_ANNOTATIONS_URL, GO_HUMAN_RNA_ANNOTATIONS_PATH)
 
 
-def get_goa_all_df() -> pd.DataFrame:
-    """Get all GO annotations as a dataframe."""
-    return pd.concat([
-        get_goa_human_isoform_df(),
-        get_goa_human_isoform_df(),
-        get_goa_human_rna_df(),
-        get_goa_human_df(),
-    ])
+#: The URLs and local paths of the human GO annotation files
+GOA_SOURCES = [
+    (GO_HUMAN_COMPLEX_ANNOTATIONS_URL, GO_HUMAN_COMPLEX_ANNOTATIONS_PATH),
+    (GO_HUMAN_ISOFORM_ANNOTATIONS_URL, GO_HUMAN_ISOFORM_ANNOTATIONS_PATH),
+    (GO_HUMAN_RNA_ANNOTATIONS_URL, GO_HUMAN_RNA_ANNOTATIONS_PATH),
+    (GO_HUMAN_ANNOTATIONS_URL, GO_HUMAN_ANNOTATIONS_PATH),
+]
+
+#: A path to a GAF file, a directory of GAF files, or a pair of a URL and the path where it is downloaded
+GafSource = Union[str, Tuple[str, str]]
+
+
+def _download_gaf(url: Optional[str], path: str, force_download: bool = False) -> str:
+    if url is None:
+        return path
+    return make_downloader(url, path)(force_download=force_download)
+
+
+def _read_gaf_df(url: str, path: str, force_download: bool = False, **filters) -> pd.DataFrame:
+    """Download and read a GAF file into a dataframe through its columnar cache. Runs in a worker process."""
+    path = _download_gaf(url, path, force_download=force_download)
+    return read_gaf_df(path, **filters)
+
+
+def get_goa_all_df(force_download: bool = False,
+                   max_workers: Optional[int] = None,
+                   taxa: Optional[Iterable[str]] = None,
+                   evidence_codes: Optional[Iterable[str]] = None,
+                   aspects: Optional[Iterable[str]] = None,
+                   ) -> pd.DataFrame:
+    """Get all GO annotations as a dataframe with the columns of :class:`GafRecord` and the aspect as categoricals.
+
+    Each file is downloaded and loaded in its own worker process from its columnar cache, which is built the first
+    time the file is read. See :func:`bio2bel_go.gaf_cache.read_gaf_df` for the filters.
+
+    :param force_download: True to force download resources
+    :param max_workers: The number of worker processes. Defaults to one for each file.
+    :param taxa: NCBI taxonomy identifiers to keep
+    :param evidence_codes: Evidence codes to keep
+    :param aspects: Aspects (``P``, ``F``, ``C``) or GO namespaces to keep
+    """
+    filters = dict(taxa=taxa, evidence_codes=evidence_codes, aspects=aspects)
+    with ProcessPoolExecutor(max_workers=max_workers or len(GOA_SOURCES)) as executor:
+        futures = [
+            executor.submit(_read_gaf_df, url, path, force_download, **filters)
+            for url, path in GOA_SOURCES
+        ]
+        return concat_gaf_dfs([future.result() for future in futures])
+
+
+_goa_downloaders = [
+    make_downloader(url, path)
+    for url, path in GOA_SOURCES
+]
+
+
+def download_goa_all(force_download: bool = False) -> List[str]:
+    """Download all GO annotation files and return their paths."""
+    return [
+        download_goa(force_download=force_download)
+        for download_goa in _goa_downloaders
+    ]
+
+
+def get_gaf_sources(sources: Optional[Iterable[GafSource]] = None) -> List[Tuple[Optional[str], str]]:
+    """Get the URLs (or None for local files) and paths of GAF files.
+
+    :param sources: Paths to GAF files, directories whose ``.gaf`` and ``.gaf.gz`` files are all used, or pairs of a
+     URL (which can be a ``file://`` URL) and the path where it is downloaded. Defaults to :data:`GOA_SOURCES`.
+    """
+    if sources is None:
+        return list(GOA_SOURCES)
+
+    rv = []
+    for source in sources:
+        if isinstance(source, tuple):
+            rv.append(source)
+        elif os.path.isdir(source):
+            rv.extend(
+                (None, os.path.join(source, name))
+                for name in sorted(os.listdir(source))
+                if name.endswith(('.gaf', '.gaf.gz'))
+            )
+        else:
+            rv.append((None, source))
+    return rv
+
+
+def _cache_gaf(url: Optional[str], path: str, force_download: bool, cache_directory: str) -> str:
+    """Download a GAF file if needed and build its columnar cache. Runs in a worker process.
+
+    :return: The directory of the cached table, so only its path is sent back instead of the records
+    """
+    path = _download_gaf(url, path, force_download=force_download)
+    return cache_gaf_table(path, cache_directory=cache_directory)
+
+
+def _iter_table_records(table: GafTable, filters: Mapping[str, Optional[Iterable[str]]]) -> Iterable[GafRecord]:
+    """Iterate over the records of a table that match the filters."""
+    mask = table.get_mask(**filters) if any(value is not None for value in filters.values()) else None
+    return table.iter_records(mask)
+
+
+def _iter_serial(sources: Iterable[Tuple[Optional[str], str]],
+                 force_download: bool,
+                 cache_directory: str,
+                 filters: Mapping[str, Optional[Iterable[str]]],
+                 ) -> Iterable[GafRecord]:
+    for url, path in sources:
+        log.info('reading GAF %s', path)
+        path = _download_gaf(url, path, force_download=force_download)
+        yield from _iter_table_records(load_gaf_table(path, cache_directory=cache_directory), filters)
+
+
+def _iter_unique_batches(records: Iterable[GafRecord], batch_size: int) -> Iterable[List[GafRecord]]:
+    seen = set()
+    batch = []
+    for record in records:
+        digest = record.digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+class GafBatches:
+    """Batches of unique GAF records from several files, which are read through their columnar caches.
+
+    The workers that build the caches are started when this is made and stopped when it is closed, which is done on
+    leaving a ``with`` block, so they're stopped even if the batches are never iterated over.
+    """
+
+    def __init__(self,
+                 sources: List[Tuple[Optional[str], str]],
+                 batch_size: int = 10000,
+                 force_download: bool = False,
+                 max_workers: Optional[int] = None,
+                 cache_directory: Optional[str] = None,
+                 **filters: Optional[Iterable[str]]
+                 ) -> None:
+        """Start reading the files. See :func:`iter_gaf_batches` for the parameters."""
+        # Resolved here so the workers use the same directory as this process
+        cache_directory = cache_directory or GAF_CACHE_DIRECTORY
+
+        self._executor = None
+        self._futures: Dict[Future, str] = {}
+
+        if max_workers == 1:
+            records = _iter_serial(sources, force_download, cache_directory, filters)
+        else:
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers or max(1, min(len(sources), os.cpu_count() or 1)),
+            )
+            self._futures = {
+                self._executor.submit(_cache_gaf, url, path, force_download, cache_directory): path
+                for url, path in sources
+            }
+            records = self._iter_completed(filters)
+
+        self._batches = _iter_unique_batches(records, batch_size)
+
+    def _iter_completed(self, filters: Mapping[str, Optional[Iterable[str]]]) -> Iterable[GafRecord]:
+        """Iterate over the records of each file as soon as it's cached, reading its memory-mapped table."""
+        for future in as_completed(list(self._futures)):
+            path = self._futures.pop(future)
+            directory = future.result()
+            log.info('reading GAF %s from %s', path, directory)
+            table = GafTable.load(directory)
+            if table is None:
+                raise ValueError(f'the cached table of GAF {path} in {directory} was removed before it was loaded')
+            yield from _iter_table_records(table, filters)
+
+    def __iter__(self) -> Iterator[List[GafRecord]]:
+        return self._batches
+
+    def __enter__(self) -> 'GafBatches':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop reading the files.
+
+        Files that no worker has started on are skipped, and this waits for the workers that have started to finish
+        so that no worker process outlives this.
+        """
+        self._batches.close()
+        if self._executor is not None:
+            for future in self._futures:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def iter_gaf_batches(paths: Optional[Iterable[GafSource]] = None,
+                     batch_size: int = 10000,
+                     force_download: bool = False,
+                     max_workers: Optional[int] = None,
+                     cache_directory: Optional[str] = None,
+                     taxa: Optional[Iterable[str]] = None,
+                     evidence_codes: Optional[Iterable[str]] = None,
+                     aspects: Optional[Iterable[str]] = None,
+                     ) -> GafBatches:
+    """Iterate over batches of GAF records from several files, skipping duplicates across them.
+
+    Each file is read through its columnar cache from :func:`bio2bel_go.gaf_cache.cache_gaf_table`, so only files
+    that are new or changed since they were last read are decompressed and parsed. That is done in a worker process
+    for each file as soon as this function is called, so other work can be done before iterating. Workers only send
+    back the directory of each cached table. The records of each file are decoded from its memory-mapped table a
+    chunk at a time as soon as the file is cached, so neither the workers nor this process hold the records of a
+    whole file in memory. Duplicates are detected with the 8-byte digest of each record, so only the digests are
+    kept in memory.
+
+    Iterate over the result in a ``with`` block, or close it, to stop the workers.
+
+    :param paths: The sources of GAF files, as described by :func:`get_gaf_sources`. Defaults to all of the human GO
+     annotation files.
+    :param batch_size: The maximum number of records in each batch
+    :param force_download: True to force download resources
+    :param max_workers: The number of worker processes. Defaults to one for each file, up to the number of CPUs. If
+     1, files are read one after another in this process while iterating.
+    :param cache_directory: The directory where tables are cached. Defaults to
+     :data:`bio2bel_go.constants.GAF_CACHE_DIRECTORY`.
+    :param taxa: NCBI taxonomy identifiers to keep, optionally prefixed with ``taxon:``. Defaults to all.
+    :param evidence_codes: Evidence codes to keep. Defaults to all.
+    :param aspects: Aspects (``P``, ``F``, ``C``) or GO namespaces to keep. Defaults to all.
+    """
+    return GafBatches(get_gaf_sources(paths), batch_size=batch_size, force_download=force_download,
+                      max_workers=max_workers, cache_directory=cache_directory, taxa=taxa,
+                      evidence_codes=evidence_codes, aspects=aspects)
 
 
 def get_goa_human_complex_processed_(**kwargs):
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+"""Per-phase timing of :meth:`bio2bel_go.Manager.populate`.
+
+A :class:`PopulateReport` records a :class:`PhaseReport` for each phase, like parsing the OBO file or inserting the
+annotations. It records the wall time, the number of rows processed, the SQL statements executed, and the peak
+resident set size of the process at the end of the phase. Phases nest: the time spent in an inner phase, like building
+the rows that an insert consumes from a generator, is subtracted from the outer one. The phases therefore add up to
+the total time instead of counting it twice. SQL statements are counted with a ``before_cursor_execute`` listener on
+the engine. An ``executemany`` of a whole chunk counts as a single statement.
+"""
+
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'PhaseReport',
+    'PopulateReport',
+    'get_peak_rss',
+]
+
+
+def get_peak_rss() -> Optional[int]:
+    """Get the largest resident set size of this process so far in bytes, or None if it can't be measured."""
+    if resource is None:
+        return
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kibibytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else 1024 * peak
+
+
+class PhaseReport:
+    """The measurements of one phase."""
+
+    def __init__(self, name: str) -> None:
+        """Start an empty report.
+
+        :param name: The name of the phase, like ``insert_term_rows``
+        """
+        self.name = name
+        self.seconds = 0.0
+        self.rows = 0
+        self.statements = 0
+        self.peak_rss: Optional[int] = None
+
+    def __repr__(self):
+        return f'<PhaseReport {self.name}: {self.rows} rows in {self.seconds:.2f} seconds>'
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        """Get the throughput, or None if no time was measured."""
+        if self.seconds:
+            return self.rows / self.seconds
+
+    def to_json(self) -> Dict[str, Any]:
+        """Make a summary dictionary for the phase."""
+        return dict(
+            name=self.name,
+            seconds=self.seconds,
+            rows=self.rows,
+            rows_per_second=self.rows_per_second,
+            statements=self.statements,
+            peak_rss=self.peak_rss,
+        )
+
+
+class PopulateReport:
+    """The measurements of each phase of populating the database."""
+
+    def __init__(self, engine: Optional[Engine] = None) -> None:
+        """Start an empty report.
+
+        :param engine: The engine whose SQL statements are counted. If None, statements aren't counted.
+        """
+        self.engine = engine
+        self.phases: List[PhaseReport] = []
+        self._phases_by_name: Dict[str, PhaseReport] = {}
+
+        #: The time spent in nested phases for each phase that is running
+        self._nested_seconds: List[float] = []
+        #: The phases that are running, innermost last, which are the ones SQL statements are counted for
+        self._running: List[PhaseReport] = []
+
+    def __getitem__(self, name: str) -> PhaseReport:
+        return self._phases_by_name[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._phases_by_name
+
+    def _get_phase(self, name: str) -> PhaseReport:
+        """Get a phase by name, adding it if it hasn't been measured yet."""
+        phase = self._phases_by_name.get(name)
+        if phase is None:
+            phase = self._phases_by_name[name] = PhaseReport(name)
+            self.phases.append(phase)
+        return phase
+
+    def _count_statement(self, *_) -> None:
+        if self._running:
+            self._running[-1].statements += 1
+
+    @contextmanager
+    def _measure(self, phase: PhaseReport) -> Iterator[None]:
+        """Add the time spent in the block, minus the time spent in nested phases, to the phase."""
+        self._nested_seconds.append(0.0)
+        self._running.append(phase)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._running.pop()
+            phase.seconds += elapsed - self._nested_seconds.pop()
+            if self._nested_seconds:
+                self._nested_seconds[-1] += elapsed
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseReport]:
+        """Measure a phase, which can be given its number of rows in the block.
+
+        :param name: The name of the phase. Measuring a phase twice adds to it.
+        """
+        phase = self._get_phase(name)
+
+        listening = self.engine is not None and not self._running
+        if listening:
+            event.listen(self.engine, 'before_cursor_execute', self._count_statement)
+        try:
+            with self._measure(phase):
+                yield phase
+        finally:
+            phase.peak_rss = get_peak_rss()
+            if listening:
+                event.remove(self.engine, 'before_cursor_execute', self._count_statement)
+
+    def iter_phase(self,
+                   name: str,
+                   iterable: Iterable,
+                   count: Optional[Callable[[Any], int]] = None,
+                   ) -> Iterable:
+        """Iterate over the iterable, measuring the time spent getting each item as a phase.
+
+        This is how the work of a generator consumed by another phase is separated from it.
+
+        :param name: The name of the phase
+        :param iterable: An iterable
+        :param count: A function giving the number of rows in each item, like :func:`len` for batches. Defaults to
+         counting each item as one row.
+        """
+        return self._iter_phase(self._get_phase(name), iterable, count)
+
+    def _iter_phase(self, phase: PhaseReport, iterable: Iterable, count: Optional[Callable[[Any], int]]) -> Iterable:
+        iterator = iter(iterable)
+        while True:
+            with self._measure(phase):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    phase.peak_rss = get_peak_rss()
+                    return
+            phase.rows += 1 if count is None else count(item)
+            yield item
+
+    @property
+    def seconds(self) -> float:
+        """Get the total time of all phases."""
+        return sum(phase.seconds for phase in self.phases)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Make a summary dictionary of the phases and their totals."""
+        return dict(
+            seconds=self.seconds,
+            statements=sum(phase.statements for phase in self.phases),
+            peak_rss=get_peak_rss(),
+            phases=[phase.to_json() for phase in self.phases],
+        )
+
+    def dump(self, file: TextIO, indent: Optional[int] = 2) -> None:
+        """Write the summary as JSON."""
+        json.dump(self.to_json(), file, indent=indent)
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+
+"""A read-only service layer for answering GO lookups concurrently, like from a web application.
+
+The :class:`bio2bel_go.Manager` works through a single session, which can't be shared between threads, so every
+request behind it waits on the one before. A :class:`GOService` instead keeps a pool of connections and gives each
+thread its own session from a :class:`sqlalchemy.orm.scoped_session`. The session is removed at the end of each call,
+which rolls it back and returns its connection to the pool, so nothing is ever written and no state leaks between
+requests. Each method answers a whole batch of lookups with a few chunked queries and returns plain dictionaries that
+can be serialized to JSON.
+
+The asyncio extension isn't available in the versions of SQLAlchemy supported here, so :class:`AsyncGOService` runs
+the same methods as coroutines on a thread pool sized to the connection pool. :func:`get_blueprint` exposes them as a
+Flask blueprint that can be registered on the admin application made by
+:meth:`bio2bel_go.Manager.get_flask_admin_app`.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from bio2bel.utils import get_connection
+from .constants import MODULE_NAME, SQL_IN_CHUNKSIZE
+from .manager import GeneAnnotation, query_gene_annotations
+from .models import Annotation, Term
+from .traversal import query_reachable_pairs
+from .utils import iter_chunks, normalize_go_id
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'build_service_engine',
+    'GOService',
+    'AsyncGOService',
+    'get_blueprint',
+]
+
+#: The number of connections kept open in the pool
+DEFAULT_POOL_SIZE = 8
+
+#: The number of connections opened beyond the pool when all of its connections are in use
+DEFAULT_MAX_OVERFLOW = 8
+
+
+def build_service_engine(connection: str,
+                         pool_size: int = DEFAULT_POOL_SIZE,
+                         max_overflow: int = DEFAULT_MAX_OVERFLOW,
+                         ) -> Engine:
+    """Build an engine with a pool of connections that can be used from many threads.
+
+    SQLite connections are made usable across threads, and pooled instead of being reopened for every session. An
+    in-memory SQLite database only exists in a single connection, so it is shared by all threads.
+
+    :param connection: A database connection string
+    :param pool_size: The number of connections kept open in the pool
+    :param max_overflow: The number of connections opened beyond the pool when all of its connections are in use
+    """
+    if not connection.startswith('sqlite'):
+        return create_engine(connection, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+
+    connect_args = {'check_same_thread': False}
+    if connection in {'sqlite://', 'sqlite:///:memory:'}:
+        return create_engine(connection, connect_args=connect_args, poolclass=StaticPool)
+    return create_engine(
+        connection, connect_args=connect_args, poolclass=QueuePool, pool_size=pool_size, max_overflow=max_overflow,
+    )
+
+
+class GOService:
+    """Thread-safe, read-only, batched lookups on a populated GO database."""
+
+    def __init__(self, engine: Engine, chunksize: int = SQL_IN_CHUNKSIZE, dispose: bool = False) -> None:
+        """Build a service on an engine, which should have a pool of connections.
+
+        :param engine: A SQLAlchemy engine, like one made by :func:`build_service_engine`
+        :param chunksize: The largest number of identifiers in each ``IN`` query
+        :param dispose: If true, dispose of the engine when the service is closed
+        """
+        self.engine = engine
+        self.chunksize = chunksize
+        self._dispose = dispose
+        self.session_factory = scoped_session(sessionmaker(bind=engine, autoflush=False))
+
+    @classmethod
+    def from_connection(cls,
+                        connection: Optional[str] = None,
+                        pool_size: int = DEFAULT_POOL_SIZE,
+                        max_overflow: int = DEFAULT_MAX_OVERFLOW,
+                        **kwargs
+                        ) -> 'GOService':
+        """Build a service with its own pool of connections.
+
+        :param connection: A database connection string. Defaults to the one configured for Bio2BEL GO.
+        :param pool_size: The number of connections kept open in the pool
+        :param max_overflow: The number of connections opened beyond the pool when all of its connections are in use
+        :param kwargs: Keyword arguments passed to :class:`GOService`
+        """
+        engine = build_service_engine(
+            connection or get_connection(MODULE_NAME), pool_size=pool_size, max_overflow=max_overflow,
+        )
+        return cls(engine, dispose=True, **kwargs)
+
+    @contextmanager
+    def _get_session(self) -> Iterator[Session]:
+        """Get the session of the current thread, removing it afterwards so its connection goes back to the pool."""
+        try:
+            yield self.session_factory()
+        finally:
+            self.session_factory.remove()
+
+    def close(self) -> None:
+        """Remove the session of the current thread, and dispose of the engine if the service made it."""
+        self.session_factory.remove()
+        if self._dispose:
+            self.engine.dispose()
+
+    def get_terms(self, go_ids: Iterable[str]) -> Dict[str, Mapping[str, str]]:
+        """Get the summary dictionaries of the terms, made by :meth:`Term.to_json`.
+
+        :param go_ids: GO identifiers, with or without the ``GO:`` prefix. Missing terms are left out.
+        """
+        rv = {}
+        with self._get_session() as session:
+            for chunk in iter_chunks({normalize_go_id(go_id) for go_id in go_ids}, self.chunksize):
+                for term in session.query(Term).filter(Term.go_id.in_(chunk)):
+                    rv[term.go_id] = term.to_json()
+        return rv
+
+    def _get_reachable(self,
+                       go_ids: Iterable[str],
+                       ancestors: bool,
+                       relations: Optional[Iterable[str]],
+                       max_depth: Optional[int],
+                       ) -> Dict[str, List[str]]:
+        if relations is not None:
+            relations = list(relations)
+
+        rv = {}
+        with self._get_session() as session:
+            for chunk in iter_chunks({normalize_go_id(go_id) for go_id in go_ids}, self.chunksize):
+                for (go_id,) in session.query(Term.go_id).filter(Term.go_id.in_(chunk)):
+                    rv[go_id] = []
+
+                pairs = query_reachable_pairs(
+                    session, chunk, ancestors=ancestors, relations=relations, max_depth=max_depth,
+                )
+                for go_id, reached_go_id, _ in pairs:
+                    rv[go_id].append(reached_go_id)
+        return rv
+
+    def get_ancestors(self,
+                      go_ids: Iterable[str],
+                      relations: Optional[Iterable[str]] = None,
+                      max_depth: Optional[int] = None,
+                      ) -> Dict[str, List[str]]:
+        """Get the GO identifiers of the ancestors of each term, closest first, with one recursive query per chunk.
+
+        :param go_ids: GO identifiers. Missing terms are left out.
+        :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+        :param max_depth: The largest number of edges to walk. Defaults to no limit.
+        """
+        return self._get_reachable(go_ids, ancestors=True, relations=relations, max_depth=max_depth)
+
+    def get_descendants(self,
+                        go_ids: Iterable[str],
+                        relations: Optional[Iterable[str]] = None,
+                        max_depth: Optional[int] = None,
+                        ) -> Dict[str, List[str]]:
+        """Get the GO identifiers of the descendants of each term, closest first, with one recursive query per chunk.
+
+        :param go_ids: GO identifiers. Missing terms are left out.
+        :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+        :param max_depth: The largest number of edges to walk. Defaults to no limit.
+        """
+        return self._get_reachable(go_ids, ancestors=False, relations=relations, max_depth=max_depth)
+
+    def get_annotations(self,
+                        ids: Iterable[str],
+                        db: Optional[str] = 'UniProtKB',
+                        taxa: Optional[Iterable[str]] = None,
+                        evidence_codes: Optional[Iterable[str]] = None,
+                        aspects: Optional[Iterable[str]] = None,
+                        ) -> Dict[str, List[Mapping[str, Any]]]:
+        """Get the annotations of each gene as dictionaries with the fields of :class:`GeneAnnotation`.
+
+        See :meth:`bio2bel_go.Manager.iter_annotations_for_genes` for the parameters. Genes without annotations are
+        left out.
+        """
+        rv = {}
+        with self._get_session() as session:
+            query = query_gene_annotations(session, db=db, taxa=taxa, evidence_codes=evidence_codes, aspects=aspects)
+            for chunk in iter_chunks(set(ids), self.chunksize):
+                for row in query.filter(Annotation.db_id.in_(chunk)):
+                    annotation = GeneAnnotation(*row)
+                    rv.setdefault(annotation.db_id, []).append(annotation._asdict())
+        return rv
+
+
+class AsyncGOService:
+    """Coroutines for the lookups of a :class:`GOService`, run on a pool of threads."""
+
+    def __init__(self, service: GOService, max_workers: int = DEFAULT_POOL_SIZE) -> None:
+        """Wrap a service.
+
+        :param service: A service
+        :param max_workers: The number of threads, which should be at most the number of connections in the pool
+        """
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=__name__)
+
+    async def _run(self, method, *args, **kwargs):
+        # Each thread removes its own session after every call, so they can be reused by the next coroutine
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(method, *args, **kwargs))
+
+    async def get_terms(self, go_ids: Iterable[str]) -> Dict[str, Mapping[str, str]]:
+        """Get the summary dictionaries of the terms. See :meth:`GOService.get_terms`."""
+        return await self._run(self.service.get_terms, list(go_ids))
+
+    async def get_ancestors(self, go_ids: Iterable[str], **kwargs) -> Dict[str, List[str]]:
+        """Get the ancestors of each term. See :meth:`GOService.get_ancestors`."""
+        return await self._run(self.service.get_ancestors, list(go_ids), **kwargs)
+
+    async def get_descendants(self, go_ids: Iterable[str], **kwargs) -> Dict[str, List[str]]:
+        """Get the descendants of each term. See :meth:`GOService.get_descendants`."""
+        return await self._run(self.service.get_descendants, list(go_ids), **kwargs)
+
+    async def get_annotations(self, ids: Iterable[str], **kwargs) -> Dict[str, List[Mapping[str, Any]]]:
+        """Get the annotations of each gene. See :meth:`GOService.get_annotations`."""
+        return await self._run(self.service.get_annotations, list(ids), **kwargs)
+
+    def close(self) -> None:
+        """Wait for running lookups to finish and stop the threads."""
+        self.executor.shutdown(wait=True)
+
+
+def get_blueprint(service: GOService, name: str = 'go_service'):
+    """Build a Flask blueprint with batched JSON endpoints for the lookups of a service.
+
+    Each endpoint takes its lists as repeated query parameters, like ``/terms?go_id=GO:0008150&go_id=GO:0009987``, or
+    as a JSON object of lists in the body of a ``POST`` request:
+
+    - ``/terms`` takes ``go_id``
+    - ``/ancestors`` and ``/descendants`` take ``go_id``, ``relation``, and ``max_depth``
+    - ``/annotations`` takes ``id``, ``db``, ``taxon``, ``evidence_code``, and ``aspect``
+
+    :param service: A service
+    :param name: The name of the blueprint
+    :rtype: flask.Blueprint
+    """
+    from flask import Blueprint, jsonify, request
+
+    blueprint = Blueprint(name, __name__)
+
+    def _get_list(key: str) -> Optional[List[str]]:
+        if request.is_json:
+            values = (request.get_json(silent=True) or {}).get(key)
+        else:
+            values = request.args.getlist(key)
+        return values or None
+
+    def _get_value(key: str, default=None, value_type=None):
+        if request.is_json:
+            return (request.get_json(silent=True) or {}).get(key, default)
+        return request.args.get(key, default=default, type=value_type)
+
+    @blueprint.route('/terms', methods=['GET', 'POST'])
+    def terms():
+        """Get the terms with the given identifiers."""
+        return jsonify(service.get_terms(_get_list('go_id') or []))
+
+    @blueprint.route('/ancestors', methods=['GET', 'POST'])
+    def ancestors():
+        """Get the ancestors of the terms with the given identifiers."""
+        return jsonify(service.get_ancestors(
+            _get_list('go_id') or [],
+            relations=_get_list('relation'),
+            max_depth=_get_value('max_depth', value_type=int),
+        ))
+
+    @blueprint.route('/descendants', methods=['GET', 'POST'])
+    def descendants():
+        """Get the descendants of the terms with the given identifiers."""
+        return jsonify(service.get_descendants(
+            _get_list('go_id') or [],
+            relations=_get_list('relation'),
+            max_depth=_get_value('max_depth', value_type=int),
+        ))
+
+    @blueprint.route('/annotations', methods=['GET', 'POST'])
+    def annotations():
+        """Get the annotations of the genes with the given identifiers."""
+        return jsonify(service.get_annotations(
+            _get_list('id') or [],
+            db=_get_value('db', 'UniProtKB'),
+            taxa=_get_list('taxon'),
+            evidence_codes=_get_list('evidence_code'),
+            aspects=_get_list('aspect'),
+        ))
+
+    return blueprint
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+
+"""Semantic similarity between GO terms and between genes.
+
+The information content (IC) of a term is the negative logarithm of the fraction of the genes annotated in its
+namespace that are annotated to it or any of its descendants. It's computed once from the annotations propagated
+along the true-path relations and cached on disk for each GO release. On top of it, :class:`SemanticSimilarity`
+computes whole matrices at once:
+
+- Resnik: the IC of the most informative common ancestor (MICA)
+- Lin: the IC of the MICA relative to the IC of both terms
+- Wang: the overlap of the weighted ancestor graphs of both terms, which only uses the hierarchy
+
+and scores pairs of genes by the best-match average (BMA) of the similarities between their terms.
+"""
+
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .constants import IC_CACHE_DIRECTORY, TRUE_PATH_RELATIONS
+from .ontology import CSR, Ontology, gather
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'WANG_WEIGHTS',
+    'SIMILARITY_METHODS',
+    'compute_information_content',
+    'get_information_content_path',
+    'save_information_content',
+    'load_information_content',
+    'SemanticSimilarity',
+]
+
+#: The weights of the relations for the semantic values in Wang's method
+WANG_WEIGHTS = {'is_a': 0.8, 'part_of': 0.6}
+
+#: The names of the term similarity methods
+SIMILARITY_METHODS = ('resnik', 'lin', 'wang')
+
+
+def compute_information_content(ontology: Ontology, term_sizes: np.ndarray) -> np.ndarray:
+    """Compute the information content of each term.
+
+    :param ontology: An ontology
+    :param term_sizes: The number of genes annotated to each term or any of its descendants, like
+     :attr:`bio2bel_go.enrichment.AnnotationMatrix.term_sizes`
+    :return: The IC of each term, which is NaN for terms without annotations
+    """
+    term_sizes = np.asarray(term_sizes, dtype=float)
+    namespaces = np.array(ontology.namespaces, dtype=object)
+
+    # The root of each namespace has every gene annotated in it, so it has the largest count
+    totals = np.zeros(len(ontology))
+    for namespace in set(ontology.namespaces):
+        mask = namespaces == namespace
+        totals[mask] = term_sizes[mask].max()
+
+    rv = np.full(len(ontology), np.nan)
+    annotated = term_sizes > 0
+    rv[annotated] = -np.log(term_sizes[annotated] / totals[annotated])
+    return rv
+
+
+def get_information_content_path(release: str,
+                                 annotations: str,
+                                 relations: Sequence[str] = TRUE_PATH_RELATIONS,
+                                 directory: Optional[str] = None,
+                                 ) -> str:
+    """Get the path of the cached information content for a GO release.
+
+    :param release: The ``data-version`` of the release, like ``releases/2018-01-08``
+    :param annotations: A fingerprint of the annotations the information content was computed from, since they can
+     change without a new GO release
+    :param relations: The relations the annotations were propagated along
+    :param directory: The directory where information content is cached. Defaults to :data:`IC_CACHE_DIRECTORY`.
+    """
+    name = re.sub(r'[^\w.-]', '_', f'{release}.{annotations}')
+    return os.path.join(directory or IC_CACHE_DIRECTORY, f'{name}.{"-".join(relations)}.npz')
+
+
+def save_information_content(path: str, ontology: Ontology, information_content: np.ndarray) -> None:
+    """Save the information content of each term with the GO identifiers it's addressed by."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp.npz'
+    np.savez(tmp_path, go_ids=np.array(ontology.go_ids, dtype=str), information_content=information_content)
+    os.replace(tmp_path, path)
+
+
+def load_information_content(path: str, ontology: Ontology) -> Optional[np.ndarray]:
+    """Load the information content saved with :func:`save_information_content`.
+
+    :return: The IC of each term, or None if the file doesn't exist or was saved for different terms
+    """
+    if not os.path.exists(path):
+        return
+
+    with np.load(path) as data:
+        if data['go_ids'].tolist() != list(ontology.go_ids):
+            log.info('information content at %s has different terms', path)
+            return
+        return data['information_content']
+
+
+class SemanticSimilarity:
+    """Computes the semantic similarity between terms and between genes."""
+
+    def __init__(self,
+                 ontology: Ontology,
+                 information_content: np.ndarray,
+                 relations: Sequence[str] = TRUE_PATH_RELATIONS,
+                 ) -> None:
+        """Prepare to compute similarities.
+
+        :param ontology: An ontology
+        :param information_content: The IC of each term, from :func:`compute_information_content`
+        :param relations: The relations the ancestors of terms are found along
+        """
+        self.ontology = ontology
+        self.information_content = np.asarray(information_content, dtype=float)
+        self.relations = list(relations)
+
+        self.closure = ontology.get_ancestor_closure(relations=self.relations)
+        self._wang_closure: Optional[Tuple[np.ndarray, CSR]] = None
+        self._semantic_values: Dict[int, Dict[int, float]] = {}
+
+    def get_indices(self, go_ids: Sequence[str]) -> np.ndarray:
+        """Get the indices of the terms, raising a :class:`KeyError` for missing ones."""
+        rv = np.empty(len(go_ids), dtype=np.int32)
+        for position, go_id in enumerate(go_ids):
+            index = self.ontology.get_index(go_id)
+            if index is None:
+                raise KeyError(go_id)
+            rv[position] = index
+        return rv
+
+    def _get_ancestor_pairs(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Get parallel arrays of positions in ``indices`` and each of their ancestors, including themselves."""
+        indptr, _ = self.closure
+        positions = np.arange(len(indices))
+        return (
+            np.concatenate([positions, np.repeat(positions, np.diff(indptr)[indices])]),
+            np.concatenate([indices, gather(self.closure, indices)]),
+        )
+
+    def resnik(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Get the matrix of the IC of the MICA of each pair of terms, or 0 for terms without common ancestors.
+
+        The IC of each common ancestor is written to all pairs of terms that share it, in increasing order, so each
+        pair ends up with the largest one.
+
+        :param rows: The indices of the terms for the rows
+        :param columns: The indices of the terms for the columns
+        """
+        row_positions, row_ancestors = self._get_ancestor_pairs(rows)
+        column_positions, column_ancestors = self._get_ancestor_pairs(columns)
+
+        common = np.intersect1d(row_ancestors, column_ancestors)
+        information_content = self.information_content[common]
+        informative = information_content > 0
+        common, information_content = common[informative], information_content[informative]
+
+        row_groups = _group_by_ancestor(row_ancestors, common)
+        column_groups = _group_by_ancestor(column_ancestors, common)
+
+        rv = np.zeros((len(rows), len(columns)))
+        for i in np.argsort(information_content, kind='stable').tolist():
+            rv[np.ix_(row_positions[row_groups[i]], column_positions[column_groups[i]])] = information_content[i]
+        return rv
+
+    def lin(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Get the matrix of Lin's similarity, which is twice the IC of the MICA over the sum of the terms' IC.
+
+        Pairs of terms that both have no information content, like a root with itself, have a similarity of 1 if
+        they're the same term and 0 otherwise. Pairs with a term without annotations are NaN.
+
+        :param rows: The indices of the terms for the rows
+        :param columns: The indices of the terms for the columns
+        """
+        denominator = self.information_content[rows][:, None] + self.information_content[columns][None, :]
+        rv = np.where(rows[:, None] == columns[None, :], 1.0, 0.0)
+        np.divide(2 * self.resnik(rows, columns), denominator, out=rv, where=denominator > 0)
+        rv[np.isnan(denominator)] = np.nan
+        return rv
+
+    def _get_wang_closure(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the ranks of the terms in a topological order and their ancestors along the relations with weights."""
+        if self._wang_closure is None:
+            relations = list(WANG_WEIGHTS)
+            order = self.ontology.get_topological_order(relations=relations)
+            ranks = np.empty(len(order), dtype=np.int64)
+            ranks[order] = np.arange(len(order))
+            self._wang_closure = ranks, self.ontology.get_ancestor_closure(relations=relations)
+        return self._wang_closure
+
+    def get_semantic_values(self, index: int) -> Dict[int, float]:
+        """Get the S-values of a term and its ancestors for Wang's method.
+
+        The S-value of the term is 1 and the S-value of each ancestor is the largest product of the weights of the
+        relations along a path to it. The ancestors are relaxed from the term upwards in topological order.
+        """
+        rv = self._semantic_values.get(index)
+        if rv is not None:
+            return rv
+
+        ranks, (indptr, indices) = self._get_wang_closure()
+        parents = [(self.ontology.parents[relation], weight) for relation, weight in WANG_WEIGHTS.items()
+                   if relation in self.ontology.parents]
+
+        rv = {index: 1.0}
+        ancestors = indices[indptr[index]:indptr[index + 1]]
+        for term in [index, *ancestors[np.argsort(-ranks[ancestors])].tolist()]:
+            value = rv[term]
+            for (indptr, indices), weight in parents:
+                for parent in indices[indptr[term]:indptr[term + 1]].tolist():
+                    if rv.get(parent, 0.0) < weight * value:
+                        rv[parent] = weight * value
+
+        self._semantic_values[index] = rv
+        return rv
+
+    def _get_semantic_value_pairs(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get parallel arrays of the positions of the terms, their ancestors (themselves included), and S-values."""
+        positions, ancestors, values = [], [], []
+        for position, index in enumerate(indices.tolist()):
+            semantic_values = self.get_semantic_values(index)
+            positions.extend([position] * len(semantic_values))
+            ancestors.extend(semantic_values)
+            values.extend(semantic_values.values())
+        return np.array(positions, dtype=np.int64), np.array(ancestors, dtype=np.int64), np.array(values)
+
+    def wang(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Get the matrix of Wang's similarity between each pair of terms.
+
+        The similarity is the sum of the S-values of the common ancestors of both terms over the sum of all of their
+        S-values. Like for :meth:`resnik`, the S-values of each common ancestor are added to all pairs of terms that
+        share it at once.
+
+        :param rows: The indices of the terms for the rows
+        :param columns: The indices of the terms for the columns
+        """
+        row_positions, row_ancestors, row_values = self._get_semantic_value_pairs(rows)
+        column_positions, column_ancestors, column_values = self._get_semantic_value_pairs(columns)
+
+        common = np.intersect1d(row_ancestors, column_ancestors)
+        row_groups = _group_by_ancestor(row_ancestors, common)
+        column_groups = _group_by_ancestor(column_ancestors, common)
+
+        numerator = np.zeros((len(rows), len(columns)))
+        for row_group, column_group in zip(row_groups, column_groups):
+            numerator[np.ix_(row_positions[row_group], column_positions[column_group])] += (
+                row_values[row_group][:, None] + column_values[column_group][None, :]
+            )
+
+        row_totals = np.bincount(row_positions, weights=row_values, minlength=len(rows))
+        column_totals = np.bincount(column_positions, weights=column_values, minlength=len(columns))
+        rv = numerator / (row_totals[:, None] + column_totals[None, :])
+
+        # The sums are accumulated in a different order than the totals, so a term is made exactly similar to itself
+        rv[rows[:, None] == columns[None, :]] = 1.0
+        return rv
+
+    def term_similarity(self,
+                        go_ids: Sequence[str],
+                        other_go_ids: Optional[Sequence[str]] = None,
+                        method: str = 'lin',
+                        ) -> np.ndarray:
+        """Get the matrix of similarities between two lists of terms.
+
+        :param go_ids: The GO identifiers of the terms for the rows
+        :param other_go_ids: The GO identifiers of the terms for the columns. Defaults to ``go_ids``.
+        :param method: One of :data:`SIMILARITY_METHODS`
+        :raises KeyError: If any term is missing from the ontology
+        """
+        rows = self.get_indices(go_ids)
+        columns = rows if other_go_ids is None else self.get_indices(other_go_ids)
+        return self._get_method(method)(rows, columns)
+
+    def _get_method(self, method: str):
+        if method not in SIMILARITY_METHODS:
+            raise ValueError(f'invalid method: {method}. Use one of {SIMILARITY_METHODS}')
+        return getattr(self, method)
+
+    def gene_similarity(self,
+                        gene_terms: Sequence[Sequence[str]],
+                        other_gene_terms: Optional[Sequence[Sequence[str]]] = None,
+                        method: str = 'lin',
+                        ) -> np.ndarray:
+        """Get the matrix of best-match average similarities between two lists of genes.
+
+        For each pair of genes, each term of one gene is matched with the most similar term of the other, and the
+        average over the terms of both genes is taken. The similarities between all terms of all genes are computed
+        in one matrix, then the best matches and averages for all pairs are taken with
+        :func:`numpy.ufunc.reduceat`.
+
+        :param gene_terms: The GO identifiers of the terms of each gene for the rows
+        :param other_gene_terms: The GO identifiers of the terms of each gene for the columns. Defaults to
+         ``gene_terms``.
+        :param method: One of :data:`SIMILARITY_METHODS`
+        :return: The similarities, which are NaN for genes without terms
+        """
+        method = self._get_method(method)
+        rows = _GeneTerms(self, gene_terms)
+        columns = rows if other_gene_terms is None else _GeneTerms(self, other_gene_terms)
+
+        rv = np.full((len(rows.lengths), len(columns.lengths)), np.nan)
+        if not len(rows.terms) or not len(columns.terms):
+            return rv
+
+        similarities = method(rows.terms, columns.terms)
+
+        # The best match of each term in the rows with each gene in the columns, and the other way around
+        row_best = np.maximum.reduceat(similarities[:, columns.indices], columns.starts, axis=1)
+        column_best = np.maximum.reduceat(similarities[rows.indices, :], rows.starts, axis=0)
+
+        row_means = np.add.reduceat(row_best[rows.indices], rows.starts, axis=0) / rows.nonempty_lengths[:, None]
+        column_means = np.add.reduceat(column_best[:, columns.indices], columns.starts, axis=1)
+        column_means /= columns.nonempty_lengths[None, :]
+
+        rv[np.ix_(rows.nonempty, columns.nonempty)] = (row_means + column_means) / 2
+        return rv
+
+
+def _group_by_ancestor(ancestors: np.ndarray, common: np.ndarray) -> List[np.ndarray]:
+    """Get the positions in ``ancestors`` of each of the common ancestors."""
+    order = np.argsort(ancestors, kind='stable')
+    ancestors = ancestors[order]
+    starts = np.searchsorted(ancestors, common, side='left').tolist()
+    ends = np.searchsorted(ancestors, common, side='right').tolist()
+    return [order[start:end] for start, end in zip(starts, ends)]
+
+
+class _GeneTerms:
+    """The distinct terms of a list of genes, and the positions of each gene's terms among them."""
+
+    def __init__(self, similarity: SemanticSimilarity, gene_terms: Sequence[Sequence[str]]) -> None:
+        gene_indices: List[np.ndarray] = [
+            np.unique(similarity.get_indices([go_id for go_id in go_ids if go_id in similarity.ontology]))
+            for go_ids in gene_terms
+        ]
+        self.lengths = np.array([len(indices) for indices in gene_indices], dtype=np.int64)
+        self.nonempty = np.flatnonzero(self.lengths)
+        self.nonempty_lengths = self.lengths[self.nonempty]
+
+        concatenated = np.concatenate(gene_indices) if gene_indices else np.zeros(0, dtype=np.int32)
+        self.terms, self.indices = np.unique(concatenated, return_inverse=True)
+
+        # The offsets of the terms of each gene with terms, since reduceat can't handle empty groups
+        self.starts = np.zeros(len(self.nonempty), dtype=np.int64)
+        np.cumsum(self.nonempty_lengths[:-1], out=self.starts[1:])
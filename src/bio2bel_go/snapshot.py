@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+
+"""A compact, columnar snapshot of a parsed GO OBO file.
+
+A snapshot is a directory of NumPy arrays that are memory-mapped when loaded:
+
+- string tables (UTF-8 bytes and offsets) for the identifiers, names, definitions, and synonyms of the terms
+- the namespace of each term as a small integer code
+- compressed sparse rows (CSR) from each term to its parents for each relation type (``is_a``, ``part_of``, etc.)
+
+as well as a ``meta.json`` file with the OBO header, including the ``data-version`` the snapshot was built from.
+Only the parts of each stanza used by Bio2BEL GO are kept.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from .ontology import build_csr
+from .utils import replace_directory
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'SNAPSHOT_FORMAT_VERSION',
+    'StringTable',
+    'OntologySnapshot',
+    'write_snapshot',
+    'read_snapshot',
+    'get_obo_data_version',
+]
+
+#: The version of the snapshot layout. Snapshots with a different version are rebuilt. Version 2 stores the indptr
+#: arrays of the edges as int32, like :func:`bio2bel_go.ontology.build_csr`.
+SNAPSHOT_FORMAT_VERSION = 2
+
+_META = 'meta.json'
+
+
+def get_obo_data_version(path: str) -> Optional[str]:
+    """Get the ``data-version`` from the header of an OBO file without parsing the rest of it."""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.startswith('['):
+                return
+            if line.startswith('data-version:'):
+                return line[len('data-version:'):].strip()
+
+
+class StringTable:
+    """A sequence of strings stored as concatenated UTF-8 bytes and the offsets between them."""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray) -> None:
+        """Wrap the arrays of a string table.
+
+        :param offsets: An array of ``n + 1`` offsets into ``data``
+        :param data: An array of bytes
+        """
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> 'StringTable':
+        """Build a string table."""
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        data = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield data[start:end].decode('utf-8')
+
+    def save(self, directory: str, name: str) -> None:
+        """Save the table as two arrays in the directory."""
+        np.save(os.path.join(directory, f'{name}.offsets.npy'), self.offsets)
+        np.save(os.path.join(directory, f'{name}.data.npy'), self.data)
+
+    @classmethod
+    def load(cls, directory: str, name: str, mmap_mode: Optional[str] = 'r') -> 'StringTable':
+        """Load a table saved with :meth:`save`."""
+        return cls(
+            np.load(os.path.join(directory, f'{name}.offsets.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, f'{name}.data.npy'), mmap_mode=mmap_mode),
+        )
+
+
+class OntologySnapshot:
+    """The arrays of a GO snapshot."""
+
+    def __init__(self,
+                 header: Mapping[str, Any],
+                 go_ids: StringTable,
+                 names: StringTable,
+                 definitions: StringTable,
+                 namespaces: List[str],
+                 namespace_codes: np.ndarray,
+                 synonym_indptr: np.ndarray,
+                 synonyms: StringTable,
+                 edges: Mapping[str, Tuple[np.ndarray, np.ndarray]],
+                 ) -> None:
+        """Wrap the arrays of a snapshot.
+
+        :param header: The OBO header
+        :param go_ids: The GO identifier of each term
+        :param names: The name of each term
+        :param definitions: The definition of each term, or an empty string if it has none
+        :param namespaces: The namespaces, addressed by ``namespace_codes``
+        :param namespace_codes: The position of each term's namespace in ``namespaces``
+        :param synonym_indptr: The offsets of each term's synonyms in ``synonyms``
+        :param synonyms: The synonyms of all terms
+        :param edges: A dictionary from relation types to the CSR arrays (indptr, indices) from terms to their parents
+        """
+        self.header = dict(header)
+        self.go_ids = go_ids
+        self.names = names
+        self.definitions = definitions
+        self.namespaces = namespaces
+        self.namespace_codes = namespace_codes
+        self.synonym_indptr = synonym_indptr
+        self.synonyms = synonyms
+        self.edges = dict(edges)
+
+    @property
+    def data_version(self) -> Optional[str]:
+        """Get the ``data-version`` of the OBO file this snapshot was built from."""
+        return self.header.get('data-version')
+
+    def __len__(self) -> int:
+        return len(self.go_ids)
+
+    def number_of_edges(self) -> int:
+        """Count the edges across all relation types."""
+        return sum(len(indices) for _, indices in self.edges.values())
+
+    def get_synonyms(self, i: int) -> List[str]:
+        """Get the synonyms of the term at the given position."""
+        return [self.synonyms[j] for j in range(self.synonym_indptr[i], self.synonym_indptr[i + 1])]
+
+    def iter_edges(self) -> Iterable[Tuple[int, int, str]]:
+        """Iterate over (child, parent, relation) triples of term positions."""
+        for relation, (indptr, indices) in self.edges.items():
+            counts = np.diff(indptr)
+            children = np.repeat(np.arange(len(counts)), counts)
+            for child, parent in zip(children.tolist(), indices.tolist()):
+                yield child, parent, relation
+
+    def to_graph(self) -> nx.MultiDiGraph:
+        """Rebuild a :class:`networkx.MultiDiGraph` like the one made by :func:`obonet.read_obo`.
+
+        Nodes only have the ``name``, ``namespace``, ``def``, and ``synonym`` attributes.
+        """
+        graph = nx.MultiDiGraph(**self.header)
+
+        go_ids = list(self.go_ids)
+        synonym_indptr = self.synonym_indptr.tolist()
+        synonyms = list(self.synonyms)
+        for i, (go_id, name, definition, code) in enumerate(zip(go_ids, self.names, self.definitions,
+                                                                self.namespace_codes.tolist())):
+            data = dict(name=name, namespace=self.namespaces[code])
+            if definition:
+                data['def'] = definition
+            if synonym_indptr[i] < synonym_indptr[i + 1]:
+                data['synonym'] = synonyms[synonym_indptr[i]:synonym_indptr[i + 1]]
+            graph.add_node(go_id, **data)
+
+        graph.add_edges_from(
+            (go_ids[child], go_ids[parent], relation)
+            for child, parent, relation in self.iter_edges()
+        )
+
+        return graph
+
+
+def write_snapshot(graph: nx.MultiDiGraph, directory: str) -> None:
+    """Write a snapshot of a graph made by :func:`obonet.read_obo`.
+
+    The snapshot is written to a temporary directory first, then moved to the given directory, replacing it if it
+    already exists.
+    """
+    go_ids = list(graph)
+    positions = {go_id: i for i, go_id in enumerate(go_ids)}
+
+    namespaces = sorted({data['namespace'] for _, data in graph.nodes(data=True)})
+    namespace_positions = {namespace: i for i, namespace in enumerate(namespaces)}
+
+    synonym_lists = [graph.nodes[go_id].get('synonym', []) for go_id in go_ids]
+    synonym_indptr = np.zeros(len(go_ids) + 1, dtype=np.int64)
+    np.cumsum([len(synonyms) for synonyms in synonym_lists], out=synonym_indptr[1:])
+
+    edge_lists: Dict[str, Tuple[List[int], List[int]]] = {}
+    for child, parent, relation in graph.edges(keys=True):
+        rows, columns = edge_lists.setdefault(relation, ([], []))
+        rows.append(positions[child])
+        columns.append(positions[parent])
+
+    with replace_directory(directory) as tmp_directory:
+        StringTable.from_strings(go_ids).save(tmp_directory, 'go_ids')
+        StringTable.from_strings(graph.nodes[go_id]['name'] for go_id in go_ids).save(tmp_directory, 'names')
+        StringTable.from_strings(graph.nodes[go_id].get('def', '') for go_id in go_ids).save(tmp_directory, 'definitions')
+        StringTable.from_strings(s for synonyms in synonym_lists for s in synonyms).save(tmp_directory, 'synonyms')
+        np.save(os.path.join(tmp_directory, 'synonym_indptr.npy'), synonym_indptr)
+        np.save(
+            os.path.join(tmp_directory, 'namespace_codes.npy'),
+            np.array([namespace_positions[graph.nodes[go_id]['namespace']] for go_id in go_ids], dtype=np.uint8),
+        )
+
+        for relation, (rows, columns) in edge_lists.items():
+            indptr, indices = build_csr(len(go_ids), rows, columns)
+            np.save(os.path.join(tmp_directory, f'edges.{relation}.indptr.npy'), indptr)
+            np.save(os.path.join(tmp_directory, f'edges.{relation}.indices.npy'), indices)
+
+        with open(os.path.join(tmp_directory, _META), 'w') as file:
+            json.dump(
+                {
+                    'format_version': SNAPSHOT_FORMAT_VERSION,
+                    'header': graph.graph,
+                    'namespaces': namespaces,
+                    'relations': sorted(edge_lists),
+                },
+                file,
+                default=str,
+            )
+
+    log.info('wrote snapshot of %d terms to %s', len(go_ids), directory)
+
+
+def read_snapshot(directory: str, mmap_mode: Optional[str] = 'r') -> Optional[OntologySnapshot]:
+    """Read a snapshot with its arrays memory-mapped.
+
+    :param directory: The directory written by :func:`write_snapshot`
+    :param mmap_mode: The mode passed to :func:`numpy.load`. Use None to read the arrays into memory.
+    :return: The snapshot, or None if the directory doesn't exist or has a different format version
+    """
+    meta_path = os.path.join(directory, _META)
+    if not os.path.exists(meta_path):
+        return
+
+    with open(meta_path) as file:
+        meta = json.load(file)
+
+    if meta.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        log.info('snapshot at %s has an outdated format', directory)
+        return
+
+    def _load(name: str) -> np.ndarray:
+        return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+
+    return OntologySnapshot(
+        header=meta['header'],
+        go_ids=StringTable.load(directory, 'go_ids', mmap_mode=mmap_mode),
+        names=StringTable.load(directory, 'names', mmap_mode=mmap_mode),
+        definitions=StringTable.load(directory, 'definitions', mmap_mode=mmap_mode),
+        namespaces=meta['namespaces'],
+        namespace_codes=_load('namespace_codes'),
+        synonym_indptr=_load('synonym_indptr'),
+        synonyms=StringTable.load(directory, 'synonyms', mmap_mode=mmap_mode),
+        edges={
+            relation: (_load(f'edges.{relation}.indptr'), _load(f'edges.{relation}.indices'))
+            for relation in meta['relations']
+        },
+    )
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+"""Deterministic synthetic GO ontologies and annotations, for benchmarking at any scale without downloads.
+
+The terms of a synthetic ontology are split between the three GO namespaces. Each term has an ``is_a`` parent that
+was made before it in the same namespace, so the hierarchy is a directed acyclic graph. Parents are drawn with a bias
+toward early terms, which gives GO's shape of a few broad terms near the roots and many specific leaves. Some terms
+also get a ``part_of`` or ``regulates`` parent, and a synonym. The real roots, ``protein-containing complex``, and
+their identifiers are kept, so code that looks for them works as usual.
+
+Annotations are written as GAF 2.1 in blocks that are generated with NumPy, so millions of lines are written in
+seconds. The same seed always gives the same files.
+"""
+
+import gzip
+import logging
+import os
+from typing import Iterable, List, NamedTuple, Optional, TextIO, Tuple
+
+import numpy as np
+
+from .constants import GO_ASPECTS, GO_BIOLOGICAL_PROCESS, GO_CELLULAR_COMPONENT, GO_COMPLEX_ID, GO_MOLECULAR_FUNCTION
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'SyntheticTerm',
+    'generate_synthetic_terms',
+    'write_synthetic_obo',
+    'write_synthetic_gaf',
+    'write_synthetic_files',
+]
+
+#: The data-version written in the header of synthetic OBO files
+SYNTHETIC_DATA_VERSION = 'releases/synthetic'
+
+#: The roots of each namespace, which come before all synthetic terms
+ROOTS = [
+    ('GO:0008150', 'biological_process', GO_BIOLOGICAL_PROCESS),
+    ('GO:0003674', 'molecular_function', GO_MOLECULAR_FUNCTION),
+    ('GO:0005575', 'cellular_component', GO_CELLULAR_COMPONENT),
+]
+
+#: The share of synthetic terms in each namespace, which is about the same as in GO
+NAMESPACE_WEIGHTS = {
+    GO_BIOLOGICAL_PROCESS: 0.62,
+    GO_MOLECULAR_FUNCTION: 0.26,
+    GO_CELLULAR_COMPONENT: 0.12,
+}
+
+#: The first number of synthetic GO identifiers, far from the real ones kept for the roots
+_FIRST_ID = 9000000
+
+_EVIDENCE_CODES = np.array(['IDA', 'IMP', 'IPI', 'IEA', 'ISS', 'TAS', 'IBA'])
+_EVIDENCE_WEIGHTS = np.array([0.15, 0.1, 0.1, 0.4, 0.1, 0.05, 0.1])
+
+#: The database and identifier prefix, and the type, of proteins and of complexes
+_GENE_PRODUCTS = {False: 'UniProtKB\tS', True: 'ComplexPortal\tCPX-'}
+_GENE_PRODUCT_TYPES = {False: 'protein', True: 'protein_complex'}
+
+_GAF_HEADER = '!gaf-version: 2.1\n!generated-by: bio2bel_go.synthetic\n'
+
+#: The number of annotations generated at once
+_BLOCK_SIZE = 100000
+
+
+class SyntheticTerm(NamedTuple):
+    """A term of a synthetic ontology."""
+
+    go_id: str
+    name: str
+    namespace: str
+    #: (relation, GO identifier) pairs of the parents of the term
+    parents: List[Tuple[str, str]]
+    synonym: Optional[str] = None
+
+
+def _draw_parent(rng: np.random.Generator, candidates: List[str]) -> str:
+    """Draw one of the candidates, favoring the earlier ones."""
+    return candidates[int(len(candidates) * rng.random() ** 2)]
+
+
+def generate_synthetic_terms(terms: int, seed: int = 0) -> List[SyntheticTerm]:
+    """Generate the terms of a synthetic ontology, with parents always before children.
+
+    :param terms: The number of synthetic terms, besides the roots and ``protein-containing complex``
+    :param seed: The seed of the random number generator
+    """
+    rng = np.random.default_rng(seed)
+
+    rv = [SyntheticTerm(go_id, name, namespace, []) for go_id, name, namespace in ROOTS]
+    rv.append(SyntheticTerm(GO_COMPLEX_ID, 'protein-containing complex', GO_CELLULAR_COMPONENT, [
+        ('is_a', 'GO:0005575'),
+    ]))
+
+    candidates = {namespace: [go_id] for go_id, _, namespace in ROOTS}
+    candidates[GO_CELLULAR_COMPONENT].append(GO_COMPLEX_ID)
+
+    namespaces = list(NAMESPACE_WEIGHTS)
+    codes = rng.choice(len(namespaces), size=terms, p=list(NAMESPACE_WEIGHTS.values()))
+
+    for i, code in enumerate(codes.tolist()):
+        namespace = namespaces[code]
+        go_id = f'GO:{_FIRST_ID + i:07d}'
+        parents = [('is_a', _draw_parent(rng, candidates[namespace]))]
+
+        if namespace != GO_MOLECULAR_FUNCTION and rng.random() < 0.3:
+            parent = _draw_parent(rng, candidates[namespace])
+            if parent != parents[0][1]:
+                parents.append(('part_of', parent))
+        if namespace == GO_BIOLOGICAL_PROCESS and rng.random() < 0.05:
+            parent = _draw_parent(rng, candidates[namespace])
+            if all(parent != other for _, other in parents):
+                parents.append(('regulates', parent))
+
+        synonym = f'synthetic {namespace.replace("_", " ")} {i}' if rng.random() < 0.3 else None
+        rv.append(SyntheticTerm(go_id, f'synthetic term {i}', namespace, parents, synonym))
+        candidates[namespace].append(go_id)
+
+    return rv
+
+
+def _open(path: str) -> TextIO:
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=1)
+    return open(path, 'w', encoding='utf-8')
+
+
+def write_synthetic_obo(path: str, terms: Iterable[SyntheticTerm]) -> None:
+    """Write the terms of a synthetic ontology as an OBO file."""
+    with open(path, 'w', encoding='utf-8') as file:
+        print('format-version: 1.2', file=file)
+        print(f'data-version: {SYNTHETIC_DATA_VERSION}', file=file)
+        print('ontology: go', file=file)
+
+        for term in terms:
+            print('\n[Term]', file=file)
+            print(f'id: {term.go_id}', file=file)
+            print(f'name: {term.name}', file=file)
+            print(f'namespace: {term.namespace}', file=file)
+            print(f'def: "A synthetic {term.namespace.replace("_", " ")} term." [GOC:synthetic]', file=file)
+            if term.synonym is not None:
+                print(f'synonym: "{term.synonym}" EXACT []', file=file)
+            for relation, parent in term.parents:
+                if relation == 'is_a':
+                    print(f'is_a: {parent}', file=file)
+                else:
+                    print(f'relationship: {relation} {parent}', file=file)
+
+
+def write_synthetic_gaf(path: str,
+                        terms: List[SyntheticTerm],
+                        annotations: int,
+                        genes: Optional[int] = None,
+                        seed: int = 0,
+                        ) -> None:
+    """Write random annotations of genes to the terms as a GAF file.
+
+    Most annotations are to human proteins from UniProt. One in ten genes is from mouse instead, one in fifty is a
+    complex from the Complex Portal, and 1% of the annotations have a ``NOT`` qualifier. A few duplicates are
+    expected, like in real GAF files.
+
+    :param path: The path of the GAF file. It's gzipped if it ends with ``.gz``.
+    :param terms: The terms of a synthetic ontology
+    :param annotations: The number of annotations
+    :param genes: The number of genes. Defaults to one for every 20 annotations.
+    :param seed: The seed of the random number generator
+    """
+    rng = np.random.default_rng(seed)
+    if genes is None:
+        genes = max(1, annotations // 20)
+
+    go_ids = np.array([term.go_id for term in terms])
+    aspects = np.array([GO_ASPECTS[term.namespace] for term in terms])
+
+    with _open(path) as file:
+        file.write(_GAF_HEADER)
+        for start in range(0, annotations, _BLOCK_SIZE):
+            size = min(_BLOCK_SIZE, annotations - start)
+            gene_ids = rng.integers(0, genes, size=size).tolist()
+            term_indices = rng.integers(0, len(terms), size=size)
+            evidence_codes = rng.choice(_EVIDENCE_CODES, size=size, p=_EVIDENCE_WEIGHTS).tolist()
+            negated = (rng.random(size) < 0.01).tolist()
+            references = rng.integers(1, 30000000, size=size).tolist()
+
+            file.writelines(
+                f'{_GENE_PRODUCTS[gene % 50 == 0]}{gene:07d}\tSYN{gene}\t{"NOT" if is_negated else ""}\t{go_id}\t'
+                f'PMID:{reference}\t{evidence_code}\t\t{aspect}\tSynthetic gene product {gene}\t\t'
+                f'{_GENE_PRODUCT_TYPES[gene % 50 == 0]}\ttaxon:{10090 if gene % 10 == 1 else 9606}\t20180101\t'
+                f'Synthetic\t\t\n'
+                for gene, go_id, aspect, evidence_code, is_negated, reference in zip(
+                    gene_ids, go_ids[term_indices].tolist(), aspects[term_indices].tolist(), evidence_codes,
+                    negated, references,
+                )
+            )
+
+
+def write_synthetic_files(directory: str,
+                          terms: int,
+                          annotations: int,
+                          seed: int = 0,
+                          ) -> Tuple[str, str]:
+    """Write a synthetic OBO file and a gzipped GAF file, unless they were already written with the same parameters.
+
+    :param directory: The directory of the files, which is made if it doesn't exist
+    :param terms: The number of synthetic terms
+    :param annotations: The number of annotations
+    :param seed: The seed of the random number generator
+    :return: The paths of the OBO and GAF files
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f'synthetic-{terms}-{annotations}-{seed}'
+    obo_path = os.path.join(directory, f'{name}.obo')
+    gaf_path = os.path.join(directory, f'{name}.gaf.gz')
+
+    if os.path.exists(obo_path) and os.path.exists(gaf_path):
+        return obo_path, gaf_path
+
+    synthetic_terms = generate_synthetic_terms(terms, seed=seed)
+    write_synthetic_obo(obo_path, synthetic_terms)
+    # The GAF is written to a temporary path first, so an interrupted write isn't mistaken for a finished one
+    tmp_gaf_path = os.path.join(directory, f'{name}.tmp.gaf.gz')
+    write_synthetic_gaf(tmp_gaf_path, synthetic_terms, annotations, seed=seed)
+    os.replace(tmp_gaf_path, gaf_path)
+
+    log.info('wrote %d synthetic terms and %d annotations to %s', len(synthetic_terms), annotations, directory)
+    return obo_path, gaf_path
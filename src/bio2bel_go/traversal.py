@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""Transitive queries over the :class:`Hierarchy` table with recursive common table expressions.
+
+Each query walks the hierarchy inside the database in a single statement, so it works in a fresh process without
+loading the ontology. The recursive CTE has a row for each term reached from each starting term at each distance,
+which stays small since GO is a directed acyclic graph and duplicate rows are merged by ``UNION``. It runs on SQLite
+and PostgreSQL.
+"""
+
+from typing import Iterable, Optional
+
+from sqlalchemy import Integer, and_, distinct, func, literal, or_, select
+from sqlalchemy.orm import Query, Session, aliased
+from sqlalchemy.sql.selectable import CTE
+
+from .models import Hierarchy, Term
+from .ontology import DEFAULT_RELATION
+from .utils import normalize_go_id
+
+__all__ = [
+    'build_traversal_cte',
+    'query_ancestors',
+    'query_descendants',
+    'query_common_ancestors',
+    'query_reachable_pairs',
+]
+
+
+def _relation_filter(relations: Iterable[str]):
+    """Filter hierarchy rows by relation, treating ones stored without a relation as ``is_a``."""
+    relations = list(relations)
+    clause = Hierarchy.relation.in_(relations)
+    if DEFAULT_RELATION in relations:
+        clause = or_(clause, Hierarchy.relation.is_(None))
+    return clause
+
+
+def build_traversal_cte(go_ids: Iterable[str],
+                        ancestors: bool = True,
+                        relations: Optional[Iterable[str]] = None,
+                        max_depth: Optional[int] = None,
+                        ) -> CTE:
+    """Build a recursive CTE of the terms reachable from the given terms.
+
+    :param go_ids: The GO identifiers of the terms to start from
+    :param ancestors: If true, walk from children to parents, otherwise from parents to children
+    :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+    :param max_depth: The largest number of edges to walk. Defaults to no limit.
+    :return: A CTE with the columns ``term_id``, ``origin_id`` (the term it was reached from), and ``depth``, which
+     includes each starting term at depth 0
+    """
+    seed = select([
+        Term.id.label('term_id'),
+        Term.id.label('origin_id'),
+        literal(0, Integer).label('depth'),
+    ]).where(Term.go_id.in_([normalize_go_id(go_id) for go_id in go_ids]))
+    cte = seed.cte(name='traversal', recursive=True)
+
+    if ancestors:
+        source, target = Hierarchy.subject_id, Hierarchy.object_id
+    else:
+        source, target = Hierarchy.object_id, Hierarchy.subject_id
+    clauses = [source == cte.c.term_id]
+    if relations is not None:
+        clauses.append(_relation_filter(relations))
+    if max_depth is not None:
+        clauses.append(cte.c.depth < max_depth)
+
+    step = select([target, cte.c.origin_id, cte.c.depth + 1]).where(and_(*clauses))
+    return cte.union(step)
+
+
+def _query_reachable(session: Session, cte: CTE) -> Query:
+    """Query the terms in a traversal other than the ones it started from, closest first."""
+    distances = select([
+        cte.c.term_id,
+        func.min(cte.c.depth).label('depth'),
+    ]).where(cte.c.depth > 0).group_by(cte.c.term_id).alias('distances')
+
+    return session.query(Term).join(distances, Term.id == distances.c.term_id).order_by(distances.c.depth, Term.go_id)
+
+
+def query_ancestors(session: Session,
+                    go_id: str,
+                    relations: Optional[Iterable[str]] = None,
+                    max_depth: Optional[int] = None,
+                    ) -> Query:
+    """Query the ancestors of a term, closest first.
+
+    :param session: A SQLAlchemy session
+    :param go_id: A GO identifier
+    :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+    :param max_depth: The largest number of edges to walk. Defaults to no limit.
+    """
+    return _query_reachable(session, build_traversal_cte([go_id], relations=relations, max_depth=max_depth))
+
+
+def query_descendants(session: Session,
+                      go_id: str,
+                      relations: Optional[Iterable[str]] = None,
+                      max_depth: Optional[int] = None,
+                      ) -> Query:
+    """Query the descendants of a term, closest first.
+
+    :param session: A SQLAlchemy session
+    :param go_id: A GO identifier
+    :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+    :param max_depth: The largest number of edges to walk. Defaults to no limit.
+    """
+    cte = build_traversal_cte([go_id], ancestors=False, relations=relations, max_depth=max_depth)
+    return _query_reachable(session, cte)
+
+
+def query_common_ancestors(session: Session,
+                           go_ids: Iterable[str],
+                           relations: Optional[Iterable[str]] = None,
+                           max_depth: Optional[int] = None,
+                           ) -> Query:
+    """Query the terms that are ancestors of, or the same as, all of the given terms.
+
+    The results are ordered by their largest distance to any of the given terms, so the lowest common ancestors
+    come first.
+
+    :param session: A SQLAlchemy session
+    :param go_ids: GO identifiers
+    :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+    :param max_depth: The largest number of edges to walk from each term. Defaults to no limit.
+    """
+    go_ids = {normalize_go_id(go_id) for go_id in go_ids}
+    cte = build_traversal_cte(go_ids, relations=relations, max_depth=max_depth)
+
+    # The shortest distance from each starting term to each term it reaches
+    distances = select([
+        cte.c.term_id,
+        cte.c.origin_id,
+        func.min(cte.c.depth).label('depth'),
+    ]).group_by(cte.c.term_id, cte.c.origin_id).alias('distances')
+
+    # Missing identifiers never start a traversal, so they make the count impossible to reach
+    common = select([
+        distances.c.term_id,
+        func.max(distances.c.depth).label('depth'),
+    ]).group_by(distances.c.term_id).having(
+        func.count(distinct(distances.c.origin_id)) == len(go_ids),
+    ).alias('common')
+
+    return session.query(Term).join(common, Term.id == common.c.term_id).order_by(common.c.depth, Term.go_id)
+
+
+def query_reachable_pairs(session: Session,
+                          go_ids: Iterable[str],
+                          ancestors: bool = True,
+                          relations: Optional[Iterable[str]] = None,
+                          max_depth: Optional[int] = None,
+                          ) -> Query:
+    """Query the terms reachable from each of many terms in one statement.
+
+    :param session: A SQLAlchemy session
+    :param go_ids: The GO identifiers of the terms to start from
+    :param ancestors: If true, get the ancestors of each term, otherwise its descendants
+    :param relations: The relations to follow, like ``is_a`` and ``part_of``. Defaults to all.
+    :param max_depth: The largest number of edges to walk. Defaults to no limit.
+    :return: A query of (GO identifier, reached GO identifier, distance) rows, ordered by the starting term, then
+     closest first
+    """
+    cte = build_traversal_cte(go_ids, ancestors=ancestors, relations=relations, max_depth=max_depth)
+
+    distances = select([
+        cte.c.origin_id,
+        cte.c.term_id,
+        func.min(cte.c.depth).label('depth'),
+    ]).where(cte.c.depth > 0).group_by(cte.c.origin_id, cte.c.term_id).alias('distances')
+
+    origin, reached = aliased(Term), aliased(Term)
+    return session.query(origin.go_id, reached.go_id, distances.c.depth).select_from(distances).join(
+        origin, origin.id == distances.c.origin_id,
+    ).join(
+        reached, reached.id == distances.c.term_id,
+    ).order_by(origin.go_id, distances.c.depth, reached.go_id)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for Bio2BEL GO."""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+__all__ = [
+    'iter_chunks',
+    'replace_directory',
+    'normalize_go_id',
+    'normalize_name',
+]
+
+X = TypeVar('X')
+
+
+def iter_chunks(iterable: Iterable[X], size: int) -> Iterator[List[X]]:
+    """Iterate over lists of at most the given size from the iterable."""
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def normalize_go_id(identifier: str) -> str:
+    """If a GO term does not start with the ``GO:`` prefix, add it."""
+    if not identifier.startswith('GO:'):
+        return f'GO:{identifier}'
+
+    return identifier
+
+
+def normalize_name(name: str) -> str:
+    """Case-fold a name and collapse its whitespace, so variants of the same name get the same key."""
+    return ' '.join(name.casefold().split())
+
+
+@contextmanager
+def replace_directory(directory: str, overwrite: bool = True) -> Iterator[str]:
+    """Write files into a temporary directory that replaces the given directory when the block finishes.
+
+    The temporary directory gets a unique name next to the given one, so several processes can write the same
+    directory at once without clobbering each other's files. If the block raises an exception, the temporary directory
+    is removed and the given one is untouched.
+
+    :param directory: The directory to write
+    :param overwrite: If false and the directory exists when the block finishes, like when another process wrote it
+     first, the existing one is kept and the temporary one is removed. This way, processes reading the existing
+     directory never see it disappear.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_directory = tempfile.mkdtemp(prefix=f'{os.path.basename(directory)}.tmp', dir=parent)
+
+    try:
+        yield tmp_directory
+    except BaseException:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        raise
+
+    if not overwrite:
+        try:
+            # Renaming a directory onto one that exists and isn't empty fails
+            os.rename(tmp_directory, directory)
+        except OSError:
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+        return
+
+    if os.path.exists(directory):
+        shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
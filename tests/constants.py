@@ -3,6 +3,9 @@
 """Testing constants for Bio2BEL GO."""
 
 import os
+import shutil
+import tempfile
+from unittest import mock
 
 from bio2bel.testing import AbstractTemporaryCacheClassMixin
 from bio2bel_go import Manager
@@ -13,6 +16,7 @@ __all__ = [
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 TEST_GO_PATH = os.path.join(HERE, 'test_go.obo')
+TEST_GOA_PATH = os.path.join(HERE, 'test_goa.gaf')
 
 
 class TemporaryCacheClass(AbstractTemporaryCacheClassMixin):
@@ -21,7 +25,27 @@ class TemporaryCacheClass(AbstractTemporaryCacheClassMixin):
     Manager = Manager
     manager: Manager
 
+    @classmethod
+    def setUpClass(cls):
+        """Cache the GAF files in a temporary directory, then make and populate the database."""
+        cls.gaf_cache_directory = tempfile.mkdtemp()
+        cls.gaf_cache_patches = [
+            mock.patch(f'bio2bel_go.{module}.GAF_CACHE_DIRECTORY', cls.gaf_cache_directory)
+            for module in ('parser', 'gaf_cache')
+        ]
+        for patch in cls.gaf_cache_patches:
+            patch.start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the database and the cached GAF files."""
+        super().tearDownClass()
+        for patch in cls.gaf_cache_patches:
+            patch.stop()
+        shutil.rmtree(cls.gaf_cache_directory)
+
     @classmethod
     def populate(cls):
         """Populate the database with test data."""
-        cls.manager.populate(path=TEST_GO_PATH)
+        cls.manager.populate(path=TEST_GO_PATH, annotation_paths=[TEST_GOA_PATH])
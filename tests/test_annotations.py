@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the gene-centric annotation lookups."""
+
+from bio2bel_go import Manager
+from bio2bel_go.manager import GeneAnnotation
+from tests.constants import TemporaryCacheClass
+
+
+class TestAnnotationsForGenes(TemporaryCacheClass):
+    """Tests for :meth:`Manager.get_annotations_for_genes`."""
+
+    manager: Manager
+
+    def test_mapping(self):
+        """Test genes are mapped to their terms, skipping NOT annotations and unknown genes."""
+        self.assertEqual(
+            {'P04637': {'GO:0008283'}, 'P00533': {'GO:0008283'}},
+            self.manager.get_annotations_for_genes(['P04637', 'P00533', 'P99999']),
+        )
+        self.assertEqual({}, self.manager.get_annotations_for_genes(['CPX-2158']))
+        self.assertEqual(
+            {'CPX-2158': {'GO:0008283'}},
+            self.manager.get_annotations_for_genes(['CPX-2158'], db='ComplexPortal'),
+        )
+
+    def test_filters(self):
+        """Test filtering by taxon, evidence code, and aspect."""
+        ids = ['P04637', 'P00533']
+        self.assertEqual({'P04637'}, set(self.manager.get_annotations_for_genes(ids, evidence_codes=['IMP'])))
+        self.assertEqual(2, len(self.manager.get_annotations_for_genes(ids, taxa=['taxon:9606'])))
+        self.assertEqual({}, self.manager.get_annotations_for_genes(ids, taxa=['10090']))
+        self.assertEqual(2, len(self.manager.get_annotations_for_genes(ids, aspects=['P'])))
+        self.assertEqual({}, self.manager.get_annotations_for_genes(ids, aspects=['molecular_function']))
+
+    def test_stream(self):
+        """Test the identifiers are consumed lazily in chunks and NOT annotations are kept."""
+        ids = (f'P{i:05d}' for i in range(2000))
+        annotations = list(self.manager.iter_annotations_for_genes(ids, chunksize=100))
+        self.assertTrue(all(isinstance(annotation, GeneAnnotation) for annotation in annotations))
+        self.assertIn(
+            ('UniProtKB', 'P00533', 'EGFR', 'GO:0008150', 'biological_process', 'NOT|involved_in', 'ND', '9606'),
+            annotations,
+        )
+
+    def test_df(self):
+        """Test the dataframe has a row for each annotation."""
+        df = self.manager.get_annotations_for_genes_df(['P00533'])
+        self.assertEqual(list(GeneAnnotation._fields), list(df.columns))
+        self.assertEqual({'GO:0008283', 'GO:0008150'}, set(df['go_id']))
+        self.assertEqual('category', df['evidence_code'].dtype.name)
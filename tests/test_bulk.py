@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for bulk loading."""
+
+import csv
+import unittest
+from unittest import mock
+
+from bio2bel_go.bulk import COPY_NULL, _copy_chunk
+from bio2bel_go.models import Annotation
+
+
+class TestCopy(unittest.TestCase):
+    """Tests loading chunks with PostgreSQL's ``COPY``."""
+
+    def test_null(self):
+        """Test a missing value round-trips as ``NULL`` and an empty string stays an empty string."""
+        session = mock.MagicMock()
+        cursor = session.connection.return_value.connection.cursor.return_value
+
+        chunk = [
+            {'id': 1, 'qualifier': None, 'provenance_id': ''},
+            {'id': 2, 'qualifier': 'NOT', 'provenance_id': 'PMID:1'},
+        ]
+        columns = ['id', 'qualifier', 'provenance_id']
+        _copy_chunk(session, Annotation.__table__, columns, chunk)
+
+        sql, buffer = cursor.copy_expert.call_args[0]
+        self.assertIn(f"NULL '{COPY_NULL}'", sql)
+
+        text = buffer.getvalue()
+        self.assertNotIn(f'"{COPY_NULL}"', text, msg='NULL must be written unquoted')
+
+        loaded = [
+            {
+                column: None if value == COPY_NULL else value
+                for column, value in zip(columns, row)
+            }
+            for row in csv.reader(text.splitlines())
+        ]
+        self.assertEqual(
+            [
+                {'id': '1', 'qualifier': None, 'provenance_id': ''},
+                {'id': '2', 'qualifier': 'NOT', 'provenance_id': 'PMID:1'},
+            ],
+            loaded,
+        )
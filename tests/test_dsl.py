@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the BEL DSL helpers."""
+
+import unittest
+
+from bio2bel_go.constants import GO_BIOLOGICAL_PROCESS, GO_CELLULAR_COMPONENT, GO_MOLECULAR_FUNCTION
+from bio2bel_go.dsl import BELNodeCache
+from bio2bel_go.models import Term
+
+
+class TestBELNodeCache(unittest.TestCase):
+    """Tests for the term BEL node cache."""
+
+    def test_cache(self):
+        """Test nodes are built once and the least recently used node is evicted."""
+        cache = BELNodeCache(maxsize=2)
+
+        a = cache.get('GO:1', 'a', GO_BIOLOGICAL_PROCESS, False)
+        self.assertIs(a, cache.get('GO:1', 'a', GO_BIOLOGICAL_PROCESS, False))
+
+        b = cache.get('GO:2', 'b', GO_CELLULAR_COMPONENT, True)
+        self.assertIsNone(cache.get('GO:3', 'c', GO_MOLECULAR_FUNCTION, False))
+        self.assertEqual(2, len(cache))
+
+        self.assertIsNot(a, cache.get('GO:1', 'a', GO_BIOLOGICAL_PROCESS, False), msg='GO:1 should have been evicted')
+        self.assertIsNot(b, cache.get('GO:2', 'b', GO_CELLULAR_COMPONENT, True), msg='GO:2 should have been evicted')
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_renamed(self):
+        """Test a term with another name, like in another release, gets its own node."""
+        cache = BELNodeCache()
+        self.assertEqual('old name', cache.get('GO:1', 'old name', GO_BIOLOGICAL_PROCESS, False).name)
+        self.assertEqual('new name', cache.get('GO:1', 'new name', GO_BIOLOGICAL_PROCESS, False).name)
+
+    def test_bel_encoding(self):
+        """Test the BEL encodings of terms."""
+        self.assertEqual('B', Term(namespace=GO_BIOLOGICAL_PROCESS, is_complex=False).bel_encoding)
+        self.assertEqual('A', Term(namespace=GO_CELLULAR_COMPONENT, is_complex=False).bel_encoding)
+        self.assertEqual('C', Term(namespace=GO_CELLULAR_COMPONENT, is_complex=True).bel_encoding)
+        self.assertEqual('Y', Term(namespace=GO_MOLECULAR_FUNCTION, is_complex=False).bel_encoding)
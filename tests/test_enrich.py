@@ -2,9 +2,11 @@
 
 """Tests for enrichment."""
 
+from unittest import mock
+
 from bio2bel_go import Manager
 from pybel import BELGraph
-from pybel.dsl import bioprocess
+from pybel.dsl import bioprocess, protein
 from tests.constants import TemporaryCacheClass
 
 
@@ -51,3 +53,109 @@ class TestEnrich(TemporaryCacheClass):
         self.graph.add_node_from_data(bioprocess(namespace='GO', identifier='0008283'))
 
         self.help_test_cell_proliferation(self.graph)
+
+    def test_enrich_depth(self):
+        """Test enriching with more than one level of parents."""
+        node = bioprocess(namespace='GO', identifier='GO:0000278')
+        for depth, expected_nodes in [(1, 2), (2, 3), (None, 4)]:
+            with self.subTest(depth=depth):
+                graph = BELGraph()
+                graph.add_node_from_data(node)
+                self.manager.enrich_bioprocesses(graph, depth=depth)
+                self.assertEqual(expected_nodes, graph.number_of_nodes())
+                self.assertEqual(expected_nodes - 1, graph.number_of_edges())
+
+    def test_enrich_children(self):
+        """Test the direct children of a biological process are added."""
+        self.graph.add_node_from_data(bioprocess(namespace='GO', identifier='GO:0007049'))
+        self.manager.enrich_bioprocesses(self.graph)
+
+        # mitotic cell cycle and cell cycle process are children, cellular process is the parent
+        self.assertEqual(4, self.graph.number_of_nodes())
+        self.assertEqual(3, self.graph.number_of_edges())
+
+    def test_lookup_terms(self):
+        """Test looking up many nodes at once."""
+        nodes = [
+            bioprocess(namespace='GO', identifier='GO:0008283'),
+            bioprocess(namespace='GOBP', identifier='0008150'),
+            bioprocess(namespace='GO', name='cell proliferation'),
+            bioprocess(namespace='GO', name='GO:0008150'),
+            bioprocess(namespace='GO', name='not a GO term'),
+            protein(namespace='HGNC', name='TP53'),
+        ]
+        terms = self.manager.lookup_terms(nodes)
+        self.assertEqual(
+            {
+                nodes[0]: 'GO:0008283',
+                nodes[1]: 'GO:0008150',
+                nodes[2]: 'GO:0008283',
+                nodes[3]: 'GO:0008150',
+            },
+            {node: term.go_id for node, term in terms.items()},
+        )
+
+
+class TestEnrichIndex(TestEnrich):
+    """Tests enrichment with the in-memory term index."""
+
+    def setUp(self):
+        """Set up the database with a BEL graph and use the term index."""
+        super().setUp()
+        self.manager.use_term_index = True
+
+    def test_lookup_synonym(self):
+        """Test lookup by synonym."""
+        term = self.manager.lookup_term(bioprocess(namespace='GO', name='physiological process'))
+        self.assertIsNotNone(term)
+        self.assertEqual('GO:0008150', term.go_id)
+
+
+def _make_graphs():
+    rv = []
+    for node in [
+        bioprocess(namespace='GO', name='cell proliferation'),
+        bioprocess(namespace='GO', identifier='0000278'),
+        bioprocess(namespace='GOBP', identifier='GO:0007049'),
+        protein(namespace='HGNC', name='TP53'),
+    ]:
+        graph = BELGraph()
+        graph.add_node_from_data(node)
+        rv.append(graph)
+    return rv
+
+
+class TestEnrichMany(TemporaryCacheClass):
+    """Tests enriching many graphs in a pool of processes."""
+
+    manager: Manager
+
+    def test_enrich_many(self):
+        """Test the graphs enriched by the workers match the ones enriched in this process, in order."""
+        expected = _make_graphs()
+        for graph in expected:
+            self.manager.normalize_terms(graph)
+            self.manager.enrich_bioprocesses(graph, depth=2)
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                graphs = _make_graphs()
+                results = self.manager.enrich_many(graphs, workers=workers, depth=2)
+                self.assertEqual(len(expected), len(results))
+                for expected_graph, result in zip(expected, results):
+                    self.assertEqual(set(expected_graph), set(result.graph))
+                    self.assertEqual(set(expected_graph.edges()), set(result.graph.edges()))
+                    self.assertEqual(expected_graph.namespace_url, result.graph.namespace_url)
+                    self.assertLessEqual(0, result.normalize_time)
+                    self.assertLessEqual(0, result.enrich_time)
+
+                if workers == 1:
+                    self.assertIs(graphs[0], results[0].graph)
+
+    def test_enrich_many_serial(self):
+        """Test graphs enriched in this process use the term index, like the workers, instead of the database."""
+        with mock.patch.object(Manager, '_get_terms_by', side_effect=AssertionError), \
+                mock.patch.object(Manager, '_query_hierarchy_rows', side_effect=AssertionError):
+            results = self.manager.enrich_many(_make_graphs(), workers=1, depth=2)
+        self.assertFalse(self.manager.use_term_index)
+        self.assertLess(0, sum(result.graph.number_of_nodes() for result in results))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for gene set enrichment."""
+
+import unittest
+from math import comb
+
+import networkx as nx
+import numpy as np
+
+from bio2bel_go.enrichment import AnnotationMatrix, benjamini_hochberg, hypergeometric_sf
+from bio2bel_go.ontology import Ontology
+from tests.constants import TemporaryCacheClass
+
+
+def _brute_force_sf(k, population, successes, draws):
+    """Sum the hypergeometric probability mass with exact integers."""
+    total = comb(population, draws)
+    return sum(
+        comb(successes, x) * comb(population - successes, draws - x)
+        for x in range(k, min(successes, draws) + 1)
+    ) / total
+
+
+class TestStatistics(unittest.TestCase):
+    """Tests for the vectorized statistics."""
+
+    def test_hypergeometric(self):
+        """Test the upper tail matches the exact sum."""
+        population, draws = 40, 12
+        k = np.array([1, 3, 5, 8, 12, 2])
+        successes = np.array([5, 10, 20, 9, 30, 2])
+        expected = [_brute_force_sf(*args) for args in zip(k.tolist(), [population] * 6, successes.tolist(), [draws] * 6)]
+        np.testing.assert_allclose(expected, hypergeometric_sf(k, population, successes, draws))
+
+    def test_hypergeometric_tails(self):
+        """Test small p-values keep their precision when the counts are far above the mean."""
+        k = np.array([20, 3, 160, 1])
+        successes = np.array([300, 300, 10000, 1])
+        expected = [_brute_force_sf(*args) for args in zip(k.tolist(), [20000] * 4, successes.tolist(), [300] * 4)]
+        np.testing.assert_allclose(expected, hypergeometric_sf(k, 20000, successes, 300), rtol=1e-6)
+
+    def test_benjamini_hochberg(self):
+        """Test the adjusted p-values are monotonic in the p-values and capped at 1."""
+        p_values = np.array([0.01, 0.04, 0.03, 0.5, 0.9])
+        np.testing.assert_allclose(
+            [0.05, 0.2 / 3, 0.2 / 3, 0.625, 0.9],
+            benjamini_hochberg(p_values),
+        )
+
+
+class TestAnnotationMatrix(unittest.TestCase):
+    """Tests for :class:`bio2bel_go.enrichment.AnnotationMatrix`."""
+
+    def setUp(self):
+        """Annotate genes to a small hierarchy where D is_a B is_a A and D part_of C."""
+        graph = nx.MultiDiGraph()
+        for node in 'ABCD':
+            graph.add_node(node, name=node.lower(), namespace='biological_process')
+        graph.add_node('E', name='e', namespace='molecular_function')
+        graph.add_edge('B', 'A', key='is_a')
+        graph.add_edge('D', 'B', key='is_a')
+        graph.add_edge('D', 'C', key='part_of')
+        self.ontology = Ontology.from_graph(graph)
+
+        pairs = [('g1', 'D'), ('g2', 'D'), ('g3', 'B'), ('g4', 'C'), ('g5', 'E'), ('g6', 'A'), ('g1', 'B')]
+        pairs += [(f'x{i}', 'E') for i in range(10)]
+        self.matrix = AnnotationMatrix.from_pairs(self.ontology, pairs + [('g7', 'missing')])
+
+    def get_terms(self, gene):
+        """Get the GO identifiers of the terms a gene is annotated to."""
+        i = self.matrix.genes.index(gene)
+        return {
+            self.ontology.go_ids[j]
+            for j in self.matrix.indices[self.matrix.indptr[i]:self.matrix.indptr[i + 1]].tolist()
+        }
+
+    def test_propagation(self):
+        """Test annotations are propagated up is_a, but not part_of, without duplicates."""
+        self.assertEqual(16, len(self.matrix))
+        self.assertNotIn('g7', self.matrix.genes)
+        self.assertEqual({'A', 'B', 'D'}, self.get_terms('g1'))
+        self.assertEqual({'A', 'B'}, self.get_terms('g3'))
+        self.assertEqual({'C'}, self.get_terms('g4'))
+        self.assertEqual(4, self.matrix.term_sizes[self.ontology.get_index('A')])
+
+    def test_enrichment(self):
+        """Test the p-values against the exact hypergeometric tail."""
+        df = self.matrix.enrichment(['g1', 'g2', 'g3', 'unknown'])
+        self.assertEqual(['B', 'A', 'D'], df['go_id'].tolist())
+        self.assertEqual([3, 3, 2], df['count'].tolist())
+        self.assertEqual([3, 4, 2], df['term_size'].tolist())
+        self.assertTrue((df['set_size'] == 3).all())
+        self.assertTrue((df['background_size'] == 16).all())
+        np.testing.assert_allclose(
+            [_brute_force_sf(3, 16, 3, 3), _brute_force_sf(3, 16, 4, 3), _brute_force_sf(2, 16, 2, 3)],
+            df['p_value'],
+        )
+        np.testing.assert_allclose(benjamini_hochberg(df['p_value'].to_numpy()), df['q_value'])
+
+    def test_background(self):
+        """Test a custom background restricts both the population and the gene set."""
+        df = self.matrix.enrichment(['g1', 'g5'], background=['g1', 'g2', 'g3', 'g4', 'g6'])
+        self.assertTrue((df['set_size'] == 1).all())
+        self.assertTrue((df['background_size'] == 5).all())
+        self.assertEqual({'A': 4, 'B': 3, 'D': 2}, dict(zip(df['go_id'], df['term_size'])))
+
+    def test_filters(self):
+        """Test filtering the tested terms by namespace and count."""
+        df = self.matrix.enrichment(['g1', 'g2', 'g3', 'g5'], namespaces=['molecular_function'])
+        self.assertEqual(['E'], df['go_id'].tolist())
+
+        df = self.matrix.enrichment(['g1', 'g2', 'g3', 'g5'], min_count=3)
+        self.assertEqual({'A', 'B'}, set(df['go_id']))
+
+        df = self.matrix.enrichment(['unknown'])
+        self.assertEqual(0, len(df))
+
+
+class TestManagerEnrichment(TemporaryCacheClass):
+    """Tests for enrichment from the database."""
+
+    def test_enrichment(self):
+        """Test the matrix skips NOT annotations and is cached."""
+        matrix = self.manager.get_annotation_matrix()
+        self.assertIs(matrix, self.manager.get_annotation_matrix())
+        self.assertIn('TP53', matrix.genes)
+
+        df = self.manager.enrichment(['TP53'])
+        self.assertIn('GO:0008283', set(df['go_id']))
+        self.assertTrue((df['p_value'] <= 1).all())
+
+        by_id = self.manager.get_annotation_matrix(key='db_id')
+        self.assertIsNot(matrix, by_id)
+        self.assertIn('P04637', by_id.genes)
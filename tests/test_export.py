@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for exporting GO to BEL."""
+
+from io import StringIO
+
+from bio2bel_go import Manager
+from pybel import from_json_file
+from pybel.constants import ASSOCIATION, IS_A, RELATION
+from tests.constants import TemporaryCacheClass
+
+
+class TestExport(TemporaryCacheClass):
+    """Tests for exporting GO to BEL."""
+
+    manager: Manager
+
+    def test_to_bel(self):
+        """Test building a BEL graph."""
+        graph = self.manager.to_bel()
+        relations = [data[RELATION] for _, _, data in graph.edges(data=True)]
+        self.assertEqual(8, relations.count(IS_A))
+        self.assertEqual(1, relations.count(ASSOCIATION), msg='only ComplexPortal annotations should be exported')
+
+    def test_to_nodelink(self):
+        """Test streaming node-link JSON gives the same graph."""
+        graph = self.manager.to_bel()
+
+        file = StringIO()
+        self.manager.to_bel_file(file, fmt='nodelink')
+        file.seek(0)
+        streamed_graph = from_json_file(file)
+
+        self.assertEqual(set(graph), set(streamed_graph))
+        self.assertEqual(set(graph.edges(keys=True)), set(streamed_graph.edges(keys=True)))
+
+    def test_to_bel_script(self):
+        """Test streaming a BEL script."""
+        file = StringIO()
+        self.manager.to_bel_file(file, fmt='bel')
+        lines = file.getvalue().splitlines()
+
+        self.assertIn('bp(go:"cell proliferation") isA bp(go:"biological_process")', lines)
+        self.assertIn('SET Citation = {"PubMed", "2303006"}', lines)
+        self.assertIn('SET Species = "9606"', lines)
+
+    def test_invalid_format(self):
+        """Test an invalid format raises an error."""
+        with self.assertRaises(ValueError):
+            self.manager.to_bel_file(StringIO(), fmt='xml')
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the columnar cache of GAF files."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from bio2bel_go.gaf_cache import GafTable, concat_gaf_dfs, load_gaf_table, read_gaf_df
+from bio2bel_go.parser import iter_gaf_records
+from tests.constants import TEST_GOA_PATH
+
+
+class TestGafCache(unittest.TestCase):
+    """Tests for :mod:`bio2bel_go.gaf_cache`."""
+
+    def setUp(self):
+        """Make a temporary cache directory."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary cache directory."""
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        """Test a saved and loaded table gives the same records as the GAF file."""
+        table = GafTable.from_path(TEST_GOA_PATH)
+        table.save(os.path.join(self.directory, 'table'))
+        loaded = GafTable.load(os.path.join(self.directory, 'table'))
+
+        self.assertEqual(6, len(loaded))
+        self.assertEqual(list(iter_gaf_records(TEST_GOA_PATH)), list(loaded.iter_records()))
+        self.assertEqual(list(loaded.iter_records()), list(loaded.iter_records(chunksize=4)))
+
+    def test_keep_existing(self):
+        """Test saving without overwriting keeps a table that was saved first, like by another process."""
+        directory = os.path.join(self.directory, 'table')
+        table = GafTable.from_path(TEST_GOA_PATH)
+        table.save(directory, overwrite=False)
+        GafTable(
+            codes={column: codes[:2] for column, codes in table.codes.items()},
+            categories=table.categories,
+        ).save(directory, overwrite=False)
+
+        self.assertEqual(6, len(GafTable.load(directory)))
+        self.assertEqual(['table'], os.listdir(self.directory))
+
+    def test_checksum(self):
+        """Test tables are cached by checksum and replaced when the file changes."""
+        path = os.path.join(self.directory, 'goa.gaf')
+        cache_directory = os.path.join(self.directory, 'cache')
+        shutil.copy(TEST_GOA_PATH, path)
+
+        load_gaf_table(path, cache_directory=cache_directory)
+        self.assertEqual(1, len(os.listdir(cache_directory)))
+        load_gaf_table(path, cache_directory=cache_directory)
+        self.assertEqual(1, len(os.listdir(cache_directory)))
+
+        with open(path, 'a') as file:
+            print('\t'.join(['UniProtKB', 'P1', 'X', '', 'GO:0005575', 'PMID:1', 'IDA', '', 'C', '', '', 'protein',
+                             'taxon:10090', '20180101', 'UniProt', '', '']), file=file)
+
+        table = load_gaf_table(path, cache_directory=cache_directory)
+        self.assertEqual(7, len(table))
+        self.assertEqual(1, len(os.listdir(cache_directory)), msg='stale cache should be removed')
+
+        gz_path = f'{path}.gz'
+        with open(path, 'rb') as src, gzip.open(gz_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        load_gaf_table(gz_path, cache_directory=cache_directory)
+        self.assertEqual(2, len(os.listdir(cache_directory)), msg='caches of other files should be kept')
+
+    def test_same_name(self):
+        """Test files with the same name in different directories keep their own tables."""
+        cache_directory = os.path.join(self.directory, 'cache')
+        with open(TEST_GOA_PATH) as file:
+            lines = file.readlines()
+
+        paths = []
+        for name, content in (('a', lines), ('b', lines[:-1])):
+            os.mkdir(os.path.join(self.directory, name))
+            path = os.path.join(self.directory, name, 'goa.gaf')
+            with open(path, 'w') as file:
+                file.writelines(content)
+            paths.append(path)
+
+        tables = [load_gaf_table(path, cache_directory=cache_directory) for path in paths]
+        self.assertEqual([6, 5], list(map(len, tables)))
+        self.assertEqual(2, len(os.listdir(cache_directory)))
+        self.assertEqual(6, len(load_gaf_table(paths[0], cache_directory=cache_directory)))
+
+    def test_removed(self):
+        """Test loading a table that was removed before it could be loaded raises an error."""
+        with mock.patch('bio2bel_go.gaf_cache.GafTable.load', return_value=None), \
+                self.assertRaises(ValueError):
+            load_gaf_table(TEST_GOA_PATH, cache_directory=self.directory)
+
+    def test_filters(self):
+        """Test filtering by taxon, evidence code, and aspect."""
+        df = read_gaf_df(TEST_GOA_PATH, cache_directory=self.directory)
+        self.assertEqual(6, len(df))
+        self.assertEqual('category', df['evidence_code'].dtype)
+        self.assertEqual(3, df['qualifier'].notna().sum())
+
+        self.assertEqual(2, len(read_gaf_df(TEST_GOA_PATH, evidence_codes=['IDA'], cache_directory=self.directory)))
+        self.assertEqual(6, len(read_gaf_df(TEST_GOA_PATH, taxa=['taxon:9606'], cache_directory=self.directory)))
+        self.assertEqual(0, len(read_gaf_df(TEST_GOA_PATH, taxa=['10090'], cache_directory=self.directory)))
+        self.assertEqual(
+            6,
+            len(read_gaf_df(TEST_GOA_PATH, aspects=['biological_process'], cache_directory=self.directory)),
+        )
+        self.assertEqual(0, len(read_gaf_df(TEST_GOA_PATH, aspects=['C'], cache_directory=self.directory)))
+
+    def test_concat(self):
+        """Test concatenated dataframes keep categorical columns."""
+        df = read_gaf_df(TEST_GOA_PATH, cache_directory=self.directory)
+        rv = concat_gaf_dfs([df, df[df['evidence_code'] == 'IDA']])
+        self.assertEqual(8, len(rv))
+        self.assertEqual('category', rv['db'].dtype)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the in-memory name index."""
+
+import unittest
+
+from bio2bel_go import Manager
+from bio2bel_go.index import NameIndex, TermIndex
+from bio2bel_go.ontology import Ontology
+from pybel.dsl import bioprocess
+from tests.constants import TemporaryCacheClass
+
+
+class TestNameIndex(unittest.TestCase):
+    """Tests for :class:`bio2bel_go.index.NameIndex`."""
+
+    def setUp(self):
+        """Build a small index where a synonym of one term is the name of another."""
+        self.index = NameIndex(
+            [('GO:1', 'cell cycle'), ('GO:2', 'Cell  Division'), ('GO:3', 'cell death')],
+            [
+                ('GO:1', '"cell-division cycle" EXACT []'),
+                ('GO:3', '"cell division" EXACT []'),
+                ('GO:3', '"programmed cell death" NARROW []'),
+                ('GO:2', '"cytokinesis" RELATED []'),
+                ('GO:3', '"cytokinesis" EXACT []'),
+            ],
+        )
+
+    def test_get(self):
+        """Test names are matched ignoring case and whitespace, and names precede synonyms."""
+        self.assertEqual('GO:1', self.index.get('cell cycle'))
+        self.assertEqual('GO:1', self.index.get('  CELL\tcycle '))
+        self.assertEqual('GO:1', self.index.get('Cell-Division Cycle'))
+        self.assertEqual('GO:2', self.index.get('cell division'))
+        self.assertIsNone(self.index.get('cell'))
+
+    def test_scopes(self):
+        """Test only exact synonyms are indexed, so broader and narrower names aren't resolved to the term."""
+        self.assertIsNone(self.index.get('programmed cell death'))
+        self.assertEqual('GO:3', self.index.get('cytokinesis'))
+
+    def test_search(self):
+        """Test prefix search returns each term once, in the order of its first matching name."""
+        self.assertEqual(['GO:1', 'GO:3', 'GO:2'], self.index.search('Cell '))
+        self.assertEqual(['GO:1', 'GO:3'], self.index.search('cell', limit=2))
+        self.assertEqual(['GO:1'], self.index.search('cell-d'))
+        self.assertEqual(['GO:3', 'GO:2'], self.index.search('cell d'))
+        self.assertEqual([], self.index.search('nucleus'))
+
+
+class TestTermIndex(unittest.TestCase):
+    """Tests for :class:`bio2bel_go.index.TermIndex`."""
+
+    def setUp(self):
+        """Build an index over an ontology where one term is both a part and a kind of another."""
+        self.ontology = Ontology.from_edges(
+            ['GO:1', 'GO:2', 'GO:3'],
+            ['whole', 'part', 'other'],
+            ['cellular_component'] * 3,
+            [(1, 0, 'is_a'), (1, 0, 'part_of'), (2, 0, 'is_a')],
+        )
+        self.index = TermIndex(self.ontology, [False, True, False], synonyms=[(1, '"piece" EXACT []')])
+
+    def test_terms(self):
+        """Test terms are looked up by identifier and name."""
+        self.assertIn('GO:2', self.index)
+        self.assertTrue(self.index.get_term_by_id('GO:2').is_complex)
+        self.assertEqual('GO:2', self.index.get_term_by_name('Piece').go_id)
+
+    def test_hierarchy(self):
+        """Test the hierarchy is read from the ontology, with an edge for each relation."""
+        self.assertEqual(['GO:1'], [term.go_id for term in self.index.get_parents('GO:2')])
+        self.assertEqual(['GO:2', 'GO:3'], [term.go_id for term in self.index.get_children('GO:1')])
+        self.assertEqual(
+            [('GO:2', 'GO:1'), ('GO:2', 'GO:1'), ('GO:3', 'GO:1')],
+            sorted(
+                (child[0], parent[0])
+                for child, parent in self.index.iter_hierarchy(['GO:1'], include_children=True)
+            ),
+        )
+
+    def test_invalid_namespace(self):
+        """Test a term in another namespace raises an error naming it."""
+        self.ontology.namespaces[2] = 'external'
+        with self.assertRaisesRegex(ValueError, 'external'):
+            TermIndex(self.ontology, [False] * 3)
+
+
+class TestManagerNameIndex(TemporaryCacheClass):
+    """Tests resolving names with the database-backed name index."""
+
+    manager: Manager
+
+    def test_lookup_variants(self):
+        """Test case and whitespace variants of names and synonyms are resolved."""
+        for name, go_id in [
+            ('Cell  Proliferation', 'GO:0008283'),
+            ('physiological process', 'GO:0008150'),
+            ('CELL-DIVISION CYCLE', 'GO:0007049'),
+            ('GO:0008150', 'GO:0008150'),
+            ('0009987', 'GO:0009987'),
+        ]:
+            with self.subTest(name=name):
+                node = bioprocess(namespace='GO', name=name)
+                self.assertEqual(go_id, self.manager.lookup_term(node).go_id)
+                self.assertEqual(go_id, self.manager.lookup_terms([node])[node].go_id)
+
+        self.assertIsNone(self.manager.lookup_term(bioprocess(namespace='GO', name='not a GO term')))
+
+    def test_search(self):
+        """Test searching terms by prefix."""
+        self.assertEqual(
+            ['GO:0007049', 'GO:0022402', 'GO:0009987', 'GO:0008283', 'GO:0005575'],
+            [term.go_id for term in self.manager.search_terms('cell ')],
+        )
+        self.assertEqual(['GO:0007049'], [term.go_id for term in self.manager.search_terms('cell', limit=1)])
+
+        self.manager.use_term_index = True
+        try:
+            self.assertEqual(
+                ['GO:0007049', 'GO:0022402', 'GO:0009987', 'GO:0008283', 'GO:0005575'],
+                [term.go_id for term in self.manager.search_terms('CELL ')],
+            )
+        finally:
+            self.manager.use_term_index = False
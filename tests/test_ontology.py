@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the array-backed ontology."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+
+from bio2bel_go import Manager
+from bio2bel_go.ontology import Ontology
+from bio2bel_go.parser import get_go_from_obo
+from bio2bel_go.snapshot import read_snapshot, write_snapshot
+from tests.constants import TEST_GO_PATH, TemporaryCacheClass
+
+
+class TestOntology(unittest.TestCase):
+    """Tests for :class:`bio2bel_go.ontology.Ontology`."""
+
+    def setUp(self):
+        """Build a small diamond-shaped hierarchy."""
+        self.graph = nx.MultiDiGraph()
+        for node in 'ABCDE':
+            self.graph.add_node(node, name=node.lower(), namespace='biological_process')
+        self.graph.add_edge('B', 'A', key='is_a')
+        self.graph.add_edge('C', 'A', key='is_a')
+        self.graph.add_edge('D', 'B', key='is_a')
+        self.graph.add_edge('D', 'C', key='part_of')
+        self.ontology = Ontology.from_graph(self.graph)
+
+    def test_ancestors(self):
+        """Test ancestors are collected through all paths."""
+        self.assertEqual({'A', 'B', 'C'}, self.ontology.get_ancestors('D'))
+        self.assertEqual(set(), self.ontology.get_ancestors('A'))
+        self.assertEqual(set(), self.ontology.get_ancestors('E'))
+        self.assertEqual(set(), self.ontology.get_ancestors('missing'))
+        self.assertTrue(self.ontology.is_descendant('D', 'A'))
+        self.assertFalse(self.ontology.is_descendant('A', 'A'))
+
+    def test_descendants(self):
+        """Test descendants are collected through all paths."""
+        self.assertEqual({'B', 'C', 'D'}, self.ontology.get_descendants('A'))
+        self.assertEqual({'D'}, self.ontology.get_descendants('C'))
+
+    def test_relations(self):
+        """Test only the given relations are followed."""
+        self.assertEqual({'A', 'B'}, self.ontology.get_ancestors('D', relations=['is_a']))
+        self.assertEqual({'C'}, self.ontology.get_ancestors('D', relations=['part_of']))
+        self.assertEqual(['is_a', 'part_of'], self.ontology.relations)
+
+    def test_masks(self):
+        """Test the union of the ancestors of several terms."""
+        mask = self.ontology.get_ancestor_mask(self.ontology.get_indices(['B', 'C', 'missing']))
+        self.assertEqual(['A'], [self.ontology.go_ids[i] for i in mask.nonzero()[0]])
+
+    def test_topological_order(self):
+        """Test every term comes after its parents."""
+        order = [self.ontology.go_ids[i] for i in self.ontology.get_topological_order()]
+        self.assertEqual(5, len(order))
+        for child, parent in self.graph.edges():
+            self.assertLess(order.index(parent), order.index(child))
+
+    def test_graph(self):
+        """Test converting to a graph and back."""
+        graph = self.ontology.to_graph()
+        self.assertEqual(set(self.graph.edges(keys=True)), set(graph.edges(keys=True)))
+        self.assertEqual(dict(self.graph.nodes(data=True)), dict(graph.nodes(data=True)))
+
+    def test_obo(self):
+        """Test the closure matches a traversal of the graph from the test OBO file, whose edges point to parents."""
+        graph = get_go_from_obo(path=TEST_GO_PATH)
+        ontology = Ontology.from_graph(graph)
+
+        indptr, indices = ontology.get_ancestor_closure()
+        for index, go_id in enumerate(ontology.go_ids):
+            with self.subTest(go_id=go_id):
+                expected = nx.descendants(graph, go_id)
+                self.assertEqual(expected, ontology.get_ancestors(go_id))
+                self.assertEqual(expected, {ontology.go_ids[i] for i in indices[indptr[index]:indptr[index + 1]]})
+                self.assertEqual(nx.ancestors(graph, go_id), ontology.get_descendants(go_id))
+
+    def test_snapshot(self):
+        """Test building from a snapshot without a graph."""
+        graph = get_go_from_obo(path=TEST_GO_PATH)
+        directory = tempfile.mkdtemp()
+        try:
+            write_snapshot(graph, os.path.join(directory, 'go.snapshot'))
+            ontology = Ontology.from_snapshot(read_snapshot(os.path.join(directory, 'go.snapshot')))
+            self.assertEqual(set(graph.edges(keys=True)), set(ontology.to_graph().edges(keys=True)))
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestManagerOntology(TemporaryCacheClass):
+    """Tests for :meth:`bio2bel_go.Manager.get_ontology`."""
+
+    manager: Manager
+
+    def test_from_database(self):
+        """Test the ontology built from the database matches the one built from the OBO file."""
+        expected = self.manager.get_ontology()
+        ontology = Ontology.from_session(self.manager.session)
+        self.assertEqual(set(expected.to_graph().edges(keys=True)), set(ontology.to_graph().edges(keys=True)))
+        self.assertEqual(['is_a', 'part_of'], ontology.relations)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the parsers."""
+
+import gzip
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+from bio2bel_go.parser import get_gaf_sources, iter_gaf_batches, iter_gaf_records, iter_obo_terms, read_obo
+from tests.constants import TEST_GOA_PATH, TEST_GO_PATH
+
+OBO_TEXT = '''format-version: 1.2
+data-version: releases/2018-01-08
+remark: first
+remark: second
+
+[Term]
+id: GO:0000001
+name: child
+namespace: biological_process
+xref: Wikipedia:Child
+is_a: GO:0000002 ! parent
+relationship: part_of GO:0000003 {source="GOC:test"} ! whole
+
+[Typedef]
+id: part_of
+name: part of
+
+[Term]
+id: GO:0000004
+name: old
+namespace: biological_process
+is_obsolete: true
+'''
+
+
+class TestOboParser(unittest.TestCase):
+    """Tests for the streaming OBO reader."""
+
+    def test_terms(self):
+        """Test the header and terms are parsed and unused tags are skipped."""
+        header, terms = iter_obo_terms(StringIO(OBO_TEXT))
+        self.assertEqual('releases/2018-01-08', header['data-version'])
+        self.assertEqual(['first', 'second'], header['remark'])
+
+        terms = list(terms)
+        self.assertEqual(1, len(terms))
+        go_id, data, edges = terms[0]
+        self.assertEqual('GO:0000001', go_id)
+        self.assertEqual({'name': 'child', 'namespace': 'biological_process'}, data)
+        self.assertEqual([('is_a', 'GO:0000002'), ('part_of', 'GO:0000003')], edges)
+
+    def test_obsolete(self):
+        """Test obsolete terms can be kept."""
+        _, terms = iter_obo_terms(StringIO(OBO_TEXT), ignore_obsolete=False)
+        terms = list(terms)
+        self.assertEqual(2, len(terms))
+        self.assertEqual('true', terms[1].data['is_obsolete'])
+
+    @unittest.skipIf(importlib.util.find_spec('obonet') is None, 'obonet is not installed')
+    def test_matches_obonet(self):
+        """Test the graph matches the one made by :mod:`obonet` for the tags that are kept."""
+        import obonet
+
+        expected = obonet.read_obo(TEST_GO_PATH)
+        graph = read_obo(TEST_GO_PATH)
+
+        self.assertEqual(list(expected), list(graph))
+        self.assertEqual(set(expected.edges(keys=True)), set(graph.edges(keys=True)))
+        self.assertEqual(expected.graph['data-version'], graph.graph['data-version'])
+
+        for go_id, data in expected.nodes(data=True):
+            with self.subTest(go_id=go_id):
+                self.assertEqual(
+                    {key: data[key] for key in ('name', 'namespace', 'def', 'synonym') if key in data},
+                    graph.nodes[go_id],
+                )
+
+
+class TestGafParser(unittest.TestCase):
+    """Tests for the streaming GAF reader."""
+
+    def setUp(self):
+        """Cache the GAF files in a temporary directory."""
+        self.cache_directory = tempfile.mkdtemp()
+        self.patches = [
+            mock.patch(f'bio2bel_go.{module}.GAF_CACHE_DIRECTORY', self.cache_directory)
+            for module in ('parser', 'gaf_cache')
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        """Remove the cached GAF files."""
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.cache_directory)
+
+    def test_records(self):
+        """Test the provenance and taxonomy columns are parsed."""
+        records = list(iter_gaf_records(TEST_GOA_PATH))
+        self.assertEqual(6, len(records))
+
+        egfr = records[2]
+        self.assertEqual('GO:0008283', egfr.go_id)
+        self.assertEqual('P00533', egfr.db_id)
+        self.assertIsNone(egfr.qualifier)
+        self.assertEqual('PMID', egfr.provenance_db)
+        self.assertEqual('7532293', egfr.provenance_id)
+        self.assertEqual('9606', egfr.tax_id)
+
+    def test_deduplicate(self):
+        """Test duplicates within and across files are skipped."""
+        directory = tempfile.mkdtemp()
+        try:
+            gz_path = os.path.join(directory, 'test_goa.gaf.gz')
+            with open(TEST_GOA_PATH, 'rb') as src, gzip.open(gz_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+
+            with iter_gaf_batches([TEST_GOA_PATH, gz_path], batch_size=2) as batches:
+                batches = list(batches)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual([2, 2, 1], [len(batch) for batch in batches])
+
+    def test_serial(self):
+        """Test reading files in this process gives the same records as reading them in worker processes."""
+        with iter_gaf_batches([TEST_GOA_PATH], max_workers=1) as serial, \
+                iter_gaf_batches([TEST_GOA_PATH], max_workers=2) as parallel:
+            self.assertEqual(list(serial), list(parallel))
+
+    def test_close(self):
+        """Test the worker processes are stopped when closed before or during iteration."""
+        batches = iter_gaf_batches([TEST_GOA_PATH, TEST_GOA_PATH], batch_size=2)
+        batches.close()
+        self.assertIsNone(batches._executor)
+        self.assertEqual([], multiprocessing.active_children())
+
+        with iter_gaf_batches([TEST_GOA_PATH, TEST_GOA_PATH], batch_size=2) as batches:
+            self.assertEqual(2, len(next(iter(batches))))
+        self.assertIsNone(batches._executor)
+        self.assertEqual([], multiprocessing.active_children())
+
+    def test_cache(self):
+        """Test files are read through their columnar caches, which are only built once, and can be filtered."""
+        for max_workers in (1, 2):
+            with self.subTest(max_workers=max_workers):
+                with iter_gaf_batches([TEST_GOA_PATH], max_workers=max_workers) as batches:
+                    self.assertEqual(5, sum(map(len, batches)))
+                self.assertEqual(1, len(os.listdir(self.cache_directory)))
+
+        with mock.patch('bio2bel_go.gaf_cache.GafTable.from_path') as from_path:
+            with iter_gaf_batches([TEST_GOA_PATH], max_workers=1, evidence_codes=['IDA']) as batches:
+                records = [record for batch in batches for record in batch]
+            from_path.assert_not_called()
+
+        self.assertEqual(2, len(records))
+        self.assertTrue(all(record.evidence_code == 'IDA' for record in records))
+
+    def test_sources(self):
+        """Test reading a directory and downloading from a ``file://`` URL."""
+        directory = tempfile.mkdtemp()
+        try:
+            shutil.copy(TEST_GOA_PATH, os.path.join(directory, 'a.gaf'))
+            shutil.copy(TEST_GOA_PATH, os.path.join(directory, 'b.gaf'))
+            with open(os.path.join(directory, 'README'), 'w') as file:
+                print('not a GAF file', file=file)
+
+            self.assertEqual(
+                [(None, os.path.join(directory, 'a.gaf')), (None, os.path.join(directory, 'b.gaf'))],
+                get_gaf_sources([directory]),
+            )
+
+            download_path = os.path.join(directory, 'downloaded.gaf')
+            sources = [directory, (f'file://{TEST_GOA_PATH}', download_path)]
+            with iter_gaf_batches(sources) as batches:
+                records = [record for batch in batches for record in batch]
+            self.assertTrue(os.path.exists(download_path))
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(5, len(records))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for populating the database."""
+
+from bio2bel_go import Manager
+from tests.constants import TemporaryCacheClass
+
+
+class TestPopulate(TemporaryCacheClass):
+    """Tests the content of the database after population."""
+
+    manager: Manager
+
+    def test_count(self):
+        """Test the number of rows inserted in each table."""
+        self.assertEqual(9, self.manager.count_terms())
+        self.assertEqual(9, self.manager.count_synonyms())
+        self.assertEqual(8, self.manager.count_hierarchies())
+        self.assertEqual(4, self.manager.count_annotations())
+
+    def test_hierarchy(self):
+        """Test the hierarchy is linked by primary keys."""
+        term = self.manager.get_term_by_id('GO:0008283')
+        self.assertIsNotNone(term)
+        self.assertEqual(['GO:0008150'], [hierarchy.object.go_id for hierarchy in term.out_edges])
+        self.assertFalse(term.is_complex)
+
+    def test_complex(self):
+        """Test descendants of GO:0032991 are flagged as complexes."""
+        self.assertTrue(self.manager.get_term_by_id('GO:0043234').is_complex)
+        self.assertFalse(self.manager.get_term_by_id('GO:0032991').is_complex)
+        self.assertFalse(self.manager.get_term_by_id('GO:0005575').is_complex)
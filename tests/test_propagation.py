@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the materialized propagated annotations."""
+
+import shutil
+import tempfile
+
+from bio2bel_go import Manager
+from bio2bel_go.models import PropagatedAnnotation, TermClosure
+from tests.constants import TEST_GOA_PATH, TEST_GO_PATH, TemporaryCacheClass
+from tests.test_update import _make_next_release
+
+TP53 = 'UniProtKB', 'P04637', 'TP53'
+EGFR = 'UniProtKB', 'P00533', 'EGFR'
+EGFR_COMPLEX = 'ComplexPortal', 'CPX-2158', 'EGFR:EGF complex'
+
+
+class TestFallback(TemporaryCacheClass):
+    """Tests descendant-inclusive lookups without the propagated annotations."""
+
+    manager: Manager
+
+    def test_lookup(self):
+        """Test the descendants are found in the ontology."""
+        self.assertFalse(self.manager.has_propagated_annotations())
+        self.assertEqual({TP53, EGFR, EGFR_COMPLEX}, self.manager.get_annotated_genes('GO:0008150'))
+        self.assertEqual(set(), self.manager.get_annotated_genes('GO:0008150', include_descendants=False))
+        self.assertEqual({TP53, EGFR, EGFR_COMPLEX}, self.manager.get_annotated_genes('0008283', tax_id='9606'))
+        self.assertEqual(set(), self.manager.get_annotated_genes('GO:0008283', tax_id='10090'))
+
+
+class TestPropagation(TemporaryCacheClass):
+    """Tests the propagated annotations built during population."""
+
+    manager: Manager
+
+    @classmethod
+    def populate(cls):
+        """Populate the database and build the propagated annotations."""
+        cls.manager.populate(path=TEST_GO_PATH, annotation_paths=[TEST_GOA_PATH], propagate_annotations=True)
+
+    def test_closure(self):
+        """Test the closure has each term with itself and its ancestors along is_a and part_of."""
+        self.assertTrue(self.manager.has_propagated_annotations())
+        pairs = {
+            (closure.descendant.go_id, closure.ancestor.go_id)
+            for closure in self.manager.session.query(TermClosure)
+        }
+        self.assertIn(('GO:0008283', 'GO:0008283'), pairs)
+        self.assertIn(('GO:0000278', 'GO:0008150'), pairs)
+        self.assertIn(('GO:0022402', 'GO:0007049'), pairs)
+        self.assertNotIn(('GO:0008150', 'GO:0008283'), pairs)
+
+    def test_propagated(self):
+        """Test annotations are propagated to ancestors without duplicates, skipping NOT annotations."""
+        rows = [
+            (row.term.go_id, row.db_id)
+            for row in self.manager.session.query(PropagatedAnnotation)
+        ]
+        self.assertEqual(len(rows), len(set(rows)))
+        self.assertEqual(
+            {
+                ('GO:0008283', 'P04637'), ('GO:0008283', 'P00533'), ('GO:0008283', 'CPX-2158'),
+                ('GO:0008150', 'P04637'), ('GO:0008150', 'P00533'), ('GO:0008150', 'CPX-2158'),
+            },
+            set(rows),
+        )
+
+    def test_lookup(self):
+        """Test lookups match the ones that walk the ontology."""
+        self.assertEqual({TP53, EGFR, EGFR_COMPLEX}, self.manager.get_annotated_genes('GO:0008150'))
+        self.assertEqual(set(), self.manager.get_annotated_genes('GO:0008150', tax_id='10090'))
+        self.assertEqual(set(), self.manager.get_annotated_genes('GO:0009987'))
+
+
+class TestPropagationUpdate(TestPropagation):
+    """Tests the propagated annotations are rebuilt when updating to a new release."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with propagated annotations then update it to the next release."""
+        super().populate()
+
+        directory = tempfile.mkdtemp()
+        try:
+            obo_path, gaf_path = _make_next_release(directory)
+            cls.manager.update(path=obo_path, annotation_paths=[gaf_path])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_closure(self):
+        """Test the closure follows the moved edges."""
+        pairs = {
+            (closure.descendant.go_id, closure.ancestor.go_id)
+            for closure in self.manager.session.query(TermClosure)
+        }
+        self.assertIn(('GO:0008283', 'GO:0009987'), pairs)
+        self.assertIn(('GO:0051301', 'GO:0008150'), pairs)
+        self.assertNotIn('GO:0043234', {descendant for descendant, _ in pairs})
+
+    def test_propagated(self):
+        """Test the annotations are propagated to the new ancestors."""
+        self.assertEqual({TP53, EGFR, EGFR_COMPLEX}, self.manager.get_annotated_genes('GO:0009987'))
+
+    def test_lookup(self):
+        """Test lookups match the ones that walk the ontology."""
+        for go_id in ('GO:0008150', 'GO:0009987', 'GO:0051301', 'GO:0007049'):
+            with self.subTest(go_id=go_id):
+                expected = self.manager.get_annotated_genes(go_id)
+                self.manager.ontology = None
+                self.assertEqual(expected, Manager.get_annotated_genes(_WithoutTable(self.manager), go_id))
+
+
+class _WithoutTable:
+    """Wraps a manager so lookups skip the propagated annotations."""
+
+    def __init__(self, manager: Manager) -> None:
+        self._manager = manager
+
+    def __getattr__(self, item):
+        return getattr(self._manager, item)
+
+    def has_propagated_annotations(self) -> bool:
+        return False
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the reports of the phases of populating the database."""
+
+import io
+import json
+import unittest
+
+from sqlalchemy import create_engine
+
+from bio2bel_go import Manager
+from bio2bel_go.report import PopulateReport
+from tests.constants import TemporaryCacheClass
+
+
+class TestPopulateReport(unittest.TestCase):
+    """Tests for :class:`PopulateReport`."""
+
+    def test_nested(self):
+        """Test the time and rows of nested phases are measured separately and SQL statements are counted."""
+        engine = create_engine('sqlite://')
+        report = PopulateReport(engine)
+
+        with report.phase('outer') as phase:
+            for _ in report.iter_phase('inner', [[1, 2], [3]], count=len):
+                engine.execute('SELECT 1')
+            phase.rows = 2
+
+        self.assertEqual(['outer', 'inner'], [phase.name for phase in report.phases])
+        self.assertEqual(2, report['outer'].rows)
+        self.assertEqual(3, report['inner'].rows)
+        self.assertEqual(2, report['outer'].statements)
+        self.assertEqual(0, report['inner'].statements)
+        self.assertAlmostEqual(report.seconds, report['outer'].seconds + report['inner'].seconds)
+        self.assertIsNotNone(report['outer'].peak_rss)
+
+        # Statements outside of any phase aren't counted
+        engine.execute('SELECT 1')
+        self.assertEqual(2, report.to_json()['statements'])
+
+    def test_repeated(self):
+        """Test measuring a phase twice adds to it."""
+        report = PopulateReport()
+        for _ in range(2):
+            with report.phase('phase') as phase:
+                phase.rows += 5
+
+        self.assertEqual(1, len(report.phases))
+        self.assertEqual(10, report['phase'].rows)
+        self.assertNotIn('other', report)
+
+
+class TestPopulateManagerReport(TemporaryCacheClass):
+    """Tests the report made by :meth:`Manager.populate`."""
+
+    manager: Manager
+
+    def test_report(self):
+        """Test each phase of populating is reported with the rows it processed."""
+        report = self.manager.populate_report
+        self.assertIsNotNone(report)
+        self.assertEqual(
+            [
+                'parse_obo', 'index_ontology',
+                'build_term_rows', 'insert_term_rows',
+                'build_synonym_rows', 'insert_synonym_rows',
+                'build_hierarchy_rows', 'insert_hierarchy_rows',
+                'read_annotations', 'build_annotation_rows', 'insert_annotation_rows',
+            ],
+            [phase.name for phase in report.phases],
+        )
+        self.assertEqual(self.manager.count_terms(), report['parse_obo'].rows)
+        self.assertEqual(self.manager.count_terms(), report['insert_term_rows'].rows)
+        self.assertEqual(self.manager.count_synonyms(), report['build_synonym_rows'].rows)
+        self.assertEqual(self.manager.count_hierarchies(), report['insert_hierarchy_rows'].rows)
+        self.assertEqual(self.manager.count_annotations(), report['insert_annotation_rows'].rows)
+        self.assertLess(self.manager.count_annotations(), report['read_annotations'].rows)
+        self.assertLess(0, report['insert_term_rows'].statements)
+
+        file = io.StringIO()
+        report.dump(file)
+        self.assertEqual(report.phases[0].to_json(), json.loads(file.getvalue())['phases'][0])
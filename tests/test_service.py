@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the read-only service layer."""
+
+import asyncio
+import importlib.util
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from bio2bel_go import Manager
+from bio2bel_go.service import AsyncGOService, GOService, build_service_engine, get_blueprint
+from tests.constants import TemporaryCacheClass
+
+GO_IDS = ['GO:0000278', 'GO:0022402', 'GO:0008150', 'GO:1234567']
+GENES = ['P04637', 'P00533', 'Q00000', 'P99999']
+
+
+class TestService(TemporaryCacheClass):
+    """Tests for :class:`GOService`."""
+
+    manager: Manager
+
+    def setUp(self):
+        """Build a service with its own pool of connections to the test database."""
+        super().setUp()
+        self.service = GOService.from_connection(self.connection, pool_size=4)
+
+    def tearDown(self):
+        """Close the service."""
+        self.service.close()
+        super().tearDown()
+
+    def test_terms(self):
+        """Test terms are looked up in a batch and missing ones are left out."""
+        terms = self.service.get_terms(['GO:0000278', '0008150', 'GO:1234567'])
+        self.assertEqual({'GO:0000278', 'GO:0008150'}, set(terms))
+        self.assertEqual('biological_process', terms['GO:0008150']['name'])
+
+    def test_ancestors(self):
+        """Test the ancestors of each term match the ones found by the manager."""
+        ancestors = self.service.get_ancestors(GO_IDS)
+        self.assertEqual({'GO:0000278', 'GO:0022402', 'GO:0008150'}, set(ancestors))
+        self.assertEqual([], ancestors['GO:0008150'])
+        for go_id, ancestor_go_ids in ancestors.items():
+            with self.subTest(go_id=go_id):
+                self.assertEqual([term.go_id for term in self.manager.get_ancestors(go_id)], ancestor_go_ids)
+
+        self.assertEqual({'GO:0000278': ['GO:0007049']}, self.service.get_ancestors(['GO:0000278'], max_depth=1))
+
+    def test_descendants(self):
+        """Test the descendants of each term follow only the given relations."""
+        self.assertEqual(
+            {'GO:0007049': ['GO:0000278'], 'GO:0000278': []},
+            self.service.get_descendants(['GO:0007049', 'GO:0000278'], relations=['is_a']),
+        )
+
+    def test_chunks(self):
+        """Test lookups are split into chunks."""
+        service = GOService(self.service.engine, chunksize=1)
+        self.assertEqual(self.service.get_ancestors(GO_IDS), service.get_ancestors(GO_IDS))
+        self.assertEqual(self.service.get_annotations(GENES), service.get_annotations(GENES))
+
+    def test_annotations(self):
+        """Test the annotations of each gene match the ones found by the manager."""
+        annotations = self.service.get_annotations(GENES)
+        self.assertEqual({'P04637', 'P00533'}, set(annotations))
+        expected = [annotation._asdict() for annotation in self.manager.iter_annotations_for_genes(['P04637'])]
+        self.assertEqual(sorted(expected, key=str), sorted(annotations['P04637'], key=str))
+
+        self.assertEqual({'P04637'}, set(self.service.get_annotations(GENES, evidence_codes=['IMP'])))
+
+    def test_threads(self):
+        """Test lookups from many threads at once give the same results as from one."""
+        expected = self.service.get_ancestors(GO_IDS), self.service.get_annotations(GENES)
+
+        def _lookup(_):
+            return self.service.get_ancestors(GO_IDS), self.service.get_annotations(GENES)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for result in executor.map(_lookup, range(64)):
+                self.assertEqual(expected, result)
+
+    def test_async(self):
+        """Test the coroutines give the same results as the service."""
+        async_service = AsyncGOService(self.service, max_workers=4)
+
+        async def _lookup():
+            return await asyncio.gather(
+                async_service.get_terms(GO_IDS),
+                async_service.get_ancestors(GO_IDS, relations=['is_a']),
+                async_service.get_annotations(GENES, aspects=['P']),
+            )
+
+        try:
+            terms, ancestors, annotations = asyncio.run(_lookup())
+        finally:
+            async_service.close()
+
+        self.assertEqual(self.service.get_terms(GO_IDS), terms)
+        self.assertEqual(self.service.get_ancestors(GO_IDS, relations=['is_a']), ancestors)
+        self.assertEqual(self.service.get_annotations(GENES, aspects=['P']), annotations)
+
+    @unittest.skipIf(importlib.util.find_spec('flask') is None, 'flask is not installed')
+    def test_blueprint(self):
+        """Test the endpoints of the blueprint."""
+        from flask import Flask
+
+        app = Flask(__name__)
+        app.register_blueprint(get_blueprint(self.service), url_prefix='/api')
+        client = app.test_client()
+
+        response = client.get('/api/ancestors?go_id=GO:0000278&go_id=GO:0008150&max_depth=1')
+        self.assertEqual({'GO:0000278': ['GO:0007049'], 'GO:0008150': []}, response.get_json())
+
+        response = client.post('/api/annotations', json={'id': GENES, 'evidence_code': ['IMP']})
+        self.assertEqual({'P04637'}, set(response.get_json()))
+
+
+class TestServiceEngine(unittest.TestCase):
+    """Tests for :func:`build_service_engine`."""
+
+    def test_memory(self):
+        """Test an in-memory database is shared by all threads."""
+        engine = build_service_engine('sqlite://')
+        engine.execute('CREATE TABLE t (x INTEGER)')
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(0, executor.submit(lambda: engine.execute('SELECT count(*) FROM t').scalar()).result())
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for semantic similarity."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import networkx as nx
+import numpy as np
+
+from bio2bel_go import Manager
+from bio2bel_go.ontology import Ontology
+from bio2bel_go.similarity import (
+    SemanticSimilarity, compute_information_content, load_information_content, save_information_content,
+)
+from tests.constants import TemporaryCacheClass
+
+#: The number of genes annotated to each term or its descendants
+COUNTS = {'A': 10, 'B': 6, 'C': 4, 'D': 3, 'E': 2, 'F': 1}
+
+
+class TestSemanticSimilarity(unittest.TestCase):
+    """Tests for :class:`bio2bel_go.similarity.SemanticSimilarity`."""
+
+    def setUp(self):
+        """Build a hierarchy where D and E are children of B, B and C are children of A, and F is part of C."""
+        graph = nx.MultiDiGraph()
+        for node in 'ABCDEF':
+            graph.add_node(node, name=node.lower(), namespace='biological_process')
+        graph.add_node('X', name='x', namespace='molecular_function')
+        for child, parent in [('B', 'A'), ('C', 'A'), ('D', 'B'), ('E', 'B')]:
+            graph.add_edge(child, parent, key='is_a')
+        graph.add_edge('F', 'C', key='part_of')
+
+        self.ontology = Ontology.from_graph(graph)
+        term_sizes = [COUNTS.get(go_id, 0) for go_id in self.ontology.go_ids]
+        self.information_content = compute_information_content(self.ontology, term_sizes)
+        self.similarity = SemanticSimilarity(self.ontology, self.information_content)
+
+    def ic(self, go_id):
+        """Get the expected information content of a term."""
+        return -np.log(COUNTS[go_id] / COUNTS['A'])
+
+    def test_information_content(self):
+        """Test terms without annotations have no information content."""
+        self.assertEqual(0.0, self.information_content[self.ontology.get_index('A')])
+        self.assertAlmostEqual(self.ic('F'), self.information_content[self.ontology.get_index('F')])
+        self.assertTrue(np.isnan(self.information_content[self.ontology.get_index('X')]))
+
+    def test_resnik(self):
+        """Test the IC of the most informative common ancestor, compared with a brute-force search."""
+        go_ids = list('ABCDEF')
+        matrix = self.similarity.term_similarity(go_ids, method='resnik')
+        for i, a in enumerate(go_ids):
+            for j, b in enumerate(go_ids):
+                common = ({a} | self.ontology.get_ancestors(a)) & ({b} | self.ontology.get_ancestors(b))
+                self.assertAlmostEqual(max(self.ic(term) for term in common), matrix[i, j], msg=(a, b))
+
+        self.assertAlmostEqual(self.ic('B'), self.similarity.term_similarity(['D'], ['E'], method='resnik')[0, 0])
+        self.assertEqual(0.0, self.similarity.term_similarity(['D'], ['X'], method='resnik')[0, 0])
+
+    def test_lin(self):
+        """Test Lin's similarity, including terms without information content."""
+        matrix = self.similarity.term_similarity(['D', 'A', 'X'], ['E', 'A', 'B'], method='lin')
+        self.assertAlmostEqual(2 * self.ic('B') / (self.ic('D') + self.ic('E')), matrix[0, 0])
+        self.assertEqual(1.0, matrix[1, 1])
+        self.assertEqual(0.0, matrix[1, 2])
+        self.assertTrue(np.isnan(matrix[2]).all())
+
+    def test_wang(self):
+        """Test Wang's similarity with the is_a and part_of weights."""
+        matrix = self.similarity.term_similarity(['D', 'F'], ['E', 'C'], method='wang')
+        self.assertAlmostEqual((0.8 + 0.64) * 2 / (2.44 * 2), matrix[0, 0])
+        self.assertAlmostEqual((0.6 + 1 + 0.48 + 0.8) / (2.08 + 1.8), matrix[1, 1])
+        self.assertEqual(1.0, self.similarity.term_similarity(['F'], ['F'], method='wang')[0, 0])
+
+    def test_invalid(self):
+        """Test errors for unknown methods and terms."""
+        with self.assertRaises(ValueError):
+            self.similarity.term_similarity(['A'], method='cosine')
+        with self.assertRaises(KeyError):
+            self.similarity.term_similarity(['GO:1234567'])
+
+    def test_gene_similarity(self):
+        """Test the best-match average against the term similarities."""
+        genes = [['D'], ['E', 'F'], [], ['D', 'missing']]
+        for method in ('resnik', 'lin', 'wang'):
+            with self.subTest(method=method):
+                terms = self.similarity.term_similarity(['D'], ['E', 'F'], method=method)[0]
+                expected = (terms.max() + terms.mean()) / 2
+
+                matrix = self.similarity.gene_similarity(genes, method=method)
+                self.assertEqual((4, 4), matrix.shape)
+                self.assertAlmostEqual(expected, matrix[0, 1])
+                self.assertAlmostEqual(expected, matrix[1, 0])
+                self.assertAlmostEqual(matrix[0, 0], matrix[0, 3])
+                self.assertTrue(np.isnan(matrix[2]).all())
+                self.assertTrue(np.isnan(matrix[:, 2]).all())
+
+                other = self.similarity.gene_similarity(genes[:2], [['E', 'F']], method=method)
+                np.testing.assert_allclose(matrix[:2, 1:2], other)
+
+    def test_cache(self):
+        """Test saving and loading the information content."""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'ic.npz')
+            save_information_content(path, self.ontology, self.information_content)
+            np.testing.assert_array_equal(self.information_content, load_information_content(path, self.ontology))
+
+            other = Ontology.from_graph(nx.MultiDiGraph([('Y', 'Z', 'is_a')]))
+            self.assertIsNone(load_information_content(path, other))
+            self.assertIsNone(load_information_content(os.path.join(directory, 'missing.npz'), self.ontology))
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestManagerSimilarity(TemporaryCacheClass):
+    """Tests semantic similarity from the database."""
+
+    manager: Manager
+
+    def setUp(self):
+        """Cache the information content in a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.patch = mock.patch('bio2bel_go.similarity.IC_CACHE_DIRECTORY', self.directory)
+        self.patch.start()
+        self.manager._semantic_similarity = None
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.patch.stop()
+        shutil.rmtree(self.directory)
+
+    def test_term_similarity(self):
+        """Test the similarities between terms are labeled by GO identifier."""
+        df = self.manager.get_term_similarity(['GO:0000278', '0022402'], method='wang')
+        self.assertEqual(['GO:0000278', 'GO:0022402'], list(df.index))
+        self.assertEqual(1.0, df.loc['GO:0000278', 'GO:0000278'])
+        self.assertTrue(0 < df.loc['GO:0000278', 'GO:0022402'] < 1)
+        self.assertEqual(1, len(os.listdir(self.directory)))
+
+    def test_gene_similarity(self):
+        """Test the similarities between genes, which are NaN for genes without annotations."""
+        df = self.manager.get_gene_similarity(['TP53', 'EGFR', 'NOPE'])
+        self.assertEqual(1.0, df.loc['TP53', 'EGFR'])
+        self.assertTrue(np.isnan(df.loc['NOPE', 'TP53']))
+
+        # The cached information content is reused
+        self.manager._semantic_similarity = None
+        with mock.patch('bio2bel_go.manager.compute_information_content') as compute:
+            self.manager.get_gene_similarity(['TP53'], ['EGFR'], method='resnik')
+            compute.assert_not_called()
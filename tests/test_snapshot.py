@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the columnar snapshot of the ontology."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from bio2bel_go.parser import get_go_from_obo
+from bio2bel_go.snapshot import (
+    SNAPSHOT_FORMAT_VERSION, StringTable, get_obo_data_version, read_snapshot, write_snapshot,
+)
+from tests.constants import TEST_GO_PATH
+
+
+class TestSnapshot(unittest.TestCase):
+    """Tests for :mod:`bio2bel_go.snapshot`."""
+
+    def setUp(self):
+        """Make a temporary directory and parse the test OBO file."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'go.snapshot')
+        self.graph = get_go_from_obo(path=TEST_GO_PATH)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.directory)
+
+    def test_string_table(self):
+        """Test strings with multi-byte characters survive a string table."""
+        strings = ['a', '', 'β-catenin', 'xyz']
+        table = StringTable.from_strings(strings)
+        self.assertEqual(4, len(table))
+        self.assertEqual('β-catenin', table[2])
+        self.assertEqual(strings, list(table))
+
+    def test_data_version(self):
+        """Test reading the data version from the OBO header."""
+        self.assertEqual(self.graph.graph['data-version'], get_obo_data_version(TEST_GO_PATH))
+
+    def test_missing(self):
+        """Test reading a missing snapshot gives None."""
+        self.assertIsNone(read_snapshot(self.path))
+
+    def test_outdated(self):
+        """Test a snapshot with another format version, like one with int64 edge offsets, is not read."""
+        write_snapshot(self.graph, self.path)
+        meta_path = os.path.join(self.path, 'meta.json')
+        with open(meta_path) as file:
+            meta = json.load(file)
+        meta['format_version'] = SNAPSHOT_FORMAT_VERSION - 1
+        with open(meta_path, 'w') as file:
+            json.dump(meta, file)
+
+        self.assertIsNone(read_snapshot(self.path))
+
+    def test_round_trip(self):
+        """Test the graph rebuilt from a snapshot matches the parsed graph."""
+        write_snapshot(self.graph, self.path)
+        snapshot = read_snapshot(self.path)
+
+        self.assertIsInstance(snapshot.names.data, np.memmap)
+        self.assertEqual(9, len(snapshot))
+        self.assertEqual(8, snapshot.number_of_edges())
+        self.assertTrue(all(indptr.dtype == np.int32 for indptr, _ in snapshot.edges.values()))
+        self.assertEqual(self.graph.graph['data-version'], snapshot.data_version)
+
+        graph = snapshot.to_graph()
+        self.assertEqual(list(self.graph), list(graph))
+        self.assertEqual(set(self.graph.edges(keys=True)), set(graph.edges(keys=True)))
+        self.assertEqual(self.graph.graph['data-version'], graph.graph['data-version'])
+
+        for go_id, data in self.graph.nodes(data=True):
+            with self.subTest(go_id=go_id):
+                for key in ('name', 'namespace', 'def', 'synonym'):
+                    self.assertEqual(data.get(key), graph.nodes[go_id].get(key))
+
+    def test_overwrite(self):
+        """Test writing a snapshot replaces an existing one."""
+        write_snapshot(self.graph, self.path)
+        self.graph.remove_node('GO:0043234')
+        write_snapshot(self.graph, self.path)
+        self.assertEqual(8, len(read_snapshot(self.path)))
+        self.assertEqual([os.path.basename(self.path)], os.listdir(os.path.dirname(self.path)))
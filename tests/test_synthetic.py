@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the synthetic ontologies and annotations."""
+
+import filecmp
+import os
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+
+from bio2bel_go import Manager
+from bio2bel_go.constants import GO_COMPLEX_ID
+from bio2bel_go.parser import iter_gaf_records, read_obo
+from bio2bel_go.synthetic import generate_synthetic_terms, write_synthetic_files
+from tests.constants import TemporaryCacheClass
+
+TERMS = 300
+ANNOTATIONS = 5000
+
+
+class TestSynthetic(unittest.TestCase):
+    """Tests for :mod:`bio2bel_go.synthetic`."""
+
+    def setUp(self):
+        """Make a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.directory)
+
+    def test_terms(self):
+        """Test the terms make a directed acyclic graph within each namespace."""
+        terms = generate_synthetic_terms(TERMS, seed=1)
+        self.assertEqual(TERMS + 4, len(terms))
+        self.assertEqual(generate_synthetic_terms(TERMS, seed=1), terms)
+        self.assertNotEqual(generate_synthetic_terms(TERMS, seed=2), terms)
+
+        namespaces = {term.go_id: term.namespace for term in terms}
+        seen = set()
+        for term in terms:
+            for relation, parent in term.parents:
+                self.assertIn(parent, seen, msg='parents must come before their children')
+                self.assertEqual(namespaces[term.go_id], namespaces[parent])
+            seen.add(term.go_id)
+
+    def test_files(self):
+        """Test the files are deterministic, can be parsed, and aren't written twice."""
+        obo_path, gaf_path = write_synthetic_files(self.directory, TERMS, ANNOTATIONS)
+        other_obo_path, other_gaf_path = write_synthetic_files(os.path.join(self.directory, 'other'), TERMS,
+                                                               ANNOTATIONS)
+        self.assertTrue(filecmp.cmp(obo_path, other_obo_path, shallow=False))
+        self.assertEqual(list(iter_gaf_records(gaf_path)), list(iter_gaf_records(other_gaf_path)))
+
+        modified = os.path.getmtime(gaf_path)
+        self.assertEqual((obo_path, gaf_path), write_synthetic_files(self.directory, TERMS, ANNOTATIONS))
+        self.assertEqual(modified, os.path.getmtime(gaf_path))
+
+        graph = read_obo(obo_path)
+        self.assertEqual(TERMS + 4, graph.number_of_nodes())
+        self.assertTrue(nx.is_directed_acyclic_graph(graph))
+        self.assertEqual('releases/synthetic', graph.graph['data-version'])
+
+        records = list(iter_gaf_records(gaf_path))
+        self.assertEqual(ANNOTATIONS, len(records))
+        self.assertTrue(all(record.go_id in graph for record in records))
+
+
+class TestPopulateSynthetic(TemporaryCacheClass):
+    """Tests populating the database from synthetic files."""
+
+    manager: Manager
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with synthetic files."""
+        cls.directory = tempfile.mkdtemp()
+        obo_path, gaf_path = write_synthetic_files(cls.directory, TERMS, ANNOTATIONS)
+        cls.manager.populate(path=obo_path, annotation_paths=[gaf_path], max_workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the synthetic files."""
+        shutil.rmtree(cls.directory)
+        super().tearDownClass()
+
+    def test_populate(self):
+        """Test all terms and about all annotations are stored."""
+        self.assertEqual(TERMS + 4, self.manager.count_terms())
+        self.assertLess(0.95 * ANNOTATIONS, self.manager.count_annotations())
+        self.assertEqual('releases/synthetic', self.manager.get_data_version())
+        self.assertLess(0, len(self.manager.get_descendants(GO_COMPLEX_ID)))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the recursive queries over the hierarchy."""
+
+from bio2bel_go import Manager
+from tests.constants import TemporaryCacheClass
+
+
+def _ids(terms):
+    return [term.go_id for term in terms]
+
+
+class TestTraversal(TemporaryCacheClass):
+    """Tests for :mod:`bio2bel_go.traversal`."""
+
+    manager: Manager
+
+    def test_ancestors(self):
+        """Test ancestors are ordered by distance and limited by depth."""
+        self.assertEqual(['GO:0007049', 'GO:0009987', 'GO:0008150'], _ids(self.manager.get_ancestors('GO:0000278')))
+        self.assertEqual(['GO:0007049'], _ids(self.manager.get_ancestors('0000278', max_depth=1)))
+        self.assertEqual([], _ids(self.manager.get_ancestors('GO:0008150')))
+        self.assertEqual([], _ids(self.manager.get_ancestors('GO:1234567')))
+
+    def test_descendants(self):
+        """Test descendants follow only the given relations."""
+        self.assertEqual(
+            ['GO:0007049', 'GO:0022402', 'GO:0000278'],
+            _ids(self.manager.get_descendants('GO:0009987')),
+        )
+        self.assertEqual(['GO:0000278', 'GO:0022402'], _ids(self.manager.get_descendants('GO:0007049')))
+        self.assertEqual(['GO:0000278'], _ids(self.manager.get_descendants('GO:0007049', relations=['is_a'])))
+        self.assertEqual(['GO:0022402'], _ids(self.manager.get_descendants('GO:0007049', relations=['part_of'])))
+
+    def test_common_ancestors(self):
+        """Test the lowest common ancestors come first."""
+        self.assertEqual(
+            ['GO:0007049', 'GO:0009987', 'GO:0008150'],
+            _ids(self.manager.get_common_ancestors(['GO:0000278', 'GO:0022402'])),
+        )
+        self.assertEqual(
+            ['GO:0009987', 'GO:0008150'],
+            _ids(self.manager.get_common_ancestors(['GO:0000278', 'GO:0022402'], relations=['is_a'])),
+        )
+        self.assertEqual(
+            ['GO:0007049', 'GO:0009987', 'GO:0008150'],
+            _ids(self.manager.get_common_ancestors(['GO:0000278', 'GO:0007049'])),
+        )
+        self.assertEqual([], _ids(self.manager.get_common_ancestors(['GO:0000278', 'GO:1234567'])))
+        self.assertEqual([], _ids(self.manager.get_common_ancestors(['GO:0000278', 'GO:0022402'], max_depth=0)))
+
+    def test_matches_ontology(self):
+        """Test the queries match the traversals of the array-backed ontology."""
+        ontology = self.manager.get_ontology()
+        for go_id in ontology.go_ids:
+            for relations in (None, ['is_a'], ['part_of']):
+                with self.subTest(go_id=go_id, relations=relations):
+                    self.assertEqual(
+                        ontology.get_ancestors(go_id, relations=relations),
+                        set(_ids(self.manager.get_ancestors(go_id, relations=relations))),
+                    )
+                    self.assertEqual(
+                        ontology.get_descendants(go_id, relations=relations),
+                        set(_ids(self.manager.get_descendants(go_id, relations=relations))),
+                    )
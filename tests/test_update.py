@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for updating the database to another release."""
+
+import os
+import shutil
+import tempfile
+
+from sqlalchemy import MetaData, Table, inspect, text
+
+from bio2bel_go import Manager
+from bio2bel_go.models import Annotation, Base, Term
+from tests.constants import TEST_GOA_PATH, TEST_GO_PATH, TemporaryCacheClass
+
+NEW_TERM = '''[Term]
+id: GO:0051301
+name: cell division
+namespace: biological_process
+synonym: "cytokinesis" RELATED []
+is_a: GO:0009987 ! cellular process
+
+'''
+
+NEW_ANNOTATION = '\t'.join([
+    'ComplexPortal', 'CPX-2158', 'EGFR:EGF complex', '', 'GO:0051301', 'PMID:2303006', 'IDA', '', 'P',
+    'EGF:EGFR complex', '', 'protein_complex', 'taxon:9606', '20180201', 'ComplexPortal', '', '',
+])
+
+
+def _make_next_release(directory: str):
+    """Write an OBO and GAF file for a made-up next release of the test files."""
+    with open(TEST_GO_PATH) as file:
+        obo = file.read()
+
+    # Remove the protein complex, which is the last stanza
+    obo = obo[:obo.index('[Term]\nid: GO:0043234')]
+    obo = obo.replace('releases/2018-01-08', 'releases/2018-02-01')
+    obo = obo.replace('name: cell cycle\n', 'name: cell division cycle\n')
+    obo = obo.replace(
+        'id: GO:0008283\nname: cell proliferation',
+        'id: GO:0008283\nname: cell population proliferation',
+    )
+    obo = obo.replace(
+        "not for the expansion of a population of single-celled organisms.\n"
+        "subset: goslim_agr\nsubset: goslim_chembl\nsubset: goslim_generic\nsubset: goslim_mouse\n"
+        "subset: goslim_pir\nsubset: gosubset_prok\nis_a: GO:0008150 ! biological_process",
+        "not for the expansion of a population of single-celled organisms.\nis_a: GO:0009987 ! cellular process",
+    )
+    obo += NEW_TERM
+
+    obo_path = os.path.join(directory, 'go.obo')
+    with open(obo_path, 'w') as file:
+        file.write(obo)
+
+    with open(TEST_GOA_PATH) as file:
+        lines = [line for line in file if 'NOT|involved_in' not in line]
+
+    gaf_path = os.path.join(directory, 'goa.gaf')
+    with open(gaf_path, 'w') as file:
+        file.writelines(lines)
+        print(NEW_ANNOTATION, file=file)
+
+    return obo_path, gaf_path
+
+
+#: The columns added to the tables of Bio2BEL GO since it first stored terms and annotations
+NEW_COLUMNS = {
+    Term.__tablename__: {'release'},
+    Annotation.__tablename__: {'content_hash'},
+}
+
+
+def _create_legacy_tables(engine) -> None:
+    """Create the tables of Bio2BEL GO without the columns in :data:`NEW_COLUMNS` and without composite indexes."""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        Table(table.name, metadata, *(
+            column.copy()
+            for column in table.columns
+            if column.name not in NEW_COLUMNS.get(table.name, ())
+        ))
+    metadata.create_all(engine)
+
+
+class TestUpdateUnchanged(TemporaryCacheClass):
+    """Tests updating to the same release."""
+
+    manager: Manager
+
+    def test_unchanged(self):
+        """Test nothing changes when updating with the same files."""
+        rv = self.manager.update(path=TEST_GO_PATH, annotation_paths=[TEST_GOA_PATH])
+        self.assertEqual(0, sum(rv.values()), msg=rv)
+        self.assertIn('annotations_added', rv)
+        self.assertEqual('20180108', self.manager.get_release_date())
+
+
+class TestUpdate(TemporaryCacheClass):
+    """Tests updating to a new release."""
+
+    manager: Manager
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with the test data then update it to the next release."""
+        super().populate()
+
+        directory = tempfile.mkdtemp()
+        try:
+            obo_path, gaf_path = _make_next_release(directory)
+            cls.rv = cls.manager.update(path=obo_path, annotation_paths=[gaf_path])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_counts(self):
+        """Test only the differences are applied."""
+        self.assertEqual(
+            dict(
+                terms_added=1, terms_changed=2, terms_removed=1,
+                synonyms_added=1, synonyms_removed=1,
+                edges_added=2, edges_removed=2,
+                annotations_added=1, annotations_removed=1,
+            ),
+            self.rv,
+        )
+        self.assertEqual(dict(terms=9, synonyms=9, hierarchies=8, annotations=4), self.manager.summarize())
+
+    def test_terms(self):
+        """Test terms are renamed, removed, and added."""
+        self.assertIsNone(self.manager.get_term_by_id('GO:0043234'))
+        self.assertEqual('cell division cycle', self.manager.get_term_by_id('GO:0007049').name)
+
+        term = self.manager.get_term_by_id('GO:0051301')
+        self.assertEqual(['"cytokinesis" RELATED []'], [synonym.name for synonym in term.synonyms])
+        self.assertEqual(['CPX-2158'], [annotation.db_id for annotation in term.annotations])
+
+        self.assertEqual('releases/2018-02-01', self.manager.get_data_version())
+
+    def test_releases(self):
+        """Test only the added and changed terms are stamped with the new release."""
+        for go_id, release in [
+            ('GO:0007049', 'releases/2018-02-01'),
+            ('GO:0008283', 'releases/2018-02-01'),
+            ('GO:0008150', 'releases/2018-01-08'),
+        ]:
+            with self.subTest(go_id=go_id):
+                self.assertEqual(release, self.manager.get_term_by_id(go_id).release)
+
+    def test_hierarchy(self):
+        """Test edges are moved."""
+        term = self.manager.get_term_by_id('GO:0008283')
+        self.assertEqual('cell population proliferation', term.name)
+        self.assertEqual(['GO:0009987'], [hierarchy.object.go_id for hierarchy in term.out_edges])
+
+
+class TestUpdateLegacy(TemporaryCacheClass):
+    """Tests updating a database created before terms had releases and annotations had content hashes."""
+
+    manager: Manager
+
+    @classmethod
+    def populate(cls):
+        """Make the tables without the new columns, add an annotation, then update the database."""
+        cls.manager.drop_all()
+        _create_legacy_tables(cls.manager.engine)
+        with cls.manager.engine.begin() as connection:
+            connection.execute(Term.__table__.insert(), dict(
+                id=1, go_id='GO:0008150', name='biological_process', namespace='biological_process',
+                is_complex=False,
+            ))
+            connection.execute(Annotation.__table__.insert(), dict(
+                term_id=1, db='UniProtKB', db_id='P00533', db_symbol='EGFR', provenance_db='PMID',
+                provenance_id='1', evidence_code='IDA', tax_id='9606',
+            ))
+
+        cls.rv = cls.manager.update(path=TEST_GO_PATH, annotation_paths=[TEST_GOA_PATH], max_workers=1)
+
+    def test_columns(self):
+        """Test the new columns are added."""
+        inspector = inspect(self.manager.engine)
+        for table_name, column_names in NEW_COLUMNS.items():
+            with self.subTest(table=table_name):
+                self.assertLessEqual(
+                    column_names,
+                    {column['name'] for column in inspector.get_columns(table_name)},
+                )
+
+    def test_content(self):
+        """Test the annotation without a content hash is replaced and the rest of the release is added."""
+        self.assertEqual(1, self.rv['annotations_removed'])
+        self.assertEqual(dict(terms=9, synonyms=9, hierarchies=8, annotations=4), self.manager.summarize())
+        self.assertEqual(0, self.manager.session.query(Annotation).filter(Annotation.content_hash.is_(None)).count())
+
+
+class TestUpdateIndexes(TemporaryCacheClass):
+    """Tests updating a database created before the composite indexes were added."""
+
+    manager: Manager
+
+    def test_create_missing_indexes(self):
+        """Test the missing columns and indexes are created, including the indexes on the missing columns."""
+        engine = self.manager.engine
+        dropped = {'ix_go_annotation_term_tax', 'ix_go_annotation_content_hash'}
+        for index in Annotation.__table__.indexes:
+            if index.name in dropped:
+                index.drop(engine)
+        with engine.begin() as connection:
+            for table_name, column_names in NEW_COLUMNS.items():
+                for column_name in column_names:
+                    connection.execute(text(f'ALTER TABLE {table_name} DROP COLUMN {column_name}'))
+
+        self.manager.update(path=TEST_GO_PATH, annotation_paths=[TEST_GOA_PATH])
+        inspector = inspect(engine)
+        self.assertLessEqual(dropped, {index['name'] for index in inspector.get_indexes(Annotation.__tablename__)})
+        self.assertIn('content_hash', {column['name'] for column in inspector.get_columns(Annotation.__tablename__)})